@@ -0,0 +1,4 @@
+-- documents: updatedAt para sincronização incremental (ex.: espelho local do bot via GET /api/documents?since=)
+ALTER TABLE documents ADD COLUMN updatedAt TEXT NOT NULL DEFAULT '';
+UPDATE documents SET updatedAt = createdAt WHERE updatedAt = '';
+CREATE INDEX IF NOT EXISTS idx_documents_updatedAt ON documents(updatedAt);
@@ -13,15 +13,27 @@ function rowToDoc(row) {
     tags: JSON.parse(row.tags || '[]'),
     relations: JSON.parse(row.relations || '[]'),
     createdAt: row.createdAt,
+    updatedAt: row.updatedAt || row.createdAt,
   }
 }
 
+// ?since=<ISO> retorna só documentos criados/alterados a partir dessa data (sincronização incremental)
 router.get('/', (req, res) => {
   const db = req.app.locals.db
-  const rows = db.prepare('SELECT * FROM documents ORDER BY title').all()
+  const { since } = req.query
+  const rows = since
+    ? db.prepare('SELECT * FROM documents WHERE updatedAt >= ? ORDER BY updatedAt').all(since)
+    : db.prepare('SELECT * FROM documents ORDER BY title').all()
   res.json(rows.map(rowToDoc))
 })
 
+// Apenas os ids, para detectar exclusões sem baixar o conteúdo
+router.get('/ids', (req, res) => {
+  const db = req.app.locals.db
+  const rows = db.prepare('SELECT id FROM documents').all()
+  res.json(rows.map((row) => row.id))
+})
+
 router.get('/search', (req, res) => {
   const db = req.app.locals.db
   const { q, tag, interest, area } = req.query
@@ -62,8 +74,8 @@ router.post('/', (req, res) => {
   if (!d || !d.id || !d.createdAt) return res.status(400).json({ message: 'Invalid payload' })
   db
     .prepare(
-      `INSERT INTO documents (id,title,cover,content,interest,area,tags,relations,createdAt)
-       VALUES (@id,@title,@cover,@content,@interest,@area,@tags,@relations,@createdAt)`
+      `INSERT INTO documents (id,title,cover,content,interest,area,tags,relations,createdAt,updatedAt)
+       VALUES (@id,@title,@cover,@content,@interest,@area,@tags,@relations,@createdAt,@updatedAt)`
     )
     .run({
       id: d.id,
@@ -75,6 +87,7 @@ router.post('/', (req, res) => {
       tags: JSON.stringify(d.tags || []),
       relations: JSON.stringify(d.relations || []),
       createdAt: d.createdAt,
+      updatedAt: new Date().toISOString(),
     })
   const row = db.prepare('SELECT * FROM documents WHERE id = ?').get(d.id)
   res.status(201).json(rowToDoc(row))
@@ -96,10 +109,11 @@ router.patch('/:id', (req, res) => {
     tags: JSON.stringify(payload.tags ?? JSON.parse(existing.tags || '[]')),
     relations: JSON.stringify(payload.relations ?? JSON.parse(existing.relations || '[]')),
     createdAt: existing.createdAt,
+    updatedAt: new Date().toISOString(),
   }
   db
     .prepare(
-      `UPDATE documents SET title=@title, cover=@cover, content=@content, interest=@interest, area=@area, tags=@tags, relations=@relations WHERE id=@id`
+      `UPDATE documents SET title=@title, cover=@cover, content=@content, interest=@interest, area=@area, tags=@tags, relations=@relations, updatedAt=@updatedAt WHERE id=@id`
     )
     .run(updated)
   const row = db.prepare('SELECT * FROM documents WHERE id = ?').get(id)
@@ -1,14 +1,24 @@
 """
-Processamento de áudio: download do Telegram, conversão ogg->wav, transcrição.
+Processamento de áudio: download do Telegram, decodificação ogg->PCM e transcrição, tudo em memória.
+O áudio baixado vai direto para o stdin do ffmpeg e o PCM (16 kHz, mono, 16 bits) sai pelo stdout
+para o reconhecedor, sem arquivos temporários.
 Transcrição via Google Web Speech API (gratuita, não oficial) usando SpeechRecognition.
+
+transcrever_voice não bloqueia o event loop: o ffmpeg roda como subprocesso assíncrono e o
+reconhecimento (bloqueante) num executor próprio, com no máximo AUDIO_TRABALHADORES áudios em
+processamento; os demais esperam na fila (métricas "audio_fila:espera" e "audio_fila:profundidade").
 """
+import asyncio
 import logging
 import subprocess
-import tempfile
-from pathlib import Path
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 import speech_recognition as sr
 
+from assistant import metricas
+from assistant.config import AUDIO_TRABALHADORES
+
 logger = logging.getLogger(__name__)
 
 
@@ -18,83 +28,83 @@ class FFmpegNotFoundError(FileNotFoundError):
 
 # Google Web Speech tem limite prático de ~1 minuto; áudios maiores são cortados
 DURACAO_MAX_SEGUNDOS = 60
+# Formato do PCM entregue ao reconhecedor
+TAXA_AMOSTRAGEM = 16000
+BYTES_POR_AMOSTRA = 2
+
+_executor = ThreadPoolExecutor(max_workers=max(1, AUDIO_TRABALHADORES), thread_name_prefix="transcricao")
+_vagas: asyncio.Semaphore | None = None
+_na_fila = 0
+_em_andamento = 0
 
 
-async def baixar_arquivo_voice(file_id: str, bot) -> str:
+async def baixar_voice(file_id: str, bot) -> bytes:
     """
-    Baixa o arquivo de voz do Telegram em diretório temporário.
+    Baixa o arquivo de voz do Telegram para a memória.
     bot: instância com get_file (ex.: context.bot ou application.bot).
-    Retorna o path do arquivo .ogg.
     """
-    import os
-
     logger.info("Baixando áudio do Telegram: file_id=%s", file_id)
     arquivo = await bot.get_file(file_id)
-    suffix = Path(arquivo.file_path or "").suffix or ".ogg"
-    fd, path = tempfile.mkstemp(suffix=suffix, prefix="voice_")
-    os.close(fd)
-    try:
-        os.unlink(path)
-    except OSError:
-        pass
-    await arquivo.download_to_drive(custom_path=path)
-    logger.info("Download concluído: %s", path)
-    return path
+    dados = bytes(await arquivo.download_as_bytearray())
+    logger.info("Download concluído: %d bytes", len(dados))
+    return dados
 
 
-def ogg_para_wav(caminho_ogg: str) -> str:
+async def decodificar_pcm(dados: bytes) -> bytes:
     """
-    Converte arquivo .ogg para .wav usando ffmpeg.
-    Retorna o path do .wav. O .ogg pode ser removido pelo caller se desejado.
+    Decodifica o áudio (ogg/opus do Telegram ou outro formato que o ffmpeg reconheça) para PCM
+    s16le 16 kHz mono via pipes de um subprocesso assíncrono, já cortado em DURACAO_MAX_SEGUNDOS.
     """
-    path_ogg = Path(caminho_ogg)
-    path_wav = path_ogg.with_suffix(".wav")
-    logger.info("Convertendo ogg -> wav: %s -> %s", path_ogg, path_wav)
     try:
-        subprocess.run(
-            [
-                "ffmpeg",
-                "-y",
-                "-i",
-                str(path_ogg),
-                "-acodec",
-                "pcm_s16le",
-                "-ar",
-                "16000",
-                "-ac",
-                "1",
-                str(path_wav),
-            ],
-            check=True,
-            capture_output=True,
+        processo = await asyncio.create_subprocess_exec(
+            "ffmpeg",
+            "-hide_banner",
+            "-loglevel",
+            "error",
+            "-i",
+            "pipe:0",
+            "-t",
+            str(DURACAO_MAX_SEGUNDOS),
+            "-f",
+            "s16le",
+            "-acodec",
+            "pcm_s16le",
+            "-ar",
+            str(TAXA_AMOSTRAGEM),
+            "-ac",
+            "1",
+            "pipe:1",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
         )
-        logger.info("Conversão concluída: %s", path_wav)
-        return str(path_wav)
     except FileNotFoundError as e:
         logger.error("ffmpeg não encontrado. Instale e coloque no PATH.")
         raise FFmpegNotFoundError("ffmpeg não encontrado. Instale e adicione ao PATH.") from e
-    except subprocess.CalledProcessError as e:
-        logger.error("ffmpeg falhou: stderr=%s", e.stderr and e.stderr.decode()[:500])
+    try:
+        pcm, erro = await processo.communicate(dados)
+    except asyncio.CancelledError:
+        if processo.returncode is None:
+            processo.kill()
         raise
+    if processo.returncode != 0:
+        logger.error("ffmpeg falhou: stderr=%s", erro.decode(errors="replace")[:500])
+        raise subprocess.CalledProcessError(processo.returncode, "ffmpeg", pcm, erro)
+    logger.info("Decodificação concluída: %.1f s de áudio", len(pcm) / (TAXA_AMOSTRAGEM * BYTES_POR_AMOSTRA))
+    return pcm
 
 
-def transcrever(caminho_wav: str, idioma: str = "pt-BR") -> str:
+def transcrever(pcm: bytes, idioma: str = "pt-BR") -> str:
     """
-    Transcreve áudio (WAV) para texto usando Google Web Speech API (gratuita).
-    Áudios com mais de 1 minuto são truncados devido a limite da API.
+    Transcreve PCM (saída de decodificar_pcm) para texto usando Google Web Speech API (gratuita).
+    Áudios com mais de 1 minuto já chegam truncados devido a limite da API.
     """
-    path = Path(caminho_wav)
-    if not path.exists():
-        logger.error("Arquivo não encontrado: %s", caminho_wav)
-        raise FileNotFoundError(f"Arquivo de áudio não encontrado: {caminho_wav}")
-
+    if not pcm:
+        logger.warning("Áudio vazio após decodificação")
+        return ""
     recognizer = sr.Recognizer()
-    logger.info("Transcrevendo áudio: %s", path)
-
-    with sr.AudioFile(str(path)) as source:
-        # Limita duração para evitar exceder limite da API
-        audio = recognizer.record(source, duration=DURACAO_MAX_SEGUNDOS)
-
+    audio = sr.AudioData(pcm, TAXA_AMOSTRAGEM, BYTES_POR_AMOSTRA)
+    logger.info("Transcrevendo áudio: %d bytes de PCM", len(pcm))
     try:
         texto = recognizer.recognize_google(audio, language=idioma)
         logger.info("Transcrição concluída: %d caracteres", len(texto or ""))
@@ -105,3 +115,36 @@ def transcrever(caminho_wav: str, idioma: str = "pt-BR") -> str:
     except sr.RequestError as e:
         logger.error("Erro na requisição ao Google Web Speech: %s", e)
         raise
+
+
+async def transcrever_voice(dados: bytes, idioma: str = "pt-BR") -> str:
+    """Decodifica e transcreve o áudio baixado, esperando vaga entre os AUDIO_TRABALHADORES."""
+    global _vagas, _na_fila, _em_andamento
+    if _vagas is None:
+        _vagas = asyncio.Semaphore(max(1, AUDIO_TRABALHADORES))
+    inicio = time.perf_counter()
+    _na_fila += 1
+    metricas.registrar("audio_fila:profundidade", float(_na_fila))
+    try:
+        await _vagas.acquire()
+    finally:
+        _na_fila -= 1
+    metricas.registrar("audio_fila:espera", time.perf_counter() - inicio)
+    _em_andamento += 1
+    try:
+        pcm = await decodificar_pcm(dados)
+        return await asyncio.get_running_loop().run_in_executor(_executor, transcrever, pcm, idioma)
+    finally:
+        _em_andamento -= 1
+        _vagas.release()
+        metricas.registrar("audio_transcricao", time.perf_counter() - inicio)
+
+
+def situacao() -> dict:
+    """{"na_fila", "em_andamento", "trabalhadores"} do processamento de áudio."""
+    return {"na_fila": _na_fila, "em_andamento": _em_andamento, "trabalhadores": max(1, AUDIO_TRABALHADORES)}
+
+
+def encerrar() -> None:
+    """Descarta transcrições ainda na fila do executor (encerramento do bot)."""
+    _executor.shutdown(wait=False, cancel_futures=True)
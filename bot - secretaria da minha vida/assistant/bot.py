@@ -11,19 +11,35 @@ try:
 except ImportError:
     pass
 
+import asyncio
+import functools
 import logging
-import os
 import re
-import tempfile
+import time
 import datetime
-from pathlib import Path
 
 from telegram import Update
+from telegram.error import TelegramError
 from telegram.ext import Application, CommandHandler, ContextTypes, MessageHandler, filters
 
 import requests
 
-from assistant import audio, config, llm, memory, obsidian_service
+from assistant import (
+    audio,
+    classificador,
+    config,
+    limitador_llm,
+    llm_async,
+    llm_cache,
+    memory,
+    metricas,
+    obsidian_async,
+    revisao_local,
+    rotas_llm,
+    taxonomia,
+)
+from assistant.espelho_documentos import espelho
+from assistant.palavras_chave import CasadorPalavras
 
 logging.basicConfig(
     level=logging.INFO,
@@ -90,70 +106,94 @@ _PALAVRAS_TAREFAS_DIARIAS = (
 )
 
 
+# Palavras que indicam pedido de CRIAÇÃO (desfaz a leitura como consulta)
+_PALAVRAS_CRIAR = ("criar", "adicionar", "novo", "nova", "criar tarefa", "adicione", "crie")
+
+# Verbos de escrita (criar/alterar/excluir): com eles a mensagem nunca é respondida pelo
+# classificador local, mesmo que cite uma listagem ("adicione no planejamento pessoal: ver os projetos")
+_PALAVRAS_ESCRITA = _PALAVRAS_CRIAR + (
+    "coloque", "colocar", "ponha", "inclua", "incluir", "cadastre", "cadastrar", "registre",
+    "salve", "guarde", "anote", "agende", "agendar", "me lembre", "lembre me",
+    "altere", "alterar", "mude", "mudar", "atualize", "atualizar", "edite", "editar",
+    "renomeie", "renomear", "mova", "mover", "marque", "marcar",
+    "conclui", "conclua", "concluir", "finalize", "finalizar",
+    "exclua", "excluir", "apague", "apagar", "remova", "remover", "delete", "deletar", "tire",
+)
+
+# Palavras que indicam pergunta sobre as funções/capacidades do bot
+_PALAVRAS_FUNCAO = (
+    "função", "funções", "funcoes", "o que você faz", "o que voce faz", "o que faz",
+    "quais são suas funções", "quais sao suas funcoes", "quais suas funções",
+    "capacidades", "o que você pode", "o que voce pode",
+)
+
+# Palavras que indicam pedido da lista de categorias (interesses/áreas)
+_PALAVRAS_CATEGORIA = ("categoria", "categorias", "categ")
+_PALAVRAS_INTERESSE = ("interesse", "interesses", "interres", "interreses", "interes")
+_PALAVRAS_AREA = ("área", "area", "áreas", "areas")
+
+# Todas as listas acima num único autômato: cada mensagem é normalizada e percorrida uma vez
+_CASADOR_PALAVRAS = CasadorPalavras({
+    "salvar_ideia": _PALAVRAS_SALVAR_IDEIA,
+    "listar_empresarial": _PALAVRAS_LISTAR_EMPRESARIAL,
+    "listar_pessoal": _PALAVRAS_LISTAR_PESSOAL,
+    "consulta": _PALAVRAS_CONSULTA,
+    "tarefas_diarias": _PALAVRAS_TAREFAS_DIARIAS,
+    "criar": _PALAVRAS_CRIAR,
+    "escrita": _PALAVRAS_ESCRITA,
+    "funcao": _PALAVRAS_FUNCAO,
+    "categoria": _PALAVRAS_CATEGORIA,
+    "interesse": _PALAVRAS_INTERESSE,
+    "area": _PALAVRAS_AREA,
+})
+
+
+@functools.lru_cache(maxsize=256)
+def _classes_palavras(texto: str) -> frozenset[str]:
+    """Classes de palavras-chave presentes no texto (memorizado: os _parece_* reusam a mesma passada)."""
+    return _CASADOR_PALAVRAS.casar(texto)
+
+
 def _parece_consulta_planejamento_empresarial(texto: str) -> bool:
     """True se a mensagem parece CONSULTAR (não criar) tarefas do planejamento empresarial."""
-    t = texto.lower().strip()
-    tem_empresarial = any(k in t for k in _PALAVRAS_LISTAR_EMPRESARIAL)
-    if tem_empresarial:
-        tem_consulta = any(k in t for k in _PALAVRAS_CONSULTA)
-        sem_criar = not any(k in t for k in ("criar", "adicionar", "novo", "nova", "criar tarefa", "adicione", "crie"))
-        return tem_consulta or sem_criar
-    return False
+    classes = _classes_palavras(texto)
+    return "listar_empresarial" in classes and ("consulta" in classes or "criar" not in classes)
 
 
 def _parece_consulta_planejamento_pessoal(texto: str) -> bool:
     """True se a mensagem parece CONSULTAR (não criar) tarefas do planejamento pessoal."""
-    t = texto.lower().strip()
-    tem_pessoal = any(k in t for k in _PALAVRAS_LISTAR_PESSOAL)
-    if tem_pessoal:
-        tem_consulta = any(k in t for k in _PALAVRAS_CONSULTA)
-        sem_criar = not any(k in t for k in ("criar", "adicionar", "novo", "nova", "criar tarefa", "adicione", "crie"))
-        return tem_consulta or sem_criar
-    return False
+    classes = _classes_palavras(texto)
+    return "listar_pessoal" in classes and ("consulta" in classes or "criar" not in classes)
 
 
 def _parece_consulta_tarefas_diarias(texto: str) -> bool:
     """True se a mensagem parece consultar tarefas diárias."""
-    t = texto.lower().strip()
-    return any(k in t for k in _PALAVRAS_TAREFAS_DIARIAS)
+    return "tarefas_diarias" in _classes_palavras(texto)
 
 
 def _parece_pedido_salvar_ideia(texto: str) -> bool:
     """True se a mensagem parece pedir para salvar/guardar uma ideia."""
-    t = texto.lower().strip()
-    return any(p in t for p in _PALAVRAS_SALVAR_IDEIA)
+    return "salvar_ideia" in _classes_palavras(texto)
 
 
 def _parece_pergunta_funcao(texto: str) -> bool:
     """True se a mensagem parece perguntar sobre as funções/capacidades do bot."""
-    t = texto.lower().strip()
-    return any(
-        k in t
-        for k in (
-            "função",
-            "funções",
-            "funcoes",
-            "o que você faz",
-            "o que voce faz",
-            "o que faz",
-            "quais são suas funções",
-            "quais sao suas funcoes",
-            "quais suas funções",
-            "capacidades",
-            "o que você pode",
-            "o que voce pode",
-        )
-    )
+    return "funcao" in _classes_palavras(texto)
 
 
 def _parece_pergunta_interesses_areas(texto: str) -> bool:
     """True se a mensagem parece pedir a lista de interesses/áreas (categorias)."""
-    t = texto.lower().strip()
-    if any(k in t for k in ("categoria", "categorias", "categ")):
-        return True
-    tem_interesse = any(k in t for k in ("interesse", "interesses", "interres", "interreses", "interes"))
-    tem_area = any(k in t for k in ("área", "area", "áreas", "areas"))
-    return tem_interesse and tem_area
+    classes = _classes_palavras(texto)
+    return "categoria" in classes or ("interesse" in classes and "area" in classes)
+
+
+def _pode_responder_localmente(texto: str, acao: str, confianca: float) -> bool:
+    """True se a previsão do classificador pode ser respondida sem a LLM: leitura, confiança alta e nenhum verbo de escrita."""
+    return (
+        acao in classificador.ACOES_LEITURA
+        and confianca >= config.CLASSIFICADOR_CONFIANCA_MINIMA
+        and "escrita" not in _classes_palavras(texto)
+    )
 
 
 def _tentar_captura_rapida(texto: str) -> dict | None:
@@ -173,18 +213,10 @@ def _tentar_captura_rapida(texto: str) -> dict | None:
     }
 
 
-def _formatar_lista_interesses_areas(interesses: list[dict], areas: list[dict]) -> str:
+def _formatar_lista_interesses_areas(tax: taxonomia.Taxonomia) -> str:
     """Formata em lista numerada hierárquica: 1 – Interesse, 1.1 – Área, 1.2 – Área, 2 – Interesse..."""
-    areas_by_interest_id: dict[str, list[str]] = {}
-    for a in (areas or []):
-        interest_id = a.get("interestId")
-        name = (a.get("name") or "").strip()
-        if not interest_id or not name:
-            continue
-        areas_by_interest_id.setdefault(interest_id, []).append(name)
-
     interesses_ordenados = sorted(
-        (interesses or []), key=lambda it: ((it.get("name") or "").strip().lower())
+        tax.interesses, key=lambda it: ((it.get("name") or "").strip().lower())
     )
     if not interesses_ordenados:
         return "Suas categorias são:\n\n(sem interesses/áreas cadastrados)"
@@ -194,7 +226,10 @@ def _formatar_lista_interesses_areas(interesses: list[dict], areas: list[dict])
         interest_name = (i.get("name") or "").strip()
         if not interest_name:
             continue
-        a_names = sorted(set(areas_by_interest_id.get(i.get("id"), [])), key=lambda s: s.lower())
+        a_names = sorted(
+            {(a.get("name") or "").strip() for a in tax.areas_do_interesse(i.get("id"))} - {""},
+            key=lambda s: s.lower(),
+        )
         linhas.append(f"{idx} – {interest_name}")
         for sub_idx, area_name in enumerate(a_names, start=1):
             linhas.append(f"{idx}.{sub_idx} – {area_name}")
@@ -255,97 +290,90 @@ def _formatar_tarefas_diarias(tarefas: list[dict]) -> str:
     return "\n".join(linhas)
 
 
-def _normalize(s: str) -> str:
-    """Normaliza para comparação: strip e colapsa espaços múltiplos."""
-    return " ".join((s or "").strip().lower().split())
+# Resolução de (interesse, área): score mínimo do par e vantagem mínima sobre o 2º colocado
+# para decidir localmente; abaixo disso o par é ambíguo e vai para a LLM (fallback).
+_SCORE_MINIMO_PAR = 0.25
+_MARGEM_PAR = 0.05
+# Penalidade quando o par só casa invertido ("X > Y" com X sendo a área)
+_FATOR_PAR_INVERTIDO = 0.95
 
 
-def _match_interest_intelligent(user_input: str, interests: list[dict]) -> dict | None:
+def _ranquear_pares(
+    interest_name: str,
+    area_name: str,
+    tax: taxonomia.Taxonomia,
+) -> list[tuple[float, str, str]]:
     """
-    Busca inteligente: exato > nome começa com o que o usuário disse > nome contém.
-    Usa normalização (espaços colapsados) para evitar falhas por diferença de espaços.
+    Candidatos (score, nome_interesse, nome_area) ordenados. Considera também o par invertido
+    para o caso "X > Y" em que o usuário trocou interesse e área.
     """
-    if not (user_input and user_input.strip()) or not interests:
-        return None
-    key = _normalize(user_input)
-    exact = next((i for i in interests if _normalize(i.get("name") or "") == key), None)
-    if exact:
-        return exact
-    starts = next(
-        (i for i in interests if _normalize(i.get("name") or "").startswith(key)),
-        None,
-    )
-    if starts:
-        return starts
-    containing = [i for i in interests if key in _normalize(i.get("name") or "")]
-    if containing:
-        return min(containing, key=lambda i: len((i.get("name") or "")))
-    return None
-
-
-def _match_area_intelligent(user_input: str, areas: list[dict]) -> dict | None:
-    """Busca inteligente para área (exato > começa com > contém), com normalização."""
-    if not (user_input and user_input.strip()) or not areas:
-        return None
-    key = _normalize(user_input)
-    exact = next((a for a in areas if _normalize(a.get("name") or "") == key), None)
-    if exact:
-        return exact
-    starts = next(
-        (a for a in areas if _normalize(a.get("name") or "").startswith(key)),
-        None,
-    )
-    if starts:
-        return starts
-    containing = [a for a in areas if key in _normalize(a.get("name") or "")]
-    if containing:
-        return min(containing, key=lambda a: len((a.get("name") or "")))
-    return None
-
-
-def _resolver_par(interest_name: str, area_name: str, interests: list[dict], areas: list[dict]) -> tuple[str, str] | None:
-    """Tenta resolver (interesse, área) com busca inteligente. Retorna (nome_interesse, nome_area) ou None."""
-    interest = _match_interest_intelligent(interest_name, interests)
-    if not interest:
-        return None
-    interest_id = interest.get("id")
-    areas_do_interesse = [a for a in areas if a.get("interestId") == interest_id]
-    area = _match_area_intelligent(area_name, areas_do_interesse)
-    if not area:
-        return None
-    return (interest.get("name", interest_name), area.get("name", area_name))
-
-
-def _resolver_interesse_area(
+    melhores: dict[tuple[str, str], float] = {}
+    for i_nome, a_nome, fator in (
+        (interest_name, area_name, 1.0),
+        (area_name, interest_name, _FATOR_PAR_INVERTIDO),
+    ):
+        for interesse, s_i in tax.indice_interesses.buscar(i_nome, limite=3):
+            for area, s_a in tax.indice_areas(interesse.get("id")).buscar(a_nome, limite=3):
+                par = (interesse.get("name", i_nome), area.get("name", a_nome))
+                melhores[par] = max(melhores.get(par, 0.0), s_i * s_a * fator)
+    return sorted(((score, i, a) for (i, a), score in melhores.items()), reverse=True)
+
+
+async def _resolver_interesse_area(
     interest_name: str,
     area_name: str,
 ) -> tuple[str, str] | None:
     """
-    Resolve um par (interesse, área) válido. Tenta primeiro (interest_name, area_name).
-    Se falhar e o nome da área for um interesse existente, tenta (area_name, interest_name)
-    para o caso "X > Y" em que o usuário inverteu. Usa busca inteligente e normalização.
+    Resolve um par (interesse, área) válido usando os índices da taxonomia em cache
+    (exato, prefixo, substring e similaridade por trigramas, também com o par invertido).
+    Retorna None quando nada casa ou quando os melhores candidatos empatam (ambíguo).
     """
     if not (interest_name and interest_name.strip()) or not (area_name and area_name.strip()):
         return None
-    interest_name = interest_name.strip()
-    area_name = area_name.strip()
     try:
-        interests = obsidian_service.listar_interesses()
-        areas = obsidian_service.listar_areas()
+        tax = await obsidian_async.obter_taxonomia()
     except requests.RequestException:
         return None
 
-    par = _resolver_par(interest_name, area_name, interests, areas)
+    candidatos = _ranquear_pares(interest_name.strip(), area_name.strip(), tax)
+    if not candidatos:
+        return None
+    score, interesse, area = candidatos[0]
+    if score < _SCORE_MINIMO_PAR:
+        return None
+    if len(candidatos) > 1 and score < 1.0 and score - candidatos[1][0] < _MARGEM_PAR:
+        logger.info("Par interesse/área ambíguo: %s", candidatos[:3])
+        return None
+    return (interesse, area)
+
+
+async def _validar_par_ideia(interest: str, area: str, titulo: str, corpo: str) -> tuple[str, str] | None:
+    """Resolve o par (interesse, área); se ambíguo ou inexistente, pede à LLM um par da lista real."""
+    if not (interest and area):
+        return None
+    par = await _resolver_interesse_area(interest, area)
     if par:
         return par
-    area_como_interesse = _match_interest_intelligent(area_name, interests)
-    if area_como_interesse:
-        par = _resolver_par(area_name, interest_name, interests, areas)
-        if par:
-            return par
+    try:
+        tax = await obsidian_async.obter_taxonomia()
+        fallback = await llm_async.escolher_par_interesse_area_fallback(
+            titulo, corpo, interest, area, tax.interesses, tax.areas
+        )
+        if fallback:
+            return await _resolver_interesse_area(fallback["interest"], fallback["area"])
+    except requests.RequestException:
+        pass
     return None
 
 
+async def _aquecer_taxonomia() -> None:
+    """Carrega a taxonomia em segundo plano (ex.: enquanto a LLM interpreta a mensagem)."""
+    try:
+        await obsidian_async.obter_taxonomia()
+    except requests.RequestException as e:
+        logger.debug("Pré-carga da taxonomia falhou: %s", e)
+
+
 async def _salvar_ideia_com_contexto(
     interest: str,
     area: str,
@@ -354,46 +382,49 @@ async def _salvar_ideia_com_contexto(
     tags: list,
     texto_original: str,
     update: Update,
+    refinado: dict | None = None,
 ) -> str:
-    """Salva uma ideia resolvendo o par interesse/área e refinando o conteúdo. Retorna a resposta."""
+    """
+    Salva uma ideia resolvendo o par interesse/área e refinando o conteúdo. Retorna a resposta.
+    refinado: texto já refinado pela própria chamada de intenção (PIPELINE_IDEIA=unica); pula o refino.
+    """
     if not corpo and texto_original.strip():
         linhas = texto_original.strip().splitlines()
         if not titulo or titulo == "Sem título":
             titulo = (linhas[0][:255] if linhas else "Sem título").strip() or "Sem título"
         corpo = texto_original.strip()
 
-    refinado = llm.refinar_ideia(titulo, corpo)
+    if refinado:
+        par = await _validar_par_ideia(interest, area, titulo, corpo)
+    else:
+        # Refino do texto e validação do par são independentes: rodam em paralelo
+        refinado, par = await asyncio.gather(
+            llm_async.refinar_ideia(titulo, corpo),
+            _validar_par_ideia(interest, area, titulo, corpo),
+        )
     if refinado:
         titulo = refinado["titulo"]
         descricao = refinado["descricao"]
         corpo_corrigido = refinado["corpo"]
-        conteudo_final = f"{descricao}\n\n{corpo_corrigido}".strip()
+        if descricao == corpo_corrigido:
+            # Revisão local de ideia curta: a descrição é o próprio texto
+            conteudo_final = corpo_corrigido
+        else:
+            conteudo_final = f"{descricao}\n\n{corpo_corrigido}".strip()
     else:
         conteudo_final = corpo
 
     if interest and area:
-        par = _resolver_interesse_area(interest, area)
-        if not par:
-            try:
-                interesses_fb = obsidian_service.listar_interesses()
-                areas_fb = obsidian_service.listar_areas()
-                fallback = llm.escolher_par_interesse_area_fallback(
-                    titulo, conteudo_final or corpo, interest, area, interesses_fb, areas_fb
-                )
-                if fallback:
-                    par = _resolver_interesse_area(fallback["interest"], fallback["area"])
-            except requests.RequestException:
-                pass
         if par:
             interest_final, area_final = par
-            created = obsidian_service.criar_documento(
+            created = await obsidian_async.criar_documento(
                 title=titulo,
                 content=conteudo_final,
                 interest=interest_final,
                 area=area_final,
                 tags=tags or [],
             )
-            memory.atualizar_contexto_recente("salvar_ideia", {"interest": interest_final, "area": area_final, "titulo": titulo})
+            memory.atualizar_contexto_recente(_chat_id(update), "salvar_ideia", {"interest": interest_final, "area": area_final, "titulo": titulo})
             primeira_linha = (conteudo_final or "").strip().split("\n")[0].strip()
             resumo = primeira_linha[:137] + "..." if len(primeira_linha) > 140 else primeira_linha
             resposta = (
@@ -419,6 +450,60 @@ async def _salvar_ideia_com_contexto(
         )
 
 
+async def _listar_para_leitura_local(acao: str) -> str:
+    """Resposta de uma ação só de leitura (classificador.ACOES_LEITURA), montada sem a LLM."""
+    if acao == "listar_planejamentos_empresariais":
+        cards = await obsidian_async.listar_cards_planejamento()
+        if not cards:
+            return "❌ Nenhum projeto empresarial criado até o momento."
+        return _formatar_cards(cards, "💼", "Planejamento Empresarial")
+    if acao == "listar_planejamentos_pessoais":
+        cards = await obsidian_async.listar_cards_planejamento_pessoal()
+        if not cards:
+            return "❌ Nenhum projeto pessoal criado até o momento."
+        return _formatar_cards(cards, "👤", "Planejamento Pessoal")
+    if acao == "listar_lembretes_ativos":
+        return _formatar_lembretes(await obsidian_async.listar_lembretes())
+    if acao == "listar_categorias":
+        return _formatar_lista_interesses_areas(await obsidian_async.obter_taxonomia())
+    return _formatar_tarefas_diarias(await obsidian_async.listar_tarefas_diarias())
+
+
+async def _despachar_intencao_local(texto: str, update: Update) -> bool:
+    """
+    Classificador local: consultas só de leitura com confiança alta e sem verbo de escrita são
+    respondidas sem chamar a LLM. Retorna True se a mensagem foi respondida.
+    """
+    if not config.CLASSIFICADOR_LOCAL:
+        return False
+    previsao = await asyncio.to_thread(classificador.classificar, texto)
+    if previsao is None:
+        return False
+    acao, confianca = previsao
+    if not _pode_responder_localmente(texto, acao, confianca):
+        return False
+    logger.info("Classificador local: %s (confiança %.2f)", acao, confianca)
+    try:
+        resposta = await _listar_para_leitura_local(acao)
+    except requests.RequestException as e:
+        logger.warning("Erro ao responder %s localmente: %s", acao, e)
+        resposta = "⚠️ Não consegui carregar os dados agora (servidor offline)."
+    await update.message.reply_text(resposta)
+    return True
+
+
+async def _resolver_id_ideia(doc_id: str) -> str:
+    """Converte o id curto exibido nas listagens (8 caracteres) no id completo, via espelho local."""
+    doc_id = (doc_id or "").strip()
+    if not doc_id or espelho().obter(doc_id):
+        return doc_id
+    try:
+        await obsidian_async.sincronizar_documentos()
+    except requests.RequestException as e:
+        logger.debug("Sincronização do espelho falhou: %s", e)
+    return espelho().resolver_id(doc_id) or doc_id
+
+
 async def _executar_acao_confirmada(pending: dict, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Executa uma ação que estava aguardando confirmação do usuário."""
     acao = pending.get("acao", "")
@@ -428,26 +513,26 @@ async def _executar_acao_confirmada(pending: dict, update: Update, context: Cont
         if acao == "excluir_ideia":
             doc_id = dados.get("id", "")
             titulo = dados.get("titulo", "essa ideia")
-            obsidian_service.deletar_documento(doc_id)
-            memory.atualizar_contexto_recente("excluir_ideia")
+            await obsidian_async.deletar_documento(doc_id)
+            memory.atualizar_contexto_recente(_chat_id(update), "excluir_ideia")
             await update.message.reply_text(f"🗑️ Ideia '{titulo}' excluída com sucesso.")
         elif acao == "excluir_tarefa_empresarial":
             card_id = dados.get("id", "")
             titulo = dados.get("titulo", "essa tarefa")
-            obsidian_service.deletar_card_planejamento(card_id)
-            memory.atualizar_contexto_recente("excluir_tarefa_empresarial")
+            await obsidian_async.deletar_card_planejamento(card_id)
+            memory.atualizar_contexto_recente(_chat_id(update), "excluir_tarefa_empresarial")
             await update.message.reply_text(f"🗑️ Tarefa empresarial '{titulo}' excluída com sucesso.")
         elif acao == "excluir_tarefa_pessoal":
             card_id = dados.get("id", "")
             titulo = dados.get("titulo", "essa tarefa")
-            obsidian_service.deletar_card_planejamento_pessoal(card_id)
-            memory.atualizar_contexto_recente("excluir_tarefa_pessoal")
+            await obsidian_async.deletar_card_planejamento_pessoal(card_id)
+            memory.atualizar_contexto_recente(_chat_id(update), "excluir_tarefa_pessoal")
             await update.message.reply_text(f"🗑️ Tarefa pessoal '{titulo}' excluída com sucesso.")
         elif acao == "excluir_lembrete":
             rem_id = dados.get("id", "")
             titulo = dados.get("titulo", "esse lembrete")
-            obsidian_service.deletar_lembrete(rem_id)
-            memory.atualizar_contexto_recente("excluir_lembrete")
+            await obsidian_async.deletar_lembrete(rem_id)
+            memory.atualizar_contexto_recente(_chat_id(update), "excluir_lembrete")
             await update.message.reply_text(f"🗑️ Lembrete '{titulo}' excluído com sucesso.")
         else:
             await update.message.reply_text("⚠️ Ação confirmada, mas não reconhecida.")
@@ -456,6 +541,63 @@ async def _executar_acao_confirmada(pending: dict, update: Update, context: Cont
         await update.message.reply_text("⚠️ Erro ao executar a operação. Verifique o servidor.")
 
 
+class _RespostaProgressiva:
+    """
+    Resposta ao usuário que aparece enquanto a LLM ainda gera (LLM_STREAMING): a primeira parte do
+    campo "resposta" é enviada como mensagem e depois editada, no máximo a cada
+    LLM_STREAMING_INTERVALO s. Mede o tempo até o primeiro retorno visível (métrica "primeiro_retorno").
+    """
+
+    def __init__(self, update: Update) -> None:
+        self.update = update
+        self.mensagem = None
+        self._inicio: float | None = time.perf_counter()
+        self._exibido = ""
+        self._ultima_edicao = 0.0
+
+    def _marcar_primeiro_retorno(self) -> None:
+        if self._inicio is not None:
+            metricas.registrar("primeiro_retorno", time.perf_counter() - self._inicio)
+            self._inicio = None
+
+    async def progresso(self, texto: str, completa: bool) -> None:
+        texto = texto.strip()
+        if not texto:
+            return
+        if self.mensagem is not None and not completa:
+            if time.monotonic() - self._ultima_edicao < config.LLM_STREAMING_INTERVALO:
+                return
+        await self._mostrar(texto if completa else f"{texto} …")
+
+    async def _mostrar(self, texto: str) -> None:
+        if texto == self._exibido:
+            return
+        try:
+            if self.mensagem is None:
+                self.mensagem = await self.update.message.reply_text(texto)
+                self._marcar_primeiro_retorno()
+            else:
+                await self.mensagem.edit_text(texto)
+        except TelegramError as e:
+            logger.debug("Falha ao exibir resposta parcial: %s", e)
+            return
+        self._exibido = texto
+        self._ultima_edicao = time.monotonic()
+
+    async def finalizar(self, texto: str) -> None:
+        """Mostra o texto final (com o resultado da ação) editando a mensagem parcial, se houver."""
+        if self.mensagem is not None:
+            if texto == self._exibido:
+                return
+            try:
+                await self.mensagem.edit_text(texto)
+                return
+            except TelegramError as e:
+                logger.warning("Falha ao editar resposta parcial (%s); enviando nova mensagem", e)
+        await self.update.message.reply_text(texto)
+        self._marcar_primeiro_retorno()
+
+
 async def _processar_texto_e_responder(texto: str, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Conversa com o usuário e arquiva no Obsidian quando a LLM indicar salvar_ideia."""
     # Captura rápida: bypass do LLM para formato explícito "salvar em X > Y: texto"
@@ -474,24 +616,45 @@ async def _processar_texto_e_responder(texto: str, update: Update, context: Cont
         await update.message.reply_text(resposta)
         return
 
-    memoria_dados = memory.carregar_memoria()
+    memoria_dados = memory.carregar_memoria(_chat_id(update))
     interesses_areas = None
     if _parece_pedido_salvar_ideia(texto):
         try:
             logger.info("Buscando interesses/áreas para contextualizar salvamento de ideia...")
-            interesses = obsidian_service.listar_interesses()
-            areas = obsidian_service.listar_areas()
-            interesses_areas = (interesses, areas)
+            tax = await obsidian_async.obter_taxonomia()
+            interesses_areas = tax
         except requests.RequestException as e:
             logger.warning("Falha ao buscar interesses/áreas do Obsidian: %s", e)
+    else:
+        # A taxonomia não entra no prompt, mas costuma ser usada logo depois (salvar/atualizar/categorias):
+        # baixa em paralelo com a chamada à LLM.
+        context.application.create_task(_aquecer_taxonomia())
 
     logger.info("Enviando texto para LLM (OpenRouter)...")
-    resultado = llm.perguntar_llm(texto, contexto_memoria=memoria_dados, interesses_areas=interesses_areas)
+    saida = _RespostaProgressiva(update)
+    refino_embutido = config.PIPELINE_IDEIA == "unica" and interesses_areas is not None
+    if config.LLM_STREAMING:
+        resultado = await llm_async.perguntar_llm_stream(
+            texto,
+            saida.progresso,
+            contexto_memoria=memoria_dados,
+            interesses_areas=interesses_areas,
+            refino_embutido=refino_embutido,
+        )
+    else:
+        resultado = await llm_async.perguntar_llm(
+            texto,
+            contexto_memoria=memoria_dados,
+            interesses_areas=interesses_areas,
+            refino_embutido=refino_embutido,
+        )
     resposta = resultado.get("resposta", "Ok.")
     acao = resultado.get("acao", "responder")
     dados = resultado.get("dados")
 
     logger.info("Ação identificada: %s", acao)
+    if config.CLASSIFICADOR_LOCAL and resultado.get("origem") == "llm":
+        classificador.registrar_exemplo(texto, acao)
 
     try:
         if acao == "salvar_ideia" and dados:
@@ -507,16 +670,17 @@ async def _processar_texto_e_responder(texto: str, update: Update, context: Cont
                 tags=dados.get("tags") or [],
                 texto_original=texto,
                 update=update,
+                refinado=dados.get("refinado"),
             )
         elif acao == "criar_tarefa_planejamento" and dados:
             title = dados.get("titulo") or dados.get("title") or "Tarefa"
-            corrigido = llm.corrigir_titulo_resumo(title)
+            corrigido = await llm_async.corrigir_titulo_resumo(title)
             if corrigido:
                 title = corrigido["titulo"] or title
             status = dados.get("status", "todo")
             priority = dados.get("priority", "medium")
-            obsidian_service.criar_card_planejamento(title=title, status=status, priority=priority)
-            memory.atualizar_contexto_recente("criar_tarefa_planejamento")
+            await obsidian_async.criar_card_planejamento(title=title, status=status, priority=priority)
+            memory.atualizar_contexto_recente(_chat_id(update), "criar_tarefa_planejamento")
             resposta = f"{resposta}\n\n✅ Tarefa criada no planejamento empresarial."
             url = _link("planejamento-profissional")
             if url:
@@ -534,19 +698,19 @@ async def _processar_texto_e_responder(texto: str, update: Update, context: Cont
                         elif key == "isFinalized": payload[key] = bool(val)
                         else: payload[key] = str(val).strip()
                 if payload:
-                    obsidian_service.atualizar_card_planejamento(card_id, payload)
+                    await obsidian_async.atualizar_card_planejamento(card_id, payload)
                     resposta = f"{resposta}\n\n✅ Tarefa de planejamento empresarial atualizada."
                 else:
                     resposta = f"{resposta}\n\n⚠️ Nenhum campo para atualizar informado."
         elif acao == "criar_tarefa_planejamento_pessoal" and dados:
             title = dados.get("titulo") or dados.get("title") or "Tarefa"
-            corrigido = llm.corrigir_titulo_resumo(title)
+            corrigido = await llm_async.corrigir_titulo_resumo(title)
             if corrigido:
                 title = corrigido["titulo"] or title
             status = dados.get("status", "todo")
             priority = dados.get("priority", "medium")
-            obsidian_service.criar_card_planejamento_pessoal(title=title, status=status, priority=priority)
-            memory.atualizar_contexto_recente("criar_tarefa_planejamento_pessoal")
+            await obsidian_async.criar_card_planejamento_pessoal(title=title, status=status, priority=priority)
+            memory.atualizar_contexto_recente(_chat_id(update), "criar_tarefa_planejamento_pessoal")
             resposta = f"{resposta}\n\n✅ Tarefa criada no planejamento pessoal."
             url = _link("planejamento-pessoal")
             if url:
@@ -564,12 +728,12 @@ async def _processar_texto_e_responder(texto: str, update: Update, context: Cont
                         elif key == "isFinalized": payload[key] = bool(val)
                         else: payload[key] = str(val).strip()
                 if payload:
-                    obsidian_service.atualizar_card_planejamento_pessoal(card_id, payload)
+                    await obsidian_async.atualizar_card_planejamento_pessoal(card_id, payload)
                     resposta = f"{resposta}\n\n✅ Tarefa de planejamento pessoal atualizada."
                 else:
                     resposta = f"{resposta}\n\n⚠️ Nenhum campo para atualizar informado."
         elif acao == "atualizar_ideia" and dados:
-            doc_id = (dados.get("id") or "").strip()
+            doc_id = await _resolver_id_ideia(dados.get("id") or "")
             if not doc_id:
                 resposta = f"{resposta}\n\n⚠️ Não foi possível atualizar: informe o id da ideia."
             else:
@@ -585,7 +749,7 @@ async def _processar_texto_e_responder(texto: str, update: Update, context: Cont
                 if "tags" in dados:
                     payload["tags"] = dados.get("tags") if isinstance(dados.get("tags"), list) else []
                 if payload:
-                    obsidian_service.atualizar_documento(doc_id, payload)
+                    await obsidian_async.atualizar_documento(doc_id, payload)
                     resposta = f"{resposta}\n\n✅ Ideia atualizada."
                 else:
                     resposta = f"{resposta}\n\n⚠️ Nenhum campo para atualizar informado."
@@ -595,7 +759,7 @@ async def _processar_texto_e_responder(texto: str, update: Update, context: Cont
                 resposta = f"{resposta}\n\n⚠️ Informe o título do lembrete."
             else:
                 body = (dados.get("body") or "").strip()
-                corrigido = llm.corrigir_titulo_resumo(titulo, body)
+                corrigido = await llm_async.corrigir_titulo_resumo(titulo, body)
                 if corrigido:
                     titulo = corrigido["titulo"] or titulo
                     body = corrigido.get("resumo") if corrigido.get("resumo") is not None else body
@@ -624,8 +788,8 @@ async def _processar_texto_e_responder(texto: str, update: Update, context: Cont
                 recurrence = (dados.get("recurrence") or "once").strip()
                 if recurrence not in ("once", "daily", "every_2_days", "weekly"):
                     recurrence = "once"
-                obsidian_service.criar_lembrete(title=titulo, first_due_at=first_due, body=body, recurrence=recurrence)
-                memory.atualizar_contexto_recente("criar_lembrete")
+                await obsidian_async.criar_lembrete(title=titulo, first_due_at=first_due, body=body, recurrence=recurrence)
+                memory.atualizar_contexto_recente(_chat_id(update), "criar_lembrete")
                 rec_label = {"once": "uma vez", "daily": "diário", "every_2_days": "a cada 2 dias", "weekly": "semanal"}.get(recurrence, "uma vez")
                 resposta = f"{resposta}\n\n✅ Lembrete criado ({rec_label})."
                 url = _link("lembretes")
@@ -641,13 +805,13 @@ async def _processar_texto_e_responder(texto: str, update: Update, context: Cont
                     if key in dados:
                         payload[key] = str(dados[key]).strip()
                 if payload:
-                    obsidian_service.atualizar_lembrete(rem_id, payload)
+                    await obsidian_async.atualizar_lembrete(rem_id, payload)
                     resposta = f"{resposta}\n\n✅ Lembrete atualizado."
                 else:
                     resposta = f"{resposta}\n\n⚠️ Nenhum campo para atualizar informado."
         elif acao == "lançar_lembretes":
             try:
-                vencidos = obsidian_service.listar_lembretes_vencidos()
+                vencidos = await obsidian_async.listar_lembretes_vencidos()
                 if not vencidos:
                     resposta = f"{resposta}\n\nNenhum lembrete vencido no momento."
                 else:
@@ -656,14 +820,14 @@ async def _processar_texto_e_responder(texto: str, update: Update, context: Cont
                         if r.get("body"):
                             msg += f"\n{r['body']}"
                         await update.message.reply_text(msg)
-                        obsidian_service.marcar_lembrete_disparado(r["id"])
+                        await obsidian_async.marcar_lembrete_disparado(r["id"])
                     resposta = f"{resposta}\n\n✅ {len(vencidos)} lembrete(s) enviado(s)."
             except requests.RequestException as e:
                 logger.warning("Erro ao buscar/enviar lembretes: %s", e)
                 resposta = f"{resposta}\n\n⚠️ Não foi possível verificar lembretes (servidor)."
         elif acao == "listar_planejamentos_empresariais":
             try:
-                cards = obsidian_service.listar_cards_planejamento()
+                cards = await obsidian_async.listar_cards_planejamento()
                 if not cards:
                     resposta = f"{resposta}\n\nNenhum planejamento empresarial no momento."
                 else:
@@ -672,7 +836,7 @@ async def _processar_texto_e_responder(texto: str, update: Update, context: Cont
                 resposta = f"{resposta}\n\n⚠️ Erro ao buscar planejamentos empresariais."
         elif acao == "listar_planejamentos_pessoais":
             try:
-                cards = obsidian_service.listar_cards_planejamento_pessoal()
+                cards = await obsidian_async.listar_cards_planejamento_pessoal()
                 if not cards:
                     resposta = f"{resposta}\n\nNenhum planejamento pessoal no momento."
                 else:
@@ -681,15 +845,14 @@ async def _processar_texto_e_responder(texto: str, update: Update, context: Cont
                 resposta = f"{resposta}\n\n⚠️ Erro ao buscar planejamentos pessoais."
         elif acao == "listar_lembretes_ativos":
             try:
-                lembretes = obsidian_service.listar_lembretes()
+                lembretes = await obsidian_async.listar_lembretes()
                 resposta = f"{resposta}\n\n{_formatar_lembretes(lembretes)}"
             except requests.RequestException:
                 resposta = f"{resposta}\n\n⚠️ Erro ao buscar lembretes."
         elif acao == "listar_categorias":
             try:
-                interesses = obsidian_service.listar_interesses()
-                areas = obsidian_service.listar_areas()
-                cats = _formatar_lista_interesses_areas(interesses, areas)
+                tax = await obsidian_async.obter_taxonomia()
+                cats = _formatar_lista_interesses_areas(tax)
                 resposta = f"{resposta}\n\n{cats}"
             except requests.RequestException:
                 resposta = f"{resposta}\n\n⚠️ Erro ao buscar categorias."
@@ -699,15 +862,17 @@ async def _processar_texto_e_responder(texto: str, update: Update, context: Cont
             area_filtro = str(dados.get("area") or "").strip()
             tag_filtro = str(dados.get("tag") or "").strip()
             try:
-                # Usar busca server-side se disponível, senão fallback local
+                # Busca no índice full-text local; o backend só é consultado se o espelho nunca sincronizou
                 try:
-                    docs = obsidian_service.buscar_documentos(
+                    await obsidian_async.sincronizar_documentos()
+                except requests.RequestException as e:
+                    logger.debug("Busca: espelho não sincronizado (%s)", e)
+                if espelho().sincronizado():
+                    docs = espelho().buscar(termo=termo, interest=interest_filtro, area=area_filtro, tag=tag_filtro)
+                else:
+                    docs = await obsidian_async.buscar_documentos(
                         termo=termo, interest=interest_filtro, area=area_filtro, tag=tag_filtro
                     )
-                except requests.RequestException:
-                    docs = obsidian_service.listar_documentos()
-                    t_lower = termo.lower()
-                    docs = [d for d in docs if t_lower in d.get("title", "").lower() or t_lower in d.get("content", "").lower()]
 
                 if not docs:
                     resposta = f"{resposta}\n\nNenhuma ideia encontrada com '{termo}'."
@@ -721,6 +886,8 @@ async def _processar_texto_e_responder(texto: str, update: Update, context: Cont
                         id_curto = (d.get("id") or "")[:8]
                         url = _link(f"ideia/{d.get('id')}")
                         linhas.append(f"• {t} ({i} > {a}) | id: {id_curto}")
+                        if d.get("trecho"):
+                            linhas.append(f"  {d['trecho']}")
                         if url:
                             linhas.append(f"  🔗 {url}")
                     if len(docs) > 3:
@@ -735,7 +902,9 @@ async def _processar_texto_e_responder(texto: str, update: Update, context: Cont
             if not item_id:
                 resposta = f"{resposta}\n\n⚠️ Informe o id do item a excluir."
             else:
-                memory.set_pending_action({"acao": acao, "dados": dados})
+                if acao == "excluir_ideia":
+                    dados = {**dados, "id": await _resolver_id_ideia(item_id)}
+                memory.set_pending_action(_chat_id(update), {"acao": acao, "dados": dados})
                 tipo_label = {
                     "excluir_ideia": "a ideia",
                     "excluir_tarefa_empresarial": "a tarefa empresarial",
@@ -751,19 +920,19 @@ async def _processar_texto_e_responder(texto: str, update: Update, context: Cont
             if not titulo:
                 resposta = f"{resposta}\n\n⚠️ Informe o título da tarefa."
             else:
-                obsidian_service.criar_tarefa_diaria(titulo)
-                memory.atualizar_contexto_recente("criar_tarefa_diaria")
+                await obsidian_async.criar_tarefa_diaria(titulo)
+                memory.atualizar_contexto_recente(_chat_id(update), "criar_tarefa_diaria")
                 resposta = f"{resposta}\n\n✅ Tarefa diária criada: {titulo}"
         elif acao == "concluir_tarefa_diaria" and dados:
             task_id = (dados.get("id") or "").strip()
             if not task_id:
                 resposta = f"{resposta}\n\n⚠️ Informe o id da tarefa diária."
             else:
-                obsidian_service.atualizar_tarefa_diaria(task_id, done=True)
+                await obsidian_async.atualizar_tarefa_diaria(task_id, done=True)
                 resposta = f"{resposta}\n\n✅ Tarefa marcada como concluída."
         elif acao == "listar_tarefas_diarias":
             try:
-                tarefas = obsidian_service.listar_tarefas_diarias()
+                tarefas = await obsidian_async.listar_tarefas_diarias()
                 resposta = f"{resposta}\n\n{_formatar_tarefas_diarias(tarefas)}"
             except requests.RequestException:
                 resposta = f"{resposta}\n\n⚠️ Erro ao buscar tarefas diárias."
@@ -776,7 +945,7 @@ async def _processar_texto_e_responder(texto: str, update: Update, context: Cont
         base = getattr(config, "APP_BASE_URL", "") or ""
         if base:
             resposta += f"\n\n🔗 Acesse o app: {base}"
-    await update.message.reply_text(resposta)
+    await saida.finalizar(resposta)
 
 
 def _verificar_acesso(update: Update) -> bool:
@@ -791,6 +960,38 @@ def _verificar_acesso(update: Update) -> bool:
     return username in config.ALLOWED_TELEGRAM_USERS or user_id in config.ALLOWED_TELEGRAM_USERS
 
 
+def _chat_id(update: Update) -> int:
+    """Chat da mensagem (chave do estado de conversa em memory)."""
+    return update.effective_chat.id if update is not None and update.effective_chat else 0
+
+
+# chat_id -> [lock, mensagens do chat em andamento ou esperando]
+_ordem_chats: dict[int, list] = {}
+
+
+def _em_ordem_por_chat(handler):
+    """
+    Envolve um handler de mensagem registrado com block=False: chats diferentes são atendidos ao
+    mesmo tempo, mas as mensagens de um mesmo chat rodam uma por vez, na ordem de chegada.
+    """
+    @functools.wraps(handler)
+    async def envolvido(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        chat_id = _chat_id(update)
+        entrada = _ordem_chats.get(chat_id)
+        if entrada is None:
+            entrada = _ordem_chats[chat_id] = [asyncio.Lock(), 0]
+        entrada[1] += 1
+        try:
+            async with entrada[0]:
+                await handler(update, context)
+        finally:
+            entrada[1] -= 1
+            if not entrada[1]:
+                del _ordem_chats[chat_id]
+
+    return envolvido
+
+
 # ─────────────────────────── Slash command handlers ───────────────────────────
 
 async def handler_start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -805,7 +1006,8 @@ async def handler_start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         "/pessoal — Listar planejamento pessoal\n"
         "/lembretes — Listar todos os lembretes\n"
         "/hoje — Listar tarefas de hoje\n"
-        "/categorias — Listar interesses e áreas\n\n"
+        "/categorias — Listar interesses e áreas\n"
+        "/metricas — Cache da LLM e tempos de resposta\n\n"
         "💬 *Ou envie mensagem de texto/voz:*\n"
         "• 'guardar em Naxtool > Sistemas: ideia...'\n"
         "• 'criar tarefa empresarial: revisar relatório'\n"
@@ -820,7 +1022,7 @@ async def handler_empresarial(update: Update, context: ContextTypes.DEFAULT_TYPE
     if not _verificar_acesso(update):
         return
     try:
-        cards = obsidian_service.listar_cards_planejamento()
+        cards = await obsidian_async.listar_cards_planejamento()
         if not cards:
             await update.message.reply_text("❌ Nenhum projeto empresarial criado até o momento.")
         else:
@@ -835,7 +1037,7 @@ async def handler_pessoal(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     if not _verificar_acesso(update):
         return
     try:
-        cards = obsidian_service.listar_cards_planejamento_pessoal()
+        cards = await obsidian_async.listar_cards_planejamento_pessoal()
         if not cards:
             await update.message.reply_text("❌ Nenhum projeto pessoal criado até o momento.")
         else:
@@ -850,7 +1052,7 @@ async def handler_lembretes(update: Update, context: ContextTypes.DEFAULT_TYPE)
     if not _verificar_acesso(update):
         return
     try:
-        lembretes = obsidian_service.listar_lembretes()
+        lembretes = await obsidian_async.listar_lembretes()
         await update.message.reply_text(_formatar_lembretes(lembretes))
     except requests.RequestException as e:
         logger.warning("Erro ao buscar lembretes: %s", e)
@@ -862,7 +1064,7 @@ async def handler_hoje(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     if not _verificar_acesso(update):
         return
     try:
-        tarefas = obsidian_service.listar_tarefas_diarias()
+        tarefas = await obsidian_async.listar_tarefas_diarias()
         await update.message.reply_text(_formatar_tarefas_diarias(tarefas))
     except requests.RequestException as e:
         logger.warning("Erro ao buscar tarefas diárias: %s", e)
@@ -874,20 +1076,86 @@ async def handler_categorias(update: Update, context: ContextTypes.DEFAULT_TYPE)
     if not _verificar_acesso(update):
         return
     try:
-        interesses = obsidian_service.listar_interesses()
-        areas = obsidian_service.listar_areas()
-        await update.message.reply_text(_formatar_lista_interesses_areas(interesses, areas))
+        tax = await obsidian_async.obter_taxonomia()
+        await update.message.reply_text(_formatar_lista_interesses_areas(tax))
     except requests.RequestException:
         await update.message.reply_text("⚠️ Não consegui carregar interesses/áreas agora (servidor offline).")
 
 
+# Métricas que amostram o tamanho de uma fila (não são segundos): aparecem junto da fila, não nas latências
+_SUFIXO_PROFUNDIDADE = ":profundidade"
+
+
+def _linha_profundidade(nome: str) -> str | None:
+    """Linha com o tamanho da fila visto por quem chega (p50/p95/máx, inteiros); None sem amostras."""
+    r = metricas.resumo(nome)
+    if r is None:
+        return None
+    return f"• Profundidade ao chegar: p50 {r['p50']:.0f} | p95 {r['p95']:.0f} | máx {r['max']:.0f} (n={r['n']})"
+
+
+def _formatar_metricas() -> str:
+    """Texto com os contadores do cache de respostas da LLM e as latências medidas."""
+    est = llm_cache.cache().estatisticas()
+    linhas = [
+        "📊 Cache da LLM",
+        f"• Acertos: {est['hits_memoria']} (memória) + {est['hits_disco']} (disco)",
+        f"• Falhas: {est['misses']} | taxa de acerto: {est['taxa_acerto']:.0%}",
+        f"• Entradas em memória: {est['entradas_memoria']} | disco: {'sim' if est['disco'] else 'não'}",
+    ]
+    for tarefa, c in sorted(est["por_tarefa"].items()):
+        linhas.append(f"  – {tarefa}: {c['hits']} acerto(s) / {c['misses']} falha(s)")
+    nomes = [n for n in metricas.nomes() if not n.endswith(_SUFIXO_PROFUNDIDADE)]
+    if nomes:
+        linhas.append("\n⏱️ Latências (s)")
+        for nome in nomes:
+            r = metricas.resumo(nome)
+            linhas.append(f"• {nome}: p50 {r['p50']:.2f} | p95 {r['p95']:.2f} | máx {r['max']:.2f} (n={r['n']})")
+    linhas.append("\n🧭 Rotas da LLM")
+    for tarefa, s in sorted(rotas_llm.situacao().items()):
+        rebaixada = " (rebaixada)" if s["rebaixada"] else ""
+        linhas.append(f"• {tarefa}: {s['modelo']}{rebaixada} | orçamento {s['orcamento']:.0f} s")
+    fila = limitador_llm.limitador().situacao()
+    linhas.append("\n🚦 Fila da LLM")
+    linhas.append(
+        f"• {fila['na_fila']} na fila | {fila['em_andamento']} em andamento | taxa {fila['taxa']:.2f}/s"
+        + (f" | pausa {fila['pausa']:.0f} s" if fila["pausa"] else "")
+    )
+    profundidade = _linha_profundidade("llm_fila" + _SUFIXO_PROFUNDIDADE)
+    if profundidade:
+        linhas.append(profundidade)
+    fila_audio = audio.situacao()
+    linhas.append("\n🎙️ Fila de áudio")
+    linhas.append(
+        f"• {fila_audio['na_fila']} na fila | {fila_audio['em_andamento']} em andamento"
+        f" | {fila_audio['trabalhadores']} trabalhador(es)"
+    )
+    profundidade = _linha_profundidade("audio_fila" + _SUFIXO_PROFUNDIDADE)
+    if profundidade:
+        linhas.append(profundidade)
+    revisoes = revisao_local.estatisticas()
+    if revisoes:
+        linhas.append("\n✏️ Revisão local (chamadas à LLM evitadas)")
+        for tarefa, c in sorted(revisoes.items()):
+            taxa = c["puladas"] / c["verificadas"] * 100
+            linhas.append(f"• {tarefa}: {c['puladas']}/{c['verificadas']} ({taxa:.0f}%)")
+    return "\n".join(linhas)
+
+
+async def handler_metricas(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Handler para /metricas — cache de respostas da LLM e latências (p50/p95)."""
+    if not _verificar_acesso(update):
+        return
+    await update.message.reply_text(_formatar_metricas())
+
+
 async def _montar_briefing() -> str:
     """Monta o texto do briefing diário com lembretes, tarefas prioritárias e contagem de ideias."""
     linhas = ["📅 *Briefing do Dia*\n"]
 
     # Lembretes vencidos
     try:
-        vencidos = obsidian_service.listar_lembretes_vencidos()
+        vencidos = await obsidian_async.listar_lembretes_vencidos()
         if vencidos:
             linhas.append(f"🔔 *{len(vencidos)} lembrete(s) vencido(s):*")
             for r in vencidos[:5]:
@@ -900,7 +1168,7 @@ async def _montar_briefing() -> str:
 
     # Tarefas de alta prioridade
     try:
-        cards_emp = obsidian_service.listar_cards_planejamento()
+        cards_emp = await obsidian_async.listar_cards_planejamento()
         alta_emp = [c for c in cards_emp if not c.get("isFinalized") and c.get("priority") == "high"]
         if alta_emp:
             linhas.append(f"💼 *{len(alta_emp)} tarefa(s) empresarial(is) de alta prioridade:*")
@@ -912,7 +1180,7 @@ async def _montar_briefing() -> str:
         pass
 
     try:
-        cards_pes = obsidian_service.listar_cards_planejamento_pessoal()
+        cards_pes = await obsidian_async.listar_cards_planejamento_pessoal()
         alta_pes = [c for c in cards_pes if not c.get("isFinalized") and c.get("priority") == "high"]
         if alta_pes:
             linhas.append(f"👤 *{len(alta_pes)} tarefa(s) pessoal(is) de alta prioridade:*")
@@ -925,7 +1193,7 @@ async def _montar_briefing() -> str:
 
     # Tarefas diárias de hoje
     try:
-        tarefas_hoje = obsidian_service.listar_tarefas_diarias()
+        tarefas_hoje = await obsidian_async.listar_tarefas_diarias()
         if tarefas_hoje:
             pendentes = [t for t in tarefas_hoje if not t.get("done")]
             concluidas = [t for t in tarefas_hoje if t.get("done")]
@@ -934,15 +1202,15 @@ async def _montar_briefing() -> str:
     except requests.RequestException:
         pass
 
-    # Ideias recentes (últimos 7 dias)
+    # Ideias recentes (últimos 7 dias), contadas no espelho local
     try:
-        docs = obsidian_service.listar_documentos()
-        sete_dias_atras = (datetime.datetime.utcnow() - datetime.timedelta(days=7)).isoformat()[:10]
-        recentes = [d for d in docs if (d.get("createdAt") or "")[:10] >= sete_dias_atras]
-        if recentes:
-            linhas.append(f"💡 *{len(recentes)} ideia(s) registrada(s) nos últimos 7 dias.*")
-    except requests.RequestException:
-        pass
+        await obsidian_async.sincronizar_documentos()
+    except requests.RequestException as e:
+        logger.debug("Briefing: espelho não sincronizado (%s); usando dados locais", e)
+    sete_dias_atras = (datetime.datetime.utcnow() - datetime.timedelta(days=7)).isoformat()[:10]
+    recentes = espelho().contar_desde(sete_dias_atras)
+    if recentes:
+        linhas.append(f"💡 *{recentes} ideia(s) registrada(s) nos últimos 7 dias.*")
 
     if len(linhas) == 1:
         linhas.append("Tudo em dia! Nenhum item urgente no momento.")
@@ -973,23 +1241,23 @@ async def handler_mensagem_texto(update: Update, context: ContextTypes.DEFAULT_T
     logger.info("Nova mensagem de %s (chat_id=%s): %r", update.effective_user.username, update.effective_chat.id if update.effective_chat else "?", texto)
     try:
         # Verificar pending_action primeiro
-        pending = memory.get_pending_action()
+        chat_id = _chat_id(update)
+        pending = memory.get_pending_action(chat_id)
         low = texto.lower().strip()
         if pending:
             if low in ("não", "nao", "n", "cancelar"):
-                memory.clear_pending_action()
+                memory.clear_pending_action(chat_id)
                 await update.message.reply_text("Ok — cancelado.")
                 return
             elif low in ("sim", "s", "confirmar", "ok"):
-                memory.clear_pending_action()
+                memory.clear_pending_action(chat_id)
                 await _executar_acao_confirmada(pending, update, context)
                 return
 
         if _parece_pergunta_interesses_areas(texto):
             try:
-                interesses = obsidian_service.listar_interesses()
-                areas = obsidian_service.listar_areas()
-                await update.message.reply_text(_formatar_lista_interesses_areas(interesses, areas))
+                tax = await obsidian_async.obter_taxonomia()
+                await update.message.reply_text(_formatar_lista_interesses_areas(tax))
             except requests.RequestException:
                 await update.message.reply_text("⚠️ Não consegui carregar interesses/áreas agora (servidor offline).")
             return
@@ -998,7 +1266,7 @@ async def handler_mensagem_texto(update: Update, context: ContextTypes.DEFAULT_T
         if _parece_consulta_planejamento_empresarial(texto):
             logger.info("Detecção local: consulta de planejamento empresarial")
             try:
-                cards = obsidian_service.listar_cards_planejamento()
+                cards = await obsidian_async.listar_cards_planejamento()
                 if not cards:
                     await update.message.reply_text("❌ Nenhum projeto empresarial criado até o momento.")
                 else:
@@ -1012,7 +1280,7 @@ async def handler_mensagem_texto(update: Update, context: ContextTypes.DEFAULT_T
         if _parece_consulta_planejamento_pessoal(texto):
             logger.info("Detecção local: consulta de planejamento pessoal")
             try:
-                cards = obsidian_service.listar_cards_planejamento_pessoal()
+                cards = await obsidian_async.listar_cards_planejamento_pessoal()
                 if not cards:
                     await update.message.reply_text("❌ Nenhum projeto pessoal criado até o momento.")
                 else:
@@ -1026,13 +1294,16 @@ async def handler_mensagem_texto(update: Update, context: ContextTypes.DEFAULT_T
         if _parece_consulta_tarefas_diarias(texto):
             logger.info("Detecção local: consulta de tarefas diárias")
             try:
-                tarefas = obsidian_service.listar_tarefas_diarias()
+                tarefas = await obsidian_async.listar_tarefas_diarias()
                 await update.message.reply_text(_formatar_tarefas_diarias(tarefas))
             except requests.RequestException as e:
                 logger.warning("Erro ao buscar tarefas diárias: %s", e)
                 await update.message.reply_text("⚠️ Não consegui carregar as tarefas de hoje (servidor offline).")
             return
 
+        if await _despachar_intencao_local(texto, update):
+            return
+
         await _processar_texto_e_responder(texto, update, context)
     except Exception as e:
         logger.exception("Erro ao processar mensagem de texto: %s", e)
@@ -1047,21 +1318,17 @@ async def handler_mensagem_voz(update: Update, context: ContextTypes.DEFAULT_TYP
     if not update.message or not update.message.voice:
         return
     voice = update.message.voice
-    temp_ogg = None
-    temp_wav = None
     try:
-        temp_ogg = await audio.baixar_arquivo_voice(voice.file_id, context.bot)
-        temp_wav = audio.ogg_para_wav(temp_ogg)
-        texto = audio.transcrever(temp_wav)
+        dados = await audio.baixar_voice(voice.file_id, context.bot)
+        texto = await audio.transcrever_voice(dados)
         if not (texto and texto.strip()):
             await update.message.reply_text("Não foi possível transcrever o áudio.")
             return
         texto = texto.strip()
         if _parece_pergunta_interesses_areas(texto):
             try:
-                interesses = obsidian_service.listar_interesses()
-                areas = obsidian_service.listar_areas()
-                await update.message.reply_text(_formatar_lista_interesses_areas(interesses, areas))
+                tax = await obsidian_async.obter_taxonomia()
+                await update.message.reply_text(_formatar_lista_interesses_areas(tax))
             except requests.RequestException:
                 await update.message.reply_text("⚠️ Não consegui carregar interesses/áreas agora (servidor offline).")
             return
@@ -1069,7 +1336,7 @@ async def handler_mensagem_voz(update: Update, context: ContextTypes.DEFAULT_TYP
         if _parece_consulta_planejamento_empresarial(texto):
             logger.info("Detecção local (voz): consulta de planejamento empresarial")
             try:
-                cards = obsidian_service.listar_cards_planejamento()
+                cards = await obsidian_async.listar_cards_planejamento()
                 if not cards:
                     await update.message.reply_text("❌ Nenhum projeto empresarial criado até o momento.")
                 else:
@@ -1081,7 +1348,7 @@ async def handler_mensagem_voz(update: Update, context: ContextTypes.DEFAULT_TYP
         if _parece_consulta_planejamento_pessoal(texto):
             logger.info("Detecção local (voz): consulta de planejamento pessoal")
             try:
-                cards = obsidian_service.listar_cards_planejamento_pessoal()
+                cards = await obsidian_async.listar_cards_planejamento_pessoal()
                 if not cards:
                     await update.message.reply_text("❌ Nenhum projeto pessoal criado até o momento.")
                 else:
@@ -1092,12 +1359,15 @@ async def handler_mensagem_voz(update: Update, context: ContextTypes.DEFAULT_TYP
 
         if _parece_consulta_tarefas_diarias(texto):
             try:
-                tarefas = obsidian_service.listar_tarefas_diarias()
+                tarefas = await obsidian_async.listar_tarefas_diarias()
                 await update.message.reply_text(_formatar_tarefas_diarias(tarefas))
             except requests.RequestException:
                 await update.message.reply_text("⚠️ Não consegui carregar as tarefas de hoje.")
             return
 
+        if await _despachar_intencao_local(texto, update):
+            return
+
         await _processar_texto_e_responder(texto, update, context)
     except audio.FFmpegNotFoundError:
         await update.message.reply_text(
@@ -1114,13 +1384,6 @@ async def handler_mensagem_voz(update: Update, context: ContextTypes.DEFAULT_TYP
     except Exception as e:
         logger.exception("Erro ao processar áudio: %s", e)
         await update.message.reply_text(RESPOSTA_ERRO)
-    finally:
-        for path in (temp_ogg, temp_wav):
-            if path and Path(path).exists():
-                try:
-                    os.unlink(path)
-                except OSError:
-                    pass
 
 
 # ────────────────────────────── Jobs periódicos ───────────────────────────────
@@ -1131,19 +1394,29 @@ async def _job_lembretes_vencidos(context: ContextTypes.DEFAULT_TYPE) -> None:
     if not chat_id:
         return
     try:
-        vencidos = obsidian_service.listar_lembretes_vencidos()
+        vencidos = await obsidian_async.listar_lembretes_vencidos()
         for r in vencidos:
             msg = f"🔔 {r.get('title', 'Lembrete')}"
             if r.get("body"):
                 msg += f"\n{r['body']}"
             await context.bot.send_message(chat_id=chat_id, text=msg)
-            obsidian_service.marcar_lembrete_disparado(r["id"])
+            await obsidian_async.marcar_lembrete_disparado(r["id"])
     except requests.RequestException as e:
         logger.debug("Job lembretes: %s", e)
     except Exception as e:
         logger.warning("Job lembretes: %s", e)
 
 
+async def _job_sincronizar_documentos(context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Job periódico: mantém o espelho local de documentos atualizado fora do caminho das mensagens."""
+    try:
+        await obsidian_async.sincronizar_documentos(forcar=True)
+    except requests.RequestException as e:
+        logger.debug("Job espelho: %s", e)
+    except Exception as e:
+        logger.warning("Job espelho: %s", e)
+
+
 async def _job_briefing_diario(context: ContextTypes.DEFAULT_TYPE) -> None:
     """Job diário: envia briefing matinal às 08:00 para TELEGRAM_CHAT_ID."""
     chat_id = getattr(config, "TELEGRAM_CHAT_ID", "") or ""
@@ -1158,6 +1431,14 @@ async def _job_briefing_diario(context: ContextTypes.DEFAULT_TYPE) -> None:
 
 # ──────────────────────────────────── main ────────────────────────────────────
 
+async def _encerrar(application: Application) -> None:
+    """Libera recursos compartilhados (pool de conexões, executor de áudio) e grava a memória pendente no encerramento do bot."""
+    await obsidian_async.fechar_cliente()
+    await llm_async.fechar_cliente()
+    audio.encerrar()
+    memory.descarregar()
+
+
 def main() -> None:
     """Valida config, monta a aplicação e inicia o polling."""
     config.validar_config()
@@ -1167,7 +1448,7 @@ def main() -> None:
         "sim" if key.strip() else "não",
         len(key),
     )
-    app = Application.builder().token(config.TELEGRAM_BOT_TOKEN).build()
+    app = Application.builder().token(config.TELEGRAM_BOT_TOKEN).post_shutdown(_encerrar).build()
 
     # Slash commands
     app.add_handler(CommandHandler("start", handler_start))
@@ -1177,12 +1458,16 @@ def main() -> None:
     app.add_handler(CommandHandler("lembretes", handler_lembretes))
     app.add_handler(CommandHandler("hoje", handler_hoje))
     app.add_handler(CommandHandler("categorias", handler_categorias))
+    app.add_handler(CommandHandler("metricas", handler_metricas))
 
-    # Mensagens de texto e voz
-    app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handler_mensagem_texto))
-    app.add_handler(MessageHandler(filters.VOICE, handler_mensagem_voz))
+    # Mensagens de texto e voz (fora da fila global de updates; em ordem dentro de cada chat)
+    app.add_handler(
+        MessageHandler(filters.TEXT & ~filters.COMMAND, _em_ordem_por_chat(handler_mensagem_texto), block=False)
+    )
+    app.add_handler(MessageHandler(filters.VOICE, _em_ordem_por_chat(handler_mensagem_voz), block=False))
 
     # Jobs periódicos
+    app.job_queue.run_repeating(_job_sincronizar_documentos, interval=config.ESPELHO_SYNC_INTERVALO, first=5)
     if getattr(config, "TELEGRAM_CHAT_ID", "") and config.TELEGRAM_CHAT_ID.strip():
         app.job_queue.run_repeating(_job_lembretes_vencidos, interval=60, first=30)
         import datetime as _dt_jobs
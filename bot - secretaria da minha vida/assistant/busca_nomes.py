@@ -0,0 +1,102 @@
+"""
+Índice de nomes para resolver interesse/área digitados pelo usuário ou sugeridos pela LLM.
+Construído uma vez por versão da taxonomia: chaves normalizadas sem acento, trie de prefixos
+(nome inteiro e início de cada palavra) e índice de trigramas para tolerar erros de digitação
+("interres" -> "Interesses"). Retorna candidatos ranqueados com score em [0, 1].
+"""
+from __future__ import annotations
+
+import re
+import unicodedata
+
+# Scores por tipo de casamento; prefixo/substring ganham um bônus proporcional à cobertura do nome.
+SCORE_EXATO = 1.0
+SCORE_PREFIXO = 0.8
+SCORE_PREFIXO_PALAVRA = 0.75
+SCORE_SUBSTRING = 0.7
+SCORE_TRIGRAMA = 0.7
+SIMILARIDADE_MINIMA = 0.35
+
+
+def chave(texto: str) -> str:
+    """Minúsculas, sem acentos, só letras/dígitos e espaços simples."""
+    sem_acento = unicodedata.normalize("NFKD", texto or "").encode("ascii", "ignore").decode()
+    return " ".join(re.findall(r"[a-z0-9]+", sem_acento.lower()))
+
+
+def _trigramas(k: str) -> set[str]:
+    k = f"  {k} "
+    return {k[i:i + 3] for i in range(len(k) - 2)}
+
+
+class IndiceNomes:
+    """Índice sobre uma lista de entidades com campo "name"."""
+
+    def __init__(self, entidades: list[dict]) -> None:
+        self.entidades = [e for e in (entidades or []) if chave(e.get("name") or "")]
+        self._chaves = [chave(e.get("name") or "") for e in self.entidades]
+        self._exato: dict[str, list[int]] = {}
+        self._trie: dict = {}
+        self._trigramas: dict[str, set[int]] = {}
+        self._n_trigramas: list[int] = []
+        for idx, k in enumerate(self._chaves):
+            self._exato.setdefault(k, []).append(idx)
+            self._inserir_trie(k, idx, inicio_nome=True)
+            for m in re.finditer(r" (?=\S)", k):
+                self._inserir_trie(k[m.end():], idx, inicio_nome=False)
+            tris = _trigramas(k)
+            self._n_trigramas.append(len(tris))
+            for t in tris:
+                self._trigramas.setdefault(t, set()).add(idx)
+
+    def _inserir_trie(self, k: str, idx: int, inicio_nome: bool) -> None:
+        no = self._trie
+        for c in k:
+            no = no.setdefault(c, {})
+            ids = no.setdefault("", {})
+            ids[idx] = ids.get(idx, False) or inicio_nome
+
+    def _prefixados(self, k: str) -> dict[int, bool]:
+        """{idx: True se o nome inteiro começa com k, False se só alguma palavra começa}."""
+        no = self._trie
+        for c in k:
+            no = no.get(c)
+            if no is None:
+                return {}
+        return no.get("", {})
+
+    def buscar(self, texto: str, limite: int = 5) -> list[tuple[dict, float]]:
+        """Candidatos ranqueados [(entidade, score)], do mais provável ao menos provável."""
+        k = chave(texto)
+        if not k or not self.entidades:
+            return []
+        scores: dict[int, float] = {}
+
+        def _marcar(idx: int, score: float) -> None:
+            if score > scores.get(idx, 0.0):
+                scores[idx] = score
+
+        for idx in self._exato.get(k, []):
+            _marcar(idx, SCORE_EXATO)
+        for idx, inicio_nome in self._prefixados(k).items():
+            cobertura = len(k) / len(self._chaves[idx])
+            _marcar(idx, (SCORE_PREFIXO if inicio_nome else SCORE_PREFIXO_PALAVRA) + 0.1 * cobertura)
+
+        tris = _trigramas(k)
+        comuns: dict[int, int] = {}
+        for t in tris:
+            for idx in self._trigramas.get(t, ()):
+                comuns[idx] = comuns.get(idx, 0) + 1
+        for idx, n in comuns.items():
+            if idx in scores:
+                continue
+            if k in self._chaves[idx]:
+                _marcar(idx, SCORE_SUBSTRING + 0.1 * len(k) / len(self._chaves[idx]))
+                continue
+            dice = 2 * n / (len(tris) + self._n_trigramas[idx])
+            if dice >= SIMILARIDADE_MINIMA:
+                _marcar(idx, SCORE_TRIGRAMA * dice)
+
+        ordenados = sorted(scores.items(), key=lambda kv: (-kv[1], len(self._chaves[kv[0]])))
+        return [(self.entidades[idx], round(score, 4)) for idx, score in ordenados[:limite]]
+
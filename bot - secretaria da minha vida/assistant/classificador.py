@@ -0,0 +1,315 @@
+"""
+Classificador local de intenção (acao) para responder comandos rotineiros sem chamar a LLM.
+Features: n-gramas de palavras (1 e 2) e trigramas de caracteres, com hashing para um vetor
+de tamanho fixo; modelo: regressão logística multinomial treinada com NumPy.
+Dados de treino: frases dos exemplos do PROMPT_SISTEMA, frases-semente abaixo e o tráfego real
+registrado (texto -> acao escolhida pela LLM) em CLASSIFICADOR_TRAFEGO_PATH.
+NumPy está em requirements.txt; se faltar, classificar() devolve None e tudo segue pela LLM.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import threading
+import zlib
+from collections import deque
+
+from assistant.busca_nomes import chave
+from assistant.config import (
+    CLASSIFICADOR_MAX_TRAFEGO,
+    CLASSIFICADOR_RETREINO,
+    CLASSIFICADOR_TRAFEGO_PATH,
+)
+
+try:
+    import numpy as np
+except ImportError:  # dependência opcional
+    np = None
+
+logger = logging.getLogger(__name__)
+
+# Ações só de leitura: podem ser respondidas localmente quando a confiança é alta
+ACOES_LEITURA = frozenset({
+    "listar_planejamentos_empresariais",
+    "listar_planejamentos_pessoais",
+    "listar_lembretes_ativos",
+    "listar_categorias",
+    "listar_tarefas_diarias",
+})
+
+# Frases-semente por ação (complementam os exemplos do prompt, que têm poucas frases literais)
+FRASES_SEMENTE = {
+    "listar_planejamentos_empresariais": (
+        "quais são minhas tarefas empresariais", "liste o planejamento empresarial",
+        "me mostra os projetos da empresa", "o que tenho registrado no empresarial",
+        "ver planejamentos empresariais", "tarefas do trabalho cadastradas",
+    ),
+    "listar_planejamentos_pessoais": (
+        "quais são minhas tarefas pessoais", "liste o planejamento pessoal",
+        "me mostra meus projetos pessoais", "o que tenho no pessoal",
+        "ver planejamentos pessoais", "meus projetos pessoais cadastrados",
+    ),
+    "listar_lembretes_ativos": (
+        "liste meus lembretes", "quais lembretes eu tenho", "me mostra os lembretes",
+        "ver meus lembretes", "lembretes ativos", "quais são meus lembretes cadastrados",
+    ),
+    "listar_categorias": (
+        "quais são as categorias", "liste os interesses e áreas", "quais áreas eu tenho",
+        "me mostra as categorias", "ver interesses cadastrados", "quais interesses existem",
+    ),
+    "listar_tarefas_diarias": (
+        "quais são as tarefas de hoje", "o que tenho hoje", "lista de hoje",
+        "me mostra as tarefas do dia", "ver tarefas diárias", "o que falta fazer hoje",
+    ),
+    "lançar_lembretes": (
+        "me avise dos lembretes", "quais lembretes estão vencidos", "lembretes pendentes",
+        "tem algum lembrete atrasado",
+    ),
+    "salvar_ideia": (
+        "salve na area sistemas que preciso revisar o deploy", "anote uma ideia de vídeo",
+        "guarde isso na área instagram: post sobre produtividade", "registre que quero estudar rust",
+        "ideia: app de receitas com fotos", "salvar nota sobre o livro que estou lendo",
+    ),
+    "criar_lembrete": (
+        "me lembre amanhã às 10 de ligar para o banco", "crie um lembrete para pagar a conta dia 5",
+        "lembrete toda segunda de enviar relatório", "me lembra de comprar pão às 18h",
+    ),
+    "criar_tarefa_planejamento": (
+        "adicione no planejamento empresarial revisar contratos", "crie tarefa empresarial de ligar para fornecedor",
+        "nova tarefa no projeto da empresa: atualizar site",
+    ),
+    "criar_tarefa_planejamento_pessoal": (
+        "adicione no planejamento pessoal comprar presente", "crie tarefa pessoal de marcar dentista",
+        "nova tarefa pessoal: organizar a garagem",
+    ),
+    "criar_tarefa_diaria": (
+        "adicione nas tarefas de hoje revisar e-mails", "crie tarefa para hoje: pagar boleto",
+        "coloca na lista de hoje ligar pro contador",
+    ),
+    "concluir_tarefa_diaria": (
+        "conclui a tarefa de revisar e-mails", "marque como feita a tarefa do boleto",
+        "terminei a tarefa de ligar pro contador",
+    ),
+    "excluir_lembrete": ("exclua o lembrete do banco", "apague o lembrete de pagar a conta"),
+    "excluir_ideia": ("exclua a ideia do app de receitas", "apague aquela ideia do vídeo"),
+    "buscar_ideia": ("busque minhas ideias sobre vídeo", "procure a ideia do app de receitas"),
+    "responder": (
+        "oi", "bom dia", "tudo bem?", "obrigado", "o que você faz?", "quem é você",
+        "valeu", "me explica como funciona o bot", "boa noite",
+    ),
+}
+
+# Dimensão do vetor de features (hashing trick)
+_DIMENSAO = 2 ** 14
+_PASSOS = 300
+_TAMANHO_LOTE = 256
+_TAXA_APRENDIZADO = 8.0
+_L2 = 1e-4
+_RE_EXEMPLO = re.compile(r'"([^"]{2,120})"')
+_RE_ACAO = re.compile(r'"acao":\s*"([^"]+)"')
+
+
+def _hash(feature: str) -> tuple[int, float]:
+    h = zlib.crc32(feature.encode("utf-8"))
+    return h % _DIMENSAO, (1.0 if h & 0x80000000 else -1.0)
+
+
+def features(texto: str) -> dict[int, float]:
+    """Vetor esparso {índice: valor} normalizado (L2): palavras, bigramas e trigramas de caracteres."""
+    palavras = chave(texto).split()
+    brutas = [f"w:{p}" for p in palavras]
+    brutas += [f"b:{a} {b}" for a, b in zip(palavras, palavras[1:])]
+    for p in palavras:
+        p = f"<{p}>"
+        brutas += [f"c:{p[i:i + 3]}" for i in range(len(p) - 2)]
+    vetor: dict[int, float] = {}
+    for f in brutas:
+        idx, sinal = _hash(f)
+        vetor[idx] = vetor.get(idx, 0.0) + sinal
+    norma = sum(v * v for v in vetor.values()) ** 0.5 or 1.0
+    return {idx: v / norma for idx, v in vetor.items()}
+
+
+def exemplos_do_prompt() -> list[tuple[str, str]]:
+    """(frase, acao) extraídos dos exemplos do PROMPT_SISTEMA que trazem a frase do usuário entre aspas."""
+    from assistant import llm
+
+    pares = []
+    for _, linha in llm.EXEMPLOS_CONSULTAS + llm.EXEMPLOS_CRIACOES:
+        cabeca, _, resto = linha.partition(": {")
+        acao = _RE_ACAO.search(resto)
+        if acao:
+            pares.extend((frase, acao.group(1)) for frase in _RE_EXEMPLO.findall(cabeca))
+    return pares
+
+
+def carregar_trafego(limite: int = CLASSIFICADOR_MAX_TRAFEGO) -> list[tuple[str, str]]:
+    """Últimos `limite` pares (texto, acao) registrados a partir das respostas da LLM."""
+    if not CLASSIFICADOR_TRAFEGO_PATH.exists():
+        return []
+    pares: deque[tuple[str, str]] = deque(maxlen=limite)
+    try:
+        with CLASSIFICADOR_TRAFEGO_PATH.open(encoding="utf-8") as f:
+            for linha in f:
+                try:
+                    item = json.loads(linha)
+                except json.JSONDecodeError:
+                    continue
+                if item.get("texto") and item.get("acao"):
+                    pares.append((item["texto"], item["acao"]))
+    except OSError as e:
+        logger.warning("Falha ao ler tráfego do classificador: %s", e)
+    return list(pares)
+
+
+def dados_treino() -> list[tuple[str, str]]:
+    sementes = [(frase, acao) for acao, frases in FRASES_SEMENTE.items() for frase in frases]
+    return exemplos_do_prompt() + sementes + carregar_trafego()
+
+
+class Classificador:
+    """Regressão logística multinomial sobre features esparsas com hashing."""
+
+    def __init__(self) -> None:
+        self.acoes: list[str] = []
+        self.pesos = None  # (_DIMENSAO, n_acoes)
+        self.vies = None  # (n_acoes,)
+
+    def treinar(self, pares: list[tuple[str, str]]) -> "Classificador":
+        """
+        Gradiente descendente (softmax + L2) em lotes de até _TAMANHO_LOTE exemplos, por _PASSOS passos:
+        com poucos dados é gradiente em lote completo; com muito tráfego o custo do treino não cresce.
+        """
+        self.acoes = sorted({acao for _, acao in pares})
+        indice_acao = {a: i for i, a in enumerate(self.acoes)}
+        vetores = [features(texto) for texto, _ in pares]
+        classes = [indice_acao[acao] for _, acao in pares]
+        ordem = np.random.default_rng(0).permutation(len(pares))
+        lotes = [
+            self._montar_lote([vetores[i] for i in ordem[k:k + _TAMANHO_LOTE]], [classes[i] for i in ordem[k:k + _TAMANHO_LOTE]])
+            for k in range(0, len(pares), _TAMANHO_LOTE)
+        ]
+        self.pesos = np.zeros((_DIMENSAO, len(self.acoes)), dtype=np.float32)
+        self.vies = np.zeros(len(self.acoes), dtype=np.float32)
+        for passo in range(_PASSOS if lotes else 0):
+            self._passo(*lotes[passo % len(lotes)])
+        return self
+
+    def _montar_lote(self, vetores: list[dict[int, float]], classes: list[int]) -> tuple:
+        """Lote em formato de coordenadas, com os índices de segmento usados pelo reduceat."""
+        linhas = np.repeat(np.arange(len(vetores)), [len(v) for v in vetores])
+        colunas = np.fromiter((idx for v in vetores for idx in v), dtype=np.int64, count=len(linhas))
+        valores = np.fromiter((x for v in vetores for x in v.values()), dtype=np.float32, count=len(linhas))[:, None]
+        alvo = np.zeros((len(vetores), len(self.acoes)), dtype=np.float32)
+        alvo[np.arange(len(vetores)), classes] = 1.0
+        # Somas por linha (logits) e por coluna (gradiente) com reduceat sobre segmentos contíguos,
+        # bem mais rápido que np.add.at; textos sem features ficam só com o viés.
+        com_features = np.array([bool(v) for v in vetores])
+        inicio_linhas = np.searchsorted(linhas, np.arange(len(vetores)))[com_features]
+        por_coluna = np.argsort(colunas, kind="stable")
+        colunas_usadas, inicio_colunas = np.unique(colunas[por_coluna], return_index=True)
+        return linhas, colunas, valores, alvo, com_features, inicio_linhas, por_coluna, colunas_usadas, inicio_colunas
+
+    def _passo(self, linhas, colunas, valores, alvo, com_features, inicio_linhas, por_coluna, colunas_usadas, inicio_colunas) -> None:
+        n = len(alvo)
+        logits = np.tile(self.vies, (n, 1))
+        if len(linhas):
+            logits[com_features] += np.add.reduceat(self.pesos[colunas] * valores, inicio_linhas)
+        erro = (self._softmax(logits) - alvo) / n
+        if len(linhas):
+            grad = np.add.reduceat((erro[linhas] * valores)[por_coluna], inicio_colunas)
+            usados = self.pesos[colunas_usadas]
+            self.pesos[colunas_usadas] = usados - _TAXA_APRENDIZADO * (grad + _L2 * usados)
+        self.vies -= _TAXA_APRENDIZADO * erro.sum(axis=0)
+
+    @staticmethod
+    def _softmax(logits):
+        z = np.exp(logits - logits.max(axis=1, keepdims=True))
+        return z / z.sum(axis=1, keepdims=True)
+
+    def prever(self, texto: str) -> tuple[str, float]:
+        """(acao mais provável, probabilidade)."""
+        vetor = features(texto)
+        logits = self.vies.copy()
+        if vetor:
+            idx = np.fromiter(vetor.keys(), dtype=np.int64)
+            val = np.fromiter(vetor.values(), dtype=np.float32)
+            logits += val @ self.pesos[idx]
+        probs = self._softmax(logits[None, :])[0]
+        melhor = int(probs.argmax())
+        return self.acoes[melhor], float(probs[melhor])
+
+
+_modelo: Classificador | None = None
+_novos_exemplos = 0
+_linhas_trafego: int | None = None  # linhas no arquivo de tráfego (contadas na primeira gravação)
+_lock = threading.Lock()  # _modelo, _novos_exemplos e o arquivo de tráfego
+_lock_treino = threading.Lock()  # um treino por vez, sem segurar _lock (registrar_exemplo roda no event loop)
+_avisou_sem_numpy = False
+
+
+def classificar(texto: str) -> tuple[str, float] | None:
+    """
+    (acao, confiança) para a mensagem, ou None se NumPy não estiver instalado.
+    Treina na primeira chamada e de novo a cada CLASSIFICADOR_RETREINO exemplos registrados.
+    Bloqueante (o treino leva até algumas centenas de ms): chame via asyncio.to_thread.
+    """
+    global _modelo, _novos_exemplos, _avisou_sem_numpy
+    if np is None:
+        if not _avisou_sem_numpy:
+            logger.info("NumPy não instalado: classificador local desativado")
+            _avisou_sem_numpy = True
+        return None
+    with _lock_treino:
+        with _lock:
+            treinar = _modelo is None or _novos_exemplos >= CLASSIFICADOR_RETREINO
+            if treinar:
+                _novos_exemplos = 0
+        if treinar:
+            pares = dados_treino()
+            novo = Classificador().treinar(pares)
+            with _lock:
+                _modelo = novo
+            logger.info("Classificador local treinado com %d exemplos (%d ações)", len(pares), len(novo.acoes))
+    with _lock:
+        modelo = _modelo
+    return modelo.prever(texto)
+
+
+def _compactar_trafego() -> None:
+    """Reescreve o arquivo só com os últimos CLASSIFICADOR_MAX_TRAFEGO pares (rename atômico). Chamar com _lock."""
+    global _linhas_trafego
+    pares = carregar_trafego()
+    tmp = CLASSIFICADOR_TRAFEGO_PATH.with_name(f".{CLASSIFICADOR_TRAFEGO_PATH.name}.tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        f.writelines(json.dumps({"texto": t, "acao": a}, ensure_ascii=False) + "\n" for t, a in pares)
+    os.replace(tmp, CLASSIFICADOR_TRAFEGO_PATH)
+    _linhas_trafego = len(pares)
+
+
+def registrar_exemplo(texto: str, acao: str) -> None:
+    """
+    Acrescenta (texto, acao escolhida pela LLM) ao tráfego usado no próximo treino. Só decisões
+    reais da LLM (JSON interpretado, fora do cache) devem ser registradas. Quando o arquivo passa do
+    dobro de CLASSIFICADOR_MAX_TRAFEGO linhas, fica só com as últimas CLASSIFICADOR_MAX_TRAFEGO.
+    """
+    global _novos_exemplos, _linhas_trafego
+    with _lock:
+        try:
+            CLASSIFICADOR_TRAFEGO_PATH.parent.mkdir(parents=True, exist_ok=True)
+            if _linhas_trafego is None:
+                try:
+                    with CLASSIFICADOR_TRAFEGO_PATH.open("rb") as f:
+                        _linhas_trafego = sum(1 for _ in f)
+                except FileNotFoundError:
+                    _linhas_trafego = 0
+            with CLASSIFICADOR_TRAFEGO_PATH.open("a", encoding="utf-8") as f:
+                f.write(json.dumps({"texto": texto, "acao": acao}, ensure_ascii=False) + "\n")
+            _novos_exemplos += 1
+            _linhas_trafego += 1
+            if _linhas_trafego > 2 * CLASSIFICADOR_MAX_TRAFEGO:
+                _compactar_trafego()
+        except OSError as e:
+            logger.warning("Falha ao registrar exemplo do classificador: %s", e)
@@ -26,6 +26,14 @@ def _obter_caminho_memoria() -> Path:
     return base / "memoria.json"
 
 
+def _obter_caminho_dados(variavel: str, arquivo: str) -> Path:
+    """Caminho de um arquivo de dados local: env `variavel` ou relativo ao pacote."""
+    path_env = os.getenv(variavel)
+    if path_env:
+        return Path(path_env)
+    return Path(__file__).resolve().parent / arquivo
+
+
 def validar_config() -> None:
     """Levanta ValueError listando variáveis de ambiente faltantes."""
     faltando = [v for v in VARIAVEIS_OBRIGATORIAS if not os.getenv(v)]
@@ -52,8 +60,110 @@ OPENROUTER_BASE_URL = os.getenv(
     "OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1/chat/completions"
 )
 OPENROUTER_TIMEOUT = int(os.getenv("OPENROUTER_TIMEOUT", "60"))
+# Pool de conexões com a OpenRouter (keep-alive), timeout de conexão e novas tentativas em 429/5xx.
+OPENROUTER_POOL_SIZE = int(os.getenv("OPENROUTER_POOL_SIZE", "4"))
+OPENROUTER_CONNECT_TIMEOUT = float(os.getenv("OPENROUTER_CONNECT_TIMEOUT", "10"))
+OPENROUTER_RETRIES = int(os.getenv("OPENROUTER_RETRIES", "2"))
+
+
+def _parse_cadeias() -> dict[str, list[str]]:
+    """LLM_CADEIAS="perguntar_llm=modelo1,modelo2;refinar_ideia=modelo3" -> {tarefa: [modelos]}."""
+    cadeias = {}
+    for item in os.getenv("LLM_CADEIAS", "").split(";"):
+        tarefa, _, modelos = item.partition("=")
+        lista = [m.strip() for m in modelos.split(",") if m.strip()]
+        if tarefa.strip() and lista:
+            cadeias[tarefa.strip()] = lista
+    return cadeias
+
+
+# Modelos reserva (em ordem) para todas as chamadas: se o modelo atual passa do seu p95 de latência
+# recente, um pedido duplicado vai para o próximo e vale a primeira resposta; em erro, passa ao próximo.
+# LLM_CADEIAS define a cadeia (principal primeiro) por tipo de chamada, sobrescrevendo a padrão
+# e o modelo da rota (LLM_MODELO_*, abaixo).
+OPENROUTER_MODELOS_RESERVA = [m.strip() for m in os.getenv("OPENROUTER_MODELOS_RESERVA", "").split(",") if m.strip()]
+LLM_CADEIAS = _parse_cadeias()
+# Com menos amostras que isso, o pedido duplicado sai após LLM_HEDGE_ATRASO_PADRAO segundos.
+LLM_HEDGE_MIN_AMOSTRAS = int(os.getenv("LLM_HEDGE_MIN_AMOSTRAS", "20"))
+LLM_HEDGE_ATRASO_PADRAO = float(os.getenv("LLM_HEDGE_ATRASO_PADRAO", "10"))
+
+
+def _rota(sufixo: str, max_tokens: int, timeout: float, orcamento: float, prioridade: int) -> dict:
+    """
+    Rota de uma chamada: LLM_MODELO_<sufixo>, LLM_MAX_TOKENS_<sufixo> (0 = sem limite), LLM_TIMEOUT_<sufixo>,
+    LLM_ORCAMENTO_<sufixo> e LLM_PRIORIDADE_<sufixo> (menor = atendida antes na fila do limitador).
+    """
+    return {
+        "modelo": os.getenv(f"LLM_MODELO_{sufixo}", "").strip() or OPENROUTER_MODEL,
+        "max_tokens": int(os.getenv(f"LLM_MAX_TOKENS_{sufixo}", str(max_tokens))),
+        "timeout": float(os.getenv(f"LLM_TIMEOUT_{sufixo}", str(timeout))),
+        "orcamento": float(os.getenv(f"LLM_ORCAMENTO_{sufixo}", str(orcamento))),
+        "prioridade": int(os.getenv(f"LLM_PRIORIDADE_{sufixo}", str(prioridade))),
+    }
+
+
+# Rota por tipo de chamada: modelo, limite de tokens gerados, timeout de leitura, orçamento de latência (s)
+# e prioridade. Chamadas triviais (correção de uma linha, escolha numa lista) podem ir para um modelo
+# barato e rápido; a conversa (interativa) passa à frente de correção e refino quando há fila.
+LLM_ROTAS = {
+    "perguntar_llm": _rota("INTENCAO", 0, OPENROUTER_TIMEOUT, 12, 0),
+    "refinar_ideia": _rota("REFINO", 0, OPENROUTER_TIMEOUT, 15, 2),
+    "corrigir_titulo_resumo": _rota("CORRECAO", 300, 20, 4, 1),
+    "escolher_par": _rota("PAR", 60, 20, 4, 1),
+}
+# Rota que estoura o orçamento LLM_REBAIXAR_APOS vezes seguidas passa ao próximo modelo da cadeia
+# (OPENROUTER_MODELOS_RESERVA / LLM_CADEIAS, do mais capaz ao mais rápido) e volta ao original
+# após LLM_REBAIXAMENTO_DURACAO segundos. 0 desativa o rebaixamento.
+LLM_REBAIXAR_APOS = int(os.getenv("LLM_REBAIXAR_APOS", "3"))
+LLM_REBAIXAMENTO_DURACAO = float(os.getenv("LLM_REBAIXAMENTO_DURACAO", "900"))
+
+# Limitador das chamadas assíncronas: pedidos simultâneos e balde de fichas (pedidos/s, rajada).
+# LLM_TAXA=0 desliga o limite de taxa (fica só o de concorrência). Em 429/503 a taxa cai pela metade
+# e volta aos poucos.
+LLM_CONCORRENCIA = int(os.getenv("LLM_CONCORRENCIA", str(OPENROUTER_POOL_SIZE)))
+LLM_TAXA = float(os.getenv("LLM_TAXA", "2"))
+LLM_RAJADA = int(os.getenv("LLM_RAJADA", "5"))
+
+# Orçamento (estimado) de tokens do prompt de sistema da conversa. Exemplos few-shot fora da
+# família de intenção prevista são omitidos; 0 envia sempre o prompt completo.
+PROMPT_ORCAMENTO_TOKENS = int(os.getenv("PROMPT_ORCAMENTO_TOKENS", "3500"))
+
+# Classificador local de intenção (requer numpy): consultas só de leitura com confiança
+# >= CLASSIFICADOR_CONFIANCA_MINIMA são respondidas sem chamar a LLM. O tráfego (texto -> acao da LLM)
+# é registrado em CLASSIFICADOR_TRAFEGO_PATH e o modelo é retreinado a cada CLASSIFICADOR_RETREINO exemplos.
+CLASSIFICADOR_LOCAL = os.getenv("CLASSIFICADOR_LOCAL", "1").strip().lower() in ("1", "true", "sim")
+CLASSIFICADOR_CONFIANCA_MINIMA = float(os.getenv("CLASSIFICADOR_CONFIANCA_MINIMA", "0.9"))
+CLASSIFICADOR_TRAFEGO_PATH = _obter_caminho_dados("CLASSIFICADOR_TRAFEGO_PATH", "classificador_trafego.jsonl")
+CLASSIFICADOR_MAX_TRAFEGO = int(os.getenv("CLASSIFICADOR_MAX_TRAFEGO", "5000"))
+CLASSIFICADOR_RETREINO = int(os.getenv("CLASSIFICADOR_RETREINO", "200"))
+
+# Pipeline de "salvar ideia": "separado" (intenção, depois refino e validação do par em chamadas próprias)
+# ou "unica" (intenção + classificação + texto refinado numa só resposta da LLM).
+PIPELINE_IDEIA = os.getenv("PIPELINE_IDEIA", "separado").strip().lower()
+
+# Revisão local antes de corrigir_titulo_resumo/refinar_ideia: textos com até REVISAO_LOCAL_MAX_PALAVRAS
+# palavras, todas conhecidas pelo léxico (assistant/palavras_ptbr.txt), são consertados sem chamar a LLM.
+REVISAO_LOCAL = os.getenv("REVISAO_LOCAL", "1").strip().lower() in ("1", "true", "sim")
+REVISAO_LOCAL_MAX_PALAVRAS = int(os.getenv("REVISAO_LOCAL_MAX_PALAVRAS", "40"))
+
+# Streaming da resposta da LLM: o texto aparece no Telegram enquanto é gerado (mensagem editada
+# no máximo a cada LLM_STREAMING_INTERVALO segundos, por causa do limite de edições do Telegram).
+LLM_STREAMING = os.getenv("LLM_STREAMING", "0").strip().lower() in ("1", "true", "sim")
+LLM_STREAMING_INTERVALO = float(os.getenv("LLM_STREAMING_INTERVALO", "1.0"))
+
+# Cache de respostas da LLM: LRU em memória (entradas) + SQLite opcional em disco.
+# TTLs em segundos por tipo de chamada; 0 desativa o cache daquele tipo.
+LLM_CACHE_TAMANHO = int(os.getenv("LLM_CACHE_TAMANHO", "512"))
+LLM_CACHE_DISCO = os.getenv("LLM_CACHE_DISCO", "1").strip().lower() not in ("0", "false", "nao", "não")
+LLM_CACHE_PATH = _obter_caminho_dados("LLM_CACHE_PATH", "llm_cache.sqlite")
+LLM_CACHE_TAMANHO_DISCO = int(os.getenv("LLM_CACHE_TAMANHO_DISCO", "5000"))
+LLM_CACHE_TTL_CORRECAO = float(os.getenv("LLM_CACHE_TTL_CORRECAO", str(30 * 24 * 3600)))
+LLM_CACHE_TTL_PAR = float(os.getenv("LLM_CACHE_TTL_PAR", str(24 * 3600)))
+LLM_CACHE_TTL_CONVERSA = float(os.getenv("LLM_CACHE_TTL_CONVERSA", "300"))
 
 MEMORIA_PATH = _obter_caminho_memoria()
+# A memória fica em processo; escritas são gravadas em lote até este atraso (s) depois. 0 = logo em seguida.
+MEMORIA_ATRASO_GRAVACAO = float(os.getenv("MEMORIA_ATRASO_GRAVACAO", "2"))
 
 # Opcional: chat_id do Telegram para envio automático de lembretes (job periódico).
 # Se não definido, lembretes só são enviados quando o usuário pedir "me avise dos lembretes".
@@ -73,3 +183,31 @@ ALLOWED_TELEGRAM_USERS = _parse_allowed_users()
 
 # Chave de autenticação para a API do backend Obsidian_premium (header: Authorization: ApiKey <key>)
 BOT_API_KEY = os.getenv("BOT_API_KEY", "").strip()
+
+# Pool de conexões HTTP com o backend (keep-alive). Timeouts em segundos: conexão e leitura separados.
+OBSIDIAN_POOL_SIZE = int(os.getenv("OBSIDIAN_POOL_SIZE", "10"))
+OBSIDIAN_CONNECT_TIMEOUT = float(os.getenv("OBSIDIAN_CONNECT_TIMEOUT", "5"))
+OBSIDIAN_READ_TIMEOUT = float(os.getenv("OBSIDIAN_READ_TIMEOUT", str(OPENROUTER_TIMEOUT)))
+
+# Cache da taxonomia (interesses/áreas) em segundos; invalidado ao criar interesse ou área.
+TAXONOMIA_TTL = float(os.getenv("TAXONOMIA_TTL", "120"))
+# Quantas áreas (as mais relevantes para a mensagem) entram no prompt; taxonomias menores vão inteiras.
+TAXONOMIA_PROMPT_TOP_K = int(os.getenv("TAXONOMIA_PROMPT_TOP_K", "12"))
+
+# Réplica local (SQLite) dos documentos para leituras sem baixar o vault inteiro.
+# Sincroniza incrementalmente a cada ESPELHO_SYNC_INTERVALO s e reconcilia exclusões a cada ESPELHO_RECONCILIAR_INTERVALO s.
+ESPELHO_DOCUMENTOS_PATH = _obter_caminho_dados("ESPELHO_DOCUMENTOS_PATH", "documentos.sqlite")
+ESPELHO_SYNC_INTERVALO = float(os.getenv("ESPELHO_SYNC_INTERVALO", "60"))
+ESPELHO_RECONCILIAR_INTERVALO = float(os.getenv("ESPELHO_RECONCILIAR_INTERVALO", "600"))
+
+# Estado de conversa por chat (ação pendente, ações recentes, categorias usadas) em SQLite.
+# Uma ação aguardando "sim"/"não" vale por PENDENTE_VALIDADE segundos.
+ESTADO_CHATS_PATH = _obter_caminho_dados("ESTADO_CHATS_PATH", "estado_chats.sqlite")
+PENDENTE_VALIDADE = float(os.getenv("PENDENTE_VALIDADE", "600"))
+# Contexto recente: diário de ações compactado em instantâneo a cada CONTEXTO_COMPACTAR_EVENTOS eventos do chat;
+# o peso de cada categoria usada cai pela metade a cada CONTEXTO_MEIA_VIDA_DIAS dias (0 = sem decaimento).
+CONTEXTO_COMPACTAR_EVENTOS = max(1, int(os.getenv("CONTEXTO_COMPACTAR_EVENTOS", "50")))
+CONTEXTO_MEIA_VIDA_DIAS = float(os.getenv("CONTEXTO_MEIA_VIDA_DIAS", "30"))
+
+# Mensagens de voz: quantos áudios são decodificados (ffmpeg) e transcritos ao mesmo tempo; os demais esperam na fila.
+AUDIO_TRABALHADORES = int(os.getenv("AUDIO_TRABALHADORES", "2"))
@@ -0,0 +1,286 @@
+"""
+Réplica local (SQLite) dos documentos/ideias do backend.
+Leituras do bot (contagens do briefing, busca, resolução de id curto) consultam este
+arquivo em vez de baixar o vault inteiro. A busca usa um índice FTS5 (título, conteúdo, tags,
+interesse, área) com acentos removidos, prefixos, ranking BM25 e trechos destacados,
+mantido por triggers a cada upsert/remoção. A sincronização incremental (marca d'água por updatedAt)
+fica em obsidian_async.sincronizar_documentos; as escritas do próprio bot são aplicadas direto aqui.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import re
+import sqlite3
+import unicodedata
+import threading
+import time
+from pathlib import Path
+from typing import Iterable
+
+from assistant.config import ESPELHO_DOCUMENTOS_PATH
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documentos (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL DEFAULT '',
+    content TEXT NOT NULL DEFAULT '',
+    interest TEXT NOT NULL DEFAULT '',
+    area TEXT NOT NULL DEFAULT '',
+    tags TEXT NOT NULL DEFAULT '[]',
+    createdAt TEXT NOT NULL DEFAULT '',
+    updatedAt TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_documentos_createdAt ON documentos(createdAt);
+CREATE TABLE IF NOT EXISTS meta (
+    chave TEXT PRIMARY KEY,
+    valor TEXT NOT NULL
+);
+"""
+
+# Índice invertido sobre a tabela documentos (external content): os triggers o atualizam
+# incrementalmente; "remove_diacritics 2" faz 'ideia' casar com 'idéia' e 'lancar' com 'lançar'.
+_SCHEMA_FTS = """
+CREATE VIRTUAL TABLE documentos_fts USING fts5(
+    title, content, tags, interest, area,
+    content='documentos', content_rowid='rowid',
+    tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+);
+CREATE TRIGGER documentos_ai AFTER INSERT ON documentos BEGIN
+    INSERT INTO documentos_fts(rowid, title, content, tags, interest, area)
+    VALUES (new.rowid, new.title, new.content, new.tags, new.interest, new.area);
+END;
+CREATE TRIGGER documentos_ad AFTER DELETE ON documentos BEGIN
+    INSERT INTO documentos_fts(documentos_fts, rowid, title, content, tags, interest, area)
+    VALUES ('delete', old.rowid, old.title, old.content, old.tags, old.interest, old.area);
+END;
+CREATE TRIGGER documentos_au AFTER UPDATE ON documentos BEGIN
+    INSERT INTO documentos_fts(documentos_fts, rowid, title, content, tags, interest, area)
+    VALUES ('delete', old.rowid, old.title, old.content, old.tags, old.interest, old.area);
+    INSERT INTO documentos_fts(rowid, title, content, tags, interest, area)
+    VALUES (new.rowid, new.title, new.content, new.tags, new.interest, new.area);
+END;
+INSERT INTO documentos_fts(documentos_fts) VALUES ('rebuild');
+"""
+
+# Pesos BM25 por coluna (title, content, tags, interest, area): título pesa mais que o corpo.
+_PESOS_BM25 = (5.0, 1.0, 3.0, 2.0, 2.0)
+
+
+def _termos_busca(texto: str) -> list[str]:
+    """Tokeniza o texto da busca como o FTS: minúsculas, sem acentos, só palavras."""
+    sem_acento = unicodedata.normalize("NFKD", texto or "").encode("ascii", "ignore").decode()
+    return re.findall(r"\w+", sem_acento.lower())
+
+
+def _consulta_fts(termos: list[str], operador: str) -> str:
+    """Monta a expressão MATCH com prefixo em cada termo (aspas evitam a sintaxe do FTS5)."""
+    return f" {operador} ".join(f'"{t}"*' for t in termos)
+
+
+def _linha_para_doc(row: sqlite3.Row) -> dict:
+    doc = dict(row)
+    doc["tags"] = json.loads(doc.get("tags") or "[]")
+    return doc
+
+
+class EspelhoDocumentos:
+    """Tabela local de documentos + metadados de sincronização (marca d'água, horários)."""
+
+    def __init__(self, caminho: Path | str) -> None:
+        self.caminho = Path(caminho)
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.caminho), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        existe_fts = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'documentos_fts'"
+        ).fetchone()
+        if not existe_fts:
+            self._conn.executescript(_SCHEMA_FTS)
+        self._conn.commit()
+
+    # --- metadados ---
+
+    def _meta(self, chave: str, padrao: str = "") -> str:
+        row = self._conn.execute("SELECT valor FROM meta WHERE chave = ?", (chave,)).fetchone()
+        return row["valor"] if row else padrao
+
+    def _definir_meta(self, chave: str, valor: str) -> None:
+        self._conn.execute(
+            "INSERT INTO meta (chave, valor) VALUES (?, ?) ON CONFLICT(chave) DO UPDATE SET valor = excluded.valor",
+            (chave, valor),
+        )
+
+    def marca_dagua(self) -> str:
+        """Maior updatedAt já recebido do backend ('' se nunca sincronizado)."""
+        return self._meta("marca_dagua")
+
+    def segundos_desde(self, evento: str) -> float:
+        """Segundos desde a última 'sincronizacao' ou 'reconciliacao' (infinito se nunca houve)."""
+        valor = self._meta(evento)
+        return time.time() - float(valor) if valor else float("inf")
+
+    def sincronizado(self) -> bool:
+        """True se o espelho já recebeu ao menos uma sincronização do backend."""
+        return bool(self._meta("sincronizacao"))
+
+    # --- escrita ---
+
+    def _upsert(self, docs: Iterable[dict]) -> None:
+        self._conn.executemany(
+            """INSERT INTO documentos (id, title, content, interest, area, tags, createdAt, updatedAt)
+               VALUES (:id, :title, :content, :interest, :area, :tags, :createdAt, :updatedAt)
+               ON CONFLICT(id) DO UPDATE SET
+                 title = excluded.title, content = excluded.content, interest = excluded.interest,
+                 area = excluded.area, tags = excluded.tags, createdAt = excluded.createdAt,
+                 updatedAt = excluded.updatedAt""",
+            [
+                {
+                    "id": d["id"],
+                    "title": d.get("title") or "",
+                    "content": d.get("content") or "",
+                    "interest": d.get("interest") or "",
+                    "area": d.get("area") or "",
+                    "tags": json.dumps(d.get("tags") or [], ensure_ascii=False),
+                    "createdAt": d.get("createdAt") or "",
+                    "updatedAt": d.get("updatedAt") or d.get("createdAt") or "",
+                }
+                for d in docs
+                if d and d.get("id")
+            ],
+        )
+
+    def aplicar_sincronizacao(self, docs: list[dict], completo: bool) -> None:
+        """
+        Aplica o resultado de um GET /api/documents. Avança a marca d'água para o maior updatedAt.
+        completo=True: a lista é o vault inteiro, então documentos ausentes foram excluídos.
+        """
+        with self._lock, self._conn:
+            self._upsert(docs)
+            if completo:
+                self._reter_ids([d["id"] for d in docs if d.get("id")])
+                self._definir_meta("reconciliacao", str(time.time()))
+            marcas = [d.get("updatedAt") or d.get("createdAt") or "" for d in docs]
+            nova = max([self.marca_dagua(), *marcas])
+            if nova:
+                self._definir_meta("marca_dagua", nova)
+            self._definir_meta("sincronizacao", str(time.time()))
+
+    def reconciliar(self, ids: list[str]) -> None:
+        """Remove documentos locais que não existem mais no backend."""
+        with self._lock, self._conn:
+            self._reter_ids(ids)
+            self._definir_meta("reconciliacao", str(time.time()))
+
+    def _reter_ids(self, ids: list[str]) -> None:
+        self._conn.execute("CREATE TEMP TABLE IF NOT EXISTS _ids_validos (id TEXT PRIMARY KEY)")
+        self._conn.execute("DELETE FROM _ids_validos")
+        self._conn.executemany("INSERT OR IGNORE INTO _ids_validos (id) VALUES (?)", [(i,) for i in ids])
+        removidos = self._conn.execute(
+            "DELETE FROM documentos WHERE id NOT IN (SELECT id FROM _ids_validos)"
+        ).rowcount
+        if removidos:
+            logger.info("Espelho: %d documento(s) removido(s) na reconciliação", removidos)
+
+    def registrar(self, doc: dict) -> None:
+        """Aplica um documento criado/alterado pelo próprio bot (não mexe na marca d'água)."""
+        try:
+            with self._lock, self._conn:
+                self._upsert([doc])
+        except sqlite3.Error as e:
+            logger.warning("Espelho: falha ao registrar documento %s: %s", doc.get("id"), e)
+
+    def remover(self, doc_id: str) -> None:
+        """Remove um documento excluído pelo próprio bot."""
+        try:
+            with self._lock, self._conn:
+                self._conn.execute("DELETE FROM documentos WHERE id = ?", (doc_id,))
+        except sqlite3.Error as e:
+            logger.warning("Espelho: falha ao remover documento %s: %s", doc_id, e)
+
+    # --- leitura ---
+
+    def contar_desde(self, data_iso: str) -> int:
+        """Quantidade de documentos com createdAt >= data_iso (comparação de string ISO)."""
+        row = self._conn.execute(
+            "SELECT COUNT(*) AS n FROM documentos WHERE createdAt >= ?", (data_iso,)
+        ).fetchone()
+        return int(row["n"])
+
+    def obter(self, doc_id: str) -> dict | None:
+        row = self._conn.execute("SELECT * FROM documentos WHERE id = ?", (doc_id,)).fetchone()
+        return _linha_para_doc(row) if row else None
+
+    def resolver_id(self, id_ou_prefixo: str) -> str | None:
+        """Id completo a partir do id curto exibido pelo bot (8 caracteres). None se ambíguo ou ausente."""
+        prefixo = (id_ou_prefixo or "").strip()
+        if not prefixo:
+            return None
+        rows = self._conn.execute(
+            "SELECT id FROM documentos WHERE id >= ? AND id < ? LIMIT 2", (prefixo, prefixo + "\uffff")
+        ).fetchall()
+        return rows[0]["id"] if len(rows) == 1 else None
+
+    def buscar(
+        self,
+        termo: str = "",
+        interest: str = "",
+        area: str = "",
+        tag: str = "",
+        limite: int = 50,
+    ) -> list[dict]:
+        """
+        Busca full-text ranqueada (BM25) com os mesmos filtros de /api/documents/search.
+        Cada termo casa por prefixo e sem acentos; exige todos os termos e, se nada casar,
+        aceita qualquer um. Cada resultado traz "trecho" com os termos destacados em «».
+        """
+        filtros = ""
+        params_filtro: list[str] = []
+        if interest:
+            filtros += " AND d.interest LIKE ?"
+            params_filtro.append(f"%{interest}%")
+        if area:
+            filtros += " AND d.area LIKE ?"
+            params_filtro.append(f"%{area}%")
+        if tag:
+            filtros += " AND d.tags LIKE ?"
+            params_filtro.append(f'%"{tag}"%')
+
+        termos = _termos_busca(termo)
+        if not termos:
+            sql = f"SELECT d.* FROM documentos d WHERE 1=1{filtros} ORDER BY d.title LIMIT ?"
+            rows = self._conn.execute(sql, [*params_filtro, limite]).fetchall()
+            return [_linha_para_doc(r) for r in rows]
+
+        sql = f"""
+            SELECT d.*, bm25(documentos_fts, {', '.join(map(str, _PESOS_BM25))}) AS relevancia,
+                   snippet(documentos_fts, -1, '«', '»', '…', 12) AS trecho
+            FROM documentos_fts JOIN documentos d ON d.rowid = documentos_fts.rowid
+            WHERE documentos_fts MATCH ?{filtros}
+            ORDER BY relevancia LIMIT ?
+        """
+        for operador in ("AND", "OR") if len(termos) > 1 else ("AND",):
+            rows = self._conn.execute(sql, [_consulta_fts(termos, operador), *params_filtro, limite]).fetchall()
+            if rows:
+                return [_linha_para_doc(r) for r in rows]
+        return []
+
+
+_espelho: EspelhoDocumentos | None = None
+_espelho_lock = threading.Lock()
+
+
+def espelho() -> EspelhoDocumentos:
+    """Retorna o espelho compartilhado (abre o arquivo SQLite sob demanda)."""
+    global _espelho
+    if _espelho is None:
+        with _espelho_lock:
+            if _espelho is None:
+                _espelho = EspelhoDocumentos(ESPELHO_DOCUMENTOS_PATH)
+    return _espelho
@@ -0,0 +1,277 @@
+"""
+Estado de conversa por chat em SQLite (WAL). A ação pendente de confirmação (com validade) fica numa
+tabela com chave chat_id e é apagada ao ser lida vencida. O contexto recente (anel das últimas ações,
+última ideia salva e pesos das categorias usadas) é um agregado em memória mantido por um diário
+só de acréscimo: cada ação grava uma linha pequena em `eventos` e, a cada CONTEXTO_COMPACTAR_EVENTOS
+eventos do chat, o agregado vira um instantâneo e os eventos já cobertos são apagados. Ao abrir um
+chat pela primeira vez no processo, lê o instantâneo e reaplica só os eventos posteriores.
+Os pesos das categorias decaem exponencialmente (meia-vida CONTEXTO_MEIA_VIDA_DIAS), então
+"categorias frequentes" reflete os hábitos recentes sem reler o histórico.
+"""
+from __future__ import annotations
+
+import datetime as _dt
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+from assistant.config import (
+    CONTEXTO_COMPACTAR_EVENTOS,
+    CONTEXTO_MEIA_VIDA_DIAS,
+    ESTADO_CHATS_PATH,
+    PENDENTE_VALIDADE,
+)
+
+logger = logging.getLogger(__name__)
+
+# Tamanho do anel de ações recentes por chat
+ACOES_RECENTES = 5
+# Categorias cujo peso decaiu abaixo disto saem do agregado na compactação
+_PESO_MINIMO = 0.01
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS acoes_pendentes (
+    chat_id INTEGER PRIMARY KEY,
+    acao TEXT NOT NULL,
+    dados TEXT NOT NULL DEFAULT '{}',
+    expira_em REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS eventos (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    chat_id INTEGER NOT NULL,
+    em REAL NOT NULL,
+    acao TEXT NOT NULL,
+    ideia TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_eventos_chat ON eventos(chat_id, id);
+CREATE TABLE IF NOT EXISTS instantaneos (
+    chat_id INTEGER PRIMARY KEY,
+    ate_evento INTEGER NOT NULL,
+    contexto TEXT NOT NULL
+);
+"""
+
+
+def _iso(em: float) -> str:
+    """Epoch -> ISO em UTC sem fuso (formato dos timestamps do antigo memoria.json)."""
+    return _dt.datetime.fromtimestamp(em, _dt.timezone.utc).replace(tzinfo=None).isoformat()
+
+
+def _decair(peso: float, desde: float, ate: float) -> float:
+    if CONTEXTO_MEIA_VIDA_DIAS <= 0 or ate <= desde:
+        return peso
+    return peso * 0.5 ** ((ate - desde) / (CONTEXTO_MEIA_VIDA_DIAS * 86400))
+
+
+class _Contexto:
+    """Agregado do contexto recente de um chat (o que o prompt usa)."""
+
+    def __init__(self, contexto: dict | None = None, ate_evento: int = 0) -> None:
+        contexto = contexto or {}
+        self.ultima_ideia: dict = contexto.get("ultima_ideia") or {}
+        self.ultimas_acoes: deque[dict] = deque(contexto.get("ultimas_acoes") or [], maxlen=ACOES_RECENTES)
+        # categoria -> [peso, epoch em que o peso foi calculado]
+        self.categorias: dict[str, list[float]] = {c: list(p) for c, p in (contexto.get("categorias") or {}).items()}
+        self.ate_evento = ate_evento
+        self.pendentes = 0  # eventos do diário ainda fora do instantâneo
+
+    def aplicar(self, em: float, acao: str, ideia: dict | None) -> None:
+        self.ultimas_acoes.append({"acao": acao, "timestamp": _iso(em)})
+        if ideia is None:
+            return
+        self.ultima_ideia = {**ideia, "timestamp": _iso(em)}
+        if ideia.get("interesse") and ideia.get("area"):
+            self.somar(f"{ideia['interesse']} > {ideia['area']}", 1.0, em)
+
+    def somar(self, categoria: str, peso: float, em: float) -> None:
+        atual, desde = self.categorias.get(categoria, (0.0, em))
+        self.categorias[categoria] = [_decair(atual, desde, em) + peso, em]
+
+    def para_prompt(self, agora: float) -> dict:
+        """{"ultima_ideia", "ultimas_acoes", "categorias_frequentes"} (pesos decaídos até agora)."""
+        return {
+            "ultima_ideia": dict(self.ultima_ideia),
+            "ultimas_acoes": list(self.ultimas_acoes),
+            "categorias_frequentes": {
+                c: round(_decair(p, desde, agora), 3) for c, (p, desde) in self.categorias.items()
+            },
+        }
+
+    def instantaneo(self, agora: float) -> str:
+        categorias = {}
+        for c, (p, desde) in self.categorias.items():
+            p = _decair(p, desde, agora)
+            if p >= _PESO_MINIMO:
+                categorias[c] = [p, agora]
+        self.categorias = categorias
+        return json.dumps({
+            "ultima_ideia": self.ultima_ideia,
+            "ultimas_acoes": list(self.ultimas_acoes),
+            "categorias": categorias,
+        }, ensure_ascii=False)
+
+
+class EstadoChats:
+    """Tabelas de estado por chat_id + agregados de contexto em memória."""
+
+    def __init__(self, caminho: Path | str) -> None:
+        self.caminho = Path(caminho)
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._contextos: dict[int, _Contexto] = {}
+        self._conn = sqlite3.connect(str(self.caminho), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._migrar_tabelas_antigas()
+        self._conn.commit()
+
+    def _migrar_tabelas_antigas(self) -> None:
+        """Converte as tabelas chats/acoes_recentes/categorias_frequentes (contagens sem tempo) em instantâneos."""
+        existe = self._conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'chats'").fetchone()
+        if not existe:
+            return
+        agora = time.time()
+        contextos: dict[int, _Contexto] = {}
+        for chat in self._conn.execute("SELECT * FROM chats"):
+            ctx = contextos.setdefault(chat["chat_id"], _Contexto())
+            if chat["ultima_ideia_em"]:
+                ctx.ultima_ideia = {
+                    "interesse": chat["ultima_ideia_interesse"],
+                    "area": chat["ultima_ideia_area"],
+                    "titulo": chat["ultima_ideia_titulo"],
+                    "timestamp": chat["ultima_ideia_em"],
+                }
+        for r in self._conn.execute("SELECT chat_id, acao, timestamp FROM acoes_recentes ORDER BY chat_id, sequencia"):
+            contextos.setdefault(r["chat_id"], _Contexto()).ultimas_acoes.append(
+                {"acao": r["acao"], "timestamp": r["timestamp"]}
+            )
+        for r in self._conn.execute("SELECT chat_id, categoria, contagem FROM categorias_frequentes"):
+            contextos.setdefault(r["chat_id"], _Contexto()).somar(r["categoria"], float(r["contagem"]), agora)
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO instantaneos (chat_id, ate_evento, contexto) VALUES (?, 0, ?)",
+            [(chat_id, ctx.instantaneo(agora)) for chat_id, ctx in contextos.items()],
+        )
+        self._conn.executescript(
+            "DROP TABLE chats; DROP TABLE IF EXISTS acoes_recentes; DROP TABLE IF EXISTS categorias_frequentes;"
+        )
+        logger.info("Estado de %d chat(s) convertido para diário + instantâneo", len(contextos))
+
+    # --- ação pendente ---
+
+    def definir_pendente(self, chat_id: int, acao: str, dados: dict, validade: float = PENDENTE_VALIDADE) -> None:
+        with self._lock:
+            self._conn.execute(
+                """INSERT INTO acoes_pendentes (chat_id, acao, dados, expira_em) VALUES (?, ?, ?, ?)
+                   ON CONFLICT(chat_id) DO UPDATE SET
+                     acao = excluded.acao, dados = excluded.dados, expira_em = excluded.expira_em""",
+                (chat_id, acao, json.dumps(dados, ensure_ascii=False), time.time() + validade),
+            )
+            self._conn.commit()
+
+    def pendente(self, chat_id: int) -> dict | None:
+        """{"acao", "dados"} ainda válida do chat, ou None (a vencida é apagada)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT acao, dados, expira_em FROM acoes_pendentes WHERE chat_id = ?", (chat_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row["expira_em"] <= time.time():
+                self._conn.execute("DELETE FROM acoes_pendentes WHERE chat_id = ?", (chat_id,))
+                self._conn.commit()
+                return None
+        return {"acao": row["acao"], "dados": json.loads(row["dados"])}
+
+    def limpar_pendente(self, chat_id: int) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM acoes_pendentes WHERE chat_id = ?", (chat_id,))
+            self._conn.commit()
+
+    # --- contexto recente ---
+
+    def _contexto(self, chat_id: int) -> _Contexto:
+        """Agregado do chat; na primeira vez, instantâneo + eventos posteriores. Chamar com _lock."""
+        ctx = self._contextos.get(chat_id)
+        if ctx is not None:
+            return ctx
+        row = self._conn.execute(
+            "SELECT ate_evento, contexto FROM instantaneos WHERE chat_id = ?", (chat_id,)
+        ).fetchone()
+        ctx = _Contexto(json.loads(row["contexto"]), row["ate_evento"]) if row else _Contexto()
+        for ev in self._conn.execute(
+            "SELECT id, em, acao, ideia FROM eventos WHERE chat_id = ? AND id > ? ORDER BY id",
+            (chat_id, ctx.ate_evento),
+        ):
+            ctx.aplicar(ev["em"], ev["acao"], json.loads(ev["ideia"]) if ev["ideia"] else None)
+            ctx.ate_evento = ev["id"]
+            ctx.pendentes += 1
+        self._contextos[chat_id] = ctx
+        return ctx
+
+    def _compactar(self, chat_id: int, ctx: _Contexto) -> None:
+        """Grava o agregado como instantâneo e apaga os eventos que ele cobre. Chamar com _lock."""
+        self._conn.execute(
+            "INSERT OR REPLACE INTO instantaneos (chat_id, ate_evento, contexto) VALUES (?, ?, ?)",
+            (chat_id, ctx.ate_evento, ctx.instantaneo(time.time())),
+        )
+        self._conn.execute("DELETE FROM eventos WHERE chat_id = ? AND id <= ?", (chat_id, ctx.ate_evento))
+        ctx.pendentes = 0
+
+    def registrar_acao(self, chat_id: int, acao: str, ideia: dict | None = None) -> None:
+        """
+        Acrescenta a ação ao diário do chat e ao agregado; para ideias salvas, `ideia` é
+        {"interesse", "area", "titulo"} (última ideia + peso da categoria).
+        """
+        em = time.time()
+        with self._lock:
+            ctx = self._contexto(chat_id)
+            cur = self._conn.execute(
+                "INSERT INTO eventos (chat_id, em, acao, ideia) VALUES (?, ?, ?, ?)",
+                (chat_id, em, acao, json.dumps(ideia, ensure_ascii=False) if ideia is not None else None),
+            )
+            ctx.aplicar(em, acao, ideia)
+            ctx.ate_evento = cur.lastrowid
+            ctx.pendentes += 1
+            if ctx.pendentes >= CONTEXTO_COMPACTAR_EVENTOS:
+                self._compactar(chat_id, ctx)
+            self._conn.commit()
+
+    def contexto_recente(self, chat_id: int) -> dict:
+        """{"ultima_ideia", "ultimas_acoes", "categorias_frequentes"} do chat (mesmo formato do antigo JSON)."""
+        with self._lock:
+            return self._contexto(chat_id).para_prompt(time.time())
+
+    def importar_contexto(self, chat_id: int, contexto: dict) -> None:
+        """Carrega um contexto_recente do formato antigo (memoria.json, contagens sem tempo) no chat."""
+        agora = time.time()
+        with self._lock:
+            ctx = self._contexto(chat_id)
+            for item in (contexto.get("ultimas_acoes") or [])[-ACOES_RECENTES:]:
+                ctx.ultimas_acoes.append({"acao": item.get("acao", ""), "timestamp": item.get("timestamp", "")})
+            ui = contexto.get("ultima_ideia") or {}
+            if ui.get("timestamp"):
+                ctx.ultima_ideia = dict(ui)
+            for cat, n in (contexto.get("categorias_frequentes") or {}).items():
+                ctx.somar(cat, float(n), agora)
+            self._compactar(chat_id, ctx)
+            self._conn.commit()
+
+
+_estado: EstadoChats | None = None
+_estado_lock = threading.Lock()
+
+
+def estado_chats() -> EstadoChats:
+    """Retorna o estado compartilhado (abre o arquivo SQLite sob demanda)."""
+    global _estado
+    if _estado is None:
+        with _estado_lock:
+            if _estado is None:
+                _estado = EstadoChats(ESTADO_CHATS_PATH)
+    return _estado
@@ -0,0 +1,130 @@
+"""
+Extração de JSON da saída da LLM em uma única passada.
+Caminho rápido: json.loads direto. Senão, um scanner com balanceamento de chaves/colchetes
+acha o primeiro objeto de topo (ignorando markdown e texto ao redor), para ao fechá-lo e
+conserta no mesmo percurso os defeitos comuns de LLM. Devolve o valor e os reparos aplicados.
+"""
+from __future__ import annotations
+
+import json
+
+# Nomes dos reparos (aparecem nos logs e no benchmark)
+REPARO_VIRGULA_FALTANDO = "virgula_faltando"
+REPARO_VIRGULA_SOBRANDO = "virgula_sobrando"
+REPARO_ASPAS_CURVAS = "aspas_curvas"
+REPARO_CONTROLE_EM_STRING = "controle_em_string"
+REPARO_FECHAMENTO = "fechamento"
+
+_ASPAS_CURVAS_ABRE = "“"
+_ASPAS_CURVAS_FECHA = "”"
+_FIM_DE_VALOR = set('"}]0123456789el')  # último caractere de string, objeto, lista, número, true/false/null
+_INICIO_DE_VALOR = set('"{[-0123456789tfn') | {_ASPAS_CURVAS_ABRE, _ASPAS_CURVAS_FECHA}
+_ESCAPES_CONTROLE = {"\n": "\\n", "\r": "\\r", "\t": "\\t"}
+
+
+def extrair(texto: str) -> tuple[object, list[str]] | None:
+    """
+    (valor, reparos) do primeiro JSON do texto, ou None se não houver objeto aproveitável.
+    reparos é vazio quando o texto (ou o objeto dentro dele) já era JSON válido.
+    """
+    texto = (texto or "").strip()
+    if texto[:1] in ("{", "["):
+        try:
+            return json.loads(texto), []
+        except json.JSONDecodeError:
+            pass
+    inicio = texto.find("{")
+    if inicio < 0:
+        return None
+    bruto, reparos = _varrer(texto, inicio)
+    try:
+        return json.loads(bruto), reparos
+    except json.JSONDecodeError:
+        return None
+
+
+def _varrer(texto: str, inicio: int) -> tuple[str, list[str]]:
+    """
+    Copia o objeto que começa em `inicio` até fechar a chave de topo, reparando pelo caminho:
+    vírgula faltando entre valores separados por espaço/quebra de linha, vírgula antes de } ou ],
+    aspas curvas usadas como delimitador, quebras de linha/tab cruas dentro de strings e,
+    se o texto acabar antes (saída truncada), fecha string e estruturas abertas.
+    """
+    saida: list[str] = []
+    reparos: list[str] = []
+    pilha: list[str] = []
+    em_string = False
+    fecha_string = '"'  # delimitador que fecha a string atual (" ou aspas curvas)
+    escape = False
+    ultimo = ""  # último caractere significativo emitido fora de strings
+    pos_virgula = -1  # índice em `saida` da última vírgula emitida (para remover se sobrar)
+    espaco = False  # houve espaço em branco desde o último caractere significativo
+
+    def _reparo(nome: str) -> None:
+        if nome not in reparos:
+            reparos.append(nome)
+
+    for c in texto[inicio:]:
+        if em_string:
+            if escape:
+                escape = False
+                saida.append(c)
+            elif c == "\\":
+                escape = True
+                saida.append(c)
+            elif c == fecha_string:
+                em_string = False
+                ultimo = '"'
+                saida.append('"')
+            elif c in _ESCAPES_CONTROLE:
+                _reparo(REPARO_CONTROLE_EM_STRING)
+                saida.append(_ESCAPES_CONTROLE[c])
+            elif c == '"':
+                # Aspas retas dentro de string delimitada por aspas curvas
+                saida.append('\\"')
+            else:
+                saida.append(c)
+            continue
+
+        if c in " \t\r\n":
+            espaco = True
+            saida.append(c)
+            continue
+        if c in _INICIO_DE_VALOR and espaco and ultimo in _FIM_DE_VALOR and pilha:
+            _reparo(REPARO_VIRGULA_FALTANDO)
+            saida.append(",")
+        espaco = False
+
+        if c in (_ASPAS_CURVAS_ABRE, _ASPAS_CURVAS_FECHA):
+            _reparo(REPARO_ASPAS_CURVAS)
+            em_string, fecha_string = True, _ASPAS_CURVAS_FECHA
+            saida.append('"')
+            continue
+        if c == '"':
+            em_string, fecha_string = True, '"'
+            saida.append(c)
+            continue
+        if c in "{[":
+            pilha.append("}" if c == "{" else "]")
+        elif c in "}]":
+            if ultimo == ",":
+                _reparo(REPARO_VIRGULA_SOBRANDO)
+                del saida[pos_virgula]
+            if pilha:
+                pilha.pop()
+        elif c == ",":
+            pos_virgula = len(saida)
+        saida.append(c)
+        ultimo = c
+        if not pilha:
+            break
+    else:
+        # Texto acabou com estruturas abertas (saída cortada por limite de tokens)
+        if em_string:
+            saida.append('"')
+        elif ultimo == ",":
+            del saida[pos_virgula]
+        if em_string or pilha:
+            _reparo(REPARO_FECHAMENTO)
+        saida.extend(reversed(pilha))
+    return "".join(saida), reparos
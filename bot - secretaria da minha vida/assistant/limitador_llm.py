@@ -0,0 +1,133 @@
+"""
+Limitador das chamadas à OpenRouter: no máximo LLM_CONCORRENCIA pedidos em andamento e um balde de
+fichas (LLM_TAXA pedidos/s, rajadas de até LLM_RAJADA). Quem espera entra numa fila por prioridade
+da rota (0 = conversa, atendida antes de correção/refino). Em 429/503 o limitador pausa todos os
+pedidos pelo Retry-After (ou backoff) e corta a taxa pela metade; cada sucesso devolve 10% da taxa
+configurada. Espera na fila vai para a métrica "llm_fila:espera"; o estado atual aparece em /metricas.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import heapq
+import itertools
+import logging
+import time
+from typing import AsyncIterator
+
+from assistant import metricas
+from assistant.config import LLM_CONCORRENCIA, LLM_RAJADA, LLM_TAXA
+
+logger = logging.getLogger(__name__)
+
+# A taxa adaptativa nunca cai abaixo desta fração da configurada
+_FRACAO_TAXA_MINIMA = 0.1
+_FRACAO_RECUPERACAO = 0.1
+
+
+class Limitador:
+    """Semáforo com fila de prioridade + balde de fichas com taxa adaptativa (AIMD)."""
+
+    def __init__(self, concorrencia: int, taxa: float, rajada: int) -> None:
+        self.concorrencia = max(1, concorrencia)
+        self.taxa_configurada = taxa
+        self.taxa = taxa
+        self.rajada = max(1, rajada)
+        self._fichas = float(self.rajada)
+        self._ultima_reposicao = time.monotonic()
+        self._ativos = 0
+        self._fila: list[tuple[int, int, asyncio.Future]] = []
+        self._sequencia = itertools.count()
+        self._pausa_ate = 0.0
+        self._timer: asyncio.TimerHandle | None = None
+
+    def _repor_fichas(self, agora: float) -> None:
+        if self.taxa > 0:
+            decorrido = agora - self._ultima_reposicao
+            self._fichas = min(float(self.rajada), self._fichas + decorrido * self.taxa)
+        self._ultima_reposicao = agora
+
+    def _liberar_fila(self) -> None:
+        """Entrega vagas aos primeiros da fila enquanto houver vaga, ficha e nenhuma pausa."""
+        self._timer = None
+        agora = time.monotonic()
+        self._repor_fichas(agora)
+        while self._fila and self._ativos < self.concorrencia:
+            futuro = self._fila[0][2]
+            if futuro.done():  # desistiu (cancelado) enquanto esperava
+                heapq.heappop(self._fila)
+                continue
+            espera = self._pausa_ate - agora
+            if self.taxa > 0 and self._fichas < 1:
+                espera = max(espera, (1 - self._fichas) / self.taxa)
+            if espera > 0:
+                self._timer = asyncio.get_running_loop().call_later(espera, self._liberar_fila)
+                return
+            heapq.heappop(self._fila)
+            if self.taxa > 0:
+                self._fichas -= 1
+            self._ativos += 1
+            futuro.set_result(None)
+
+    async def entrar(self, prioridade: int) -> None:
+        """Espera uma vaga (menor prioridade primeiro; empate por ordem de chegada)."""
+        futuro = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._fila, (prioridade, next(self._sequencia), futuro))
+        metricas.registrar("llm_fila:profundidade", float(len(self._fila)))
+        if self._timer is not None:
+            self._timer.cancel()
+        self._liberar_fila()
+        try:
+            await futuro
+        except asyncio.CancelledError:
+            if futuro.done() and not futuro.cancelled():
+                self.sair()  # a vaga chegou junto com o cancelamento: devolve
+            raise
+
+    def sair(self) -> None:
+        self._ativos -= 1
+        if self._timer is not None:
+            self._timer.cancel()
+        self._liberar_fila()
+
+    @contextlib.asynccontextmanager
+    async def vaga(self, prioridade: int) -> AsyncIterator[None]:
+        inicio = time.perf_counter()
+        await self.entrar(prioridade)
+        metricas.registrar("llm_fila:espera", time.perf_counter() - inicio)
+        try:
+            yield
+        finally:
+            self.sair()
+
+    def penalizar(self, espera: float) -> None:
+        """429/503: pausa todos os pedidos por `espera` segundos e reduz a taxa à metade."""
+        self._pausa_ate = max(self._pausa_ate, time.monotonic() + espera)
+        if self.taxa_configurada > 0:
+            self.taxa = max(self.taxa_configurada * _FRACAO_TAXA_MINIMA, self.taxa / 2)
+        logger.warning("OpenRouter limitou os pedidos: pausa de %.1f s, taxa agora %.2f/s", espera, self.taxa)
+
+    def recuperar(self) -> None:
+        """Pedido bem-sucedido: a taxa volta aos poucos para a configurada."""
+        if self.taxa < self.taxa_configurada:
+            self.taxa = min(self.taxa_configurada, self.taxa + self.taxa_configurada * _FRACAO_RECUPERACAO)
+
+    def situacao(self) -> dict:
+        """{"na_fila", "em_andamento", "taxa", "pausa"} (pausa em segundos restantes)."""
+        return {
+            "na_fila": sum(not f.done() for _, _, f in self._fila),
+            "em_andamento": self._ativos,
+            "taxa": self.taxa,
+            "pausa": max(0.0, self._pausa_ate - time.monotonic()),
+        }
+
+
+_limitador: Limitador | None = None
+
+
+def limitador() -> Limitador:
+    """Limitador compartilhado por todas as chamadas assíncronas à LLM."""
+    global _limitador
+    if _limitador is None:
+        _limitador = Limitador(LLM_CONCORRENCIA, LLM_TAXA, LLM_RAJADA)
+    return _limitador
@@ -1,23 +1,36 @@
 """
 Integração com LLM via OpenRouter (API REST).
 Função genérica perguntar_llm retorna dict com titulo, tipo, resumo, tags.
+Todas as chamadas passam por um ClienteLLM compartilhado (pool keep-alive, retry e hooks de tempo).
 """
 import json
 import logging
 import re
+import threading
+import time
+from typing import Callable
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
+from assistant import json_llm, llm_cache, metricas, revisao_local, rotas_llm, taxonomia
 from assistant.config import (
     OPENROUTER_API_KEY,
     OPENROUTER_BASE_URL,
+    OPENROUTER_CONNECT_TIMEOUT,
     OPENROUTER_MODEL,
+    OPENROUTER_POOL_SIZE,
+    OPENROUTER_RETRIES,
     OPENROUTER_TIMEOUT,
+    PROMPT_ORCAMENTO_TOKENS,
+    TAXONOMIA_PROMPT_TOP_K,
 )
+from assistant.prompt import ConstrutorPrompt
 
 logger = logging.getLogger(__name__)
 
-PROMPT_SISTEMA = """Você é a secretária pessoal do usuário: organiza ideias e pensamentos no Second Brain (Obsidian) e no planejamento. Seja extremamente inteligente ao interpretar as intenções do usuário e verifique cuidadosamente os dados antes de sugerir uma ação.
+PROMPT_SISTEMA_BASE = """Você é a secretária pessoal do usuário: organiza ideias e pensamentos no Second Brain (Obsidian) e no planejamento. Seja extremamente inteligente ao interpretar as intenções do usuário e verifique cuidadosamente os dados antes de sugerir uma ação.
 
 ⚠️ REGRAS CRÍTICAS DE INTERPRETAÇÃO (LEIA ANTES DE TUDO):
 1. Se o usuário PERGUNTAR sobre tarefas/projetos empresariais ("quais são", "o que tenho", "me mostre", "liste", "ver", "tenho registrado", "cadastrado"): use OBRIGATORIAMENTE acao="listar_planejamentos_empresariais".
@@ -67,34 +80,46 @@ Regra OBRIGATÓRIA ao salvar ideia (acao salvar_ideia):
 1) Primeiro escolha um INTERESSE da lista que faça sentido para a ideia. PREFIRA SEMPRE um interesse já existente na lista.
 2) Depois escolha uma ÁREA que pertença a esse interesse.
 3) SEMPRE preencha "interest" e "area" em dados. Use APENAS interesses e áreas que existam na lista.
-4) Se o usuário disser "anotar em X > Y" ou "salvar em X > Y": verifique na lista de INTERESSES existentes.
-
-Exemplos de CONSULTAS (sempre listar, nunca criar):
-Exemplo "quais são minhas tarefas empresariais": {"resposta": "Buscando planejamentos empresariais...", "acao": "listar_planejamentos_empresariais", "dados": {}}
-Exemplo "o que tenho no planejamento empresarial": {"resposta": "Buscando planejamentos empresariais...", "acao": "listar_planejamentos_empresariais", "dados": {}}
-Exemplo "me mostre os projetos empresariais cadastrados": {"resposta": "Buscando planejamentos empresariais...", "acao": "listar_planejamentos_empresariais", "dados": {}}
-Exemplo "quais são os meus planejamentos pessoais": {"resposta": "Buscando planejamentos pessoais...", "acao": "listar_planejamentos_pessoais", "dados": {}}
-Exemplo "o que tenho no planejamento pessoal": {"resposta": "Buscando planejamentos pessoais...", "acao": "listar_planejamentos_pessoais", "dados": {}}
-Exemplo "quais são as categorias existentes": {"resposta": "Verificando suas categorias...", "acao": "listar_categorias", "dados": {}}
-Exemplo para listar lembretes existentes: {"resposta": "Buscando lembretes.", "acao": "listar_lembretes_ativos", "dados": {}}
-
-Exemplos de CRIAÇÕES:
-Exemplo para um "oi": {"resposta": "Oi! Em que posso ajudar?", "acao": "responder", "dados": null}
-Exemplo para guardar ideia genérica: {"resposta": "Anotado em Pessoal > Inbox.", "acao": "salvar_ideia", "dados": {"titulo": "Título", "resumo": "Texto", "tags": [], "interest": "Pessoal", "area": "Inbox"}}
-Exemplo para "registre na area instagram que preciso lançar um vídeo": {"resposta": "Ideia registrada.", "acao": "salvar_ideia", "dados": {"titulo": "Lançar vídeo", "resumo": "Preciso lançar um vídeo", "tags": [], "interest": "Redes Sociais", "area": "Instagram"}}
-Exemplo para "salve na area naxtool que tenho que terminar o app": {"resposta": "Ideia salva.", "acao": "salvar_ideia", "dados": {"titulo": "Terminar o app", "resumo": "Tenho que terminar o app", "tags": [], "interest": "Naxtool", "area": "Sistemas"}}
-Exemplo para criar LEMBRETE (so com palavras explicitas): {"resposta": "Lembrete criado.", "acao": "criar_lembrete", "dados": {"titulo": "Comprar presente", "firstDueAt": "2024-01-01T10:00:00-03:00", "recurrence": "once"}}
-Exemplo para tarefa no planejamento pessoal: {"resposta": "Tarefa adicionada.", "acao": "criar_tarefa_planejamento_pessoal", "dados": {"titulo": "Comprar presente", "status": "todo", "priority": "medium"}}
-Exemplo para editar planejamento: {"resposta": "Atualizando tarefa.", "acao": "atualizar_planejamento", "dados": {"id": "uuid", "priority": "high"}}
-Exemplo para editar lembrete: {"resposta": "Lembrete alterado.", "acao": "atualizar_lembrete", "dados": {"id": "uuid", "titulo": "Novo título"}}
-Exemplo quando pede "quais meus lembretes pendentes", "me avise dos lembretes": {"resposta": "Verificando lembretes vencidos.", "acao": "lançar_lembretes", "dados": {}}
-Exemplo para excluir ideia: {"resposta": "Vou excluir essa ideia.", "acao": "excluir_ideia", "dados": {"id": "uuid", "titulo": "Título da ideia"}}
-Exemplo para excluir tarefa empresarial: {"resposta": "Vou excluir essa tarefa.", "acao": "excluir_tarefa_empresarial", "dados": {"id": "uuid", "titulo": "Título da tarefa"}}
-Exemplo para excluir tarefa pessoal: {"resposta": "Vou excluir essa tarefa.", "acao": "excluir_tarefa_pessoal", "dados": {"id": "uuid", "titulo": "Título da tarefa"}}
-Exemplo para excluir lembrete: {"resposta": "Vou excluir esse lembrete.", "acao": "excluir_lembrete", "dados": {"id": "uuid", "titulo": "Título do lembrete"}}
-Exemplo para criar tarefa diária: {"resposta": "Tarefa de hoje adicionada.", "acao": "criar_tarefa_diaria", "dados": {"titulo": "Revisar e-mails"}}
-Exemplo para listar tarefas de hoje: {"resposta": "Suas tarefas de hoje:", "acao": "listar_tarefas_diarias", "dados": {}}
-Exemplo para concluir tarefa diária: {"resposta": "Tarefa marcada como concluída.", "acao": "concluir_tarefa_diaria", "dados": {"id": "uuid"}}"""
+4) Se o usuário disser "anotar em X > Y" ou "salvar em X > Y": verifique na lista de INTERESSES existentes."""
+
+# Exemplos (few-shot) do prompt de conversa, marcados pela família de intenção a que servem.
+# O construtor de prompt (assistant.prompt) envia só os da família prevista para a mensagem.
+EXEMPLOS_CONSULTAS = [
+    ("planejamento", '''Exemplo "quais são minhas tarefas empresariais": {"resposta": "Buscando planejamentos empresariais...", "acao": "listar_planejamentos_empresariais", "dados": {}}'''),
+    ("planejamento", '''Exemplo "o que tenho no planejamento empresarial": {"resposta": "Buscando planejamentos empresariais...", "acao": "listar_planejamentos_empresariais", "dados": {}}'''),
+    ("planejamento", '''Exemplo "me mostre os projetos empresariais cadastrados": {"resposta": "Buscando planejamentos empresariais...", "acao": "listar_planejamentos_empresariais", "dados": {}}'''),
+    ("planejamento", '''Exemplo "quais são os meus planejamentos pessoais": {"resposta": "Buscando planejamentos pessoais...", "acao": "listar_planejamentos_pessoais", "dados": {}}'''),
+    ("planejamento", '''Exemplo "o que tenho no planejamento pessoal": {"resposta": "Buscando planejamentos pessoais...", "acao": "listar_planejamentos_pessoais", "dados": {}}'''),
+    ("categorias", '''Exemplo "quais são as categorias existentes": {"resposta": "Verificando suas categorias...", "acao": "listar_categorias", "dados": {}}'''),
+    ("lembrete", '''Exemplo para listar lembretes existentes: {"resposta": "Buscando lembretes.", "acao": "listar_lembretes_ativos", "dados": {}}'''),
+]
+EXEMPLOS_CRIACOES = [
+    ("conversa", '''Exemplo para um "oi": {"resposta": "Oi! Em que posso ajudar?", "acao": "responder", "dados": null}'''),
+    ("ideia", '''Exemplo para guardar ideia genérica: {"resposta": "Anotado em Pessoal > Inbox.", "acao": "salvar_ideia", "dados": {"titulo": "Título", "resumo": "Texto", "tags": [], "interest": "Pessoal", "area": "Inbox"}}'''),
+    ("ideia", '''Exemplo para "registre na area instagram que preciso lançar um vídeo": {"resposta": "Ideia registrada.", "acao": "salvar_ideia", "dados": {"titulo": "Lançar vídeo", "resumo": "Preciso lançar um vídeo", "tags": [], "interest": "Redes Sociais", "area": "Instagram"}}'''),
+    ("ideia", '''Exemplo para "salve na area naxtool que tenho que terminar o app": {"resposta": "Ideia salva.", "acao": "salvar_ideia", "dados": {"titulo": "Terminar o app", "resumo": "Tenho que terminar o app", "tags": [], "interest": "Naxtool", "area": "Sistemas"}}'''),
+    ("lembrete", '''Exemplo para criar LEMBRETE (so com palavras explicitas): {"resposta": "Lembrete criado.", "acao": "criar_lembrete", "dados": {"titulo": "Comprar presente", "firstDueAt": "2024-01-01T10:00:00-03:00", "recurrence": "once"}}'''),
+    ("planejamento", '''Exemplo para tarefa no planejamento pessoal: {"resposta": "Tarefa adicionada.", "acao": "criar_tarefa_planejamento_pessoal", "dados": {"titulo": "Comprar presente", "status": "todo", "priority": "medium"}}'''),
+    ("planejamento", '''Exemplo para editar planejamento: {"resposta": "Atualizando tarefa.", "acao": "atualizar_planejamento", "dados": {"id": "uuid", "priority": "high"}}'''),
+    ("lembrete", '''Exemplo para editar lembrete: {"resposta": "Lembrete alterado.", "acao": "atualizar_lembrete", "dados": {"id": "uuid", "titulo": "Novo título"}}'''),
+    ("lembrete", '''Exemplo quando pede "quais meus lembretes pendentes", "me avise dos lembretes": {"resposta": "Verificando lembretes vencidos.", "acao": "lançar_lembretes", "dados": {}}'''),
+    ("exclusao", '''Exemplo para excluir ideia: {"resposta": "Vou excluir essa ideia.", "acao": "excluir_ideia", "dados": {"id": "uuid", "titulo": "Título da ideia"}}'''),
+    ("exclusao", '''Exemplo para excluir tarefa empresarial: {"resposta": "Vou excluir essa tarefa.", "acao": "excluir_tarefa_empresarial", "dados": {"id": "uuid", "titulo": "Título da tarefa"}}'''),
+    ("exclusao", '''Exemplo para excluir tarefa pessoal: {"resposta": "Vou excluir essa tarefa.", "acao": "excluir_tarefa_pessoal", "dados": {"id": "uuid", "titulo": "Título da tarefa"}}'''),
+    ("exclusao", '''Exemplo para excluir lembrete: {"resposta": "Vou excluir esse lembrete.", "acao": "excluir_lembrete", "dados": {"id": "uuid", "titulo": "Título do lembrete"}}'''),
+    ("tarefa_diaria", '''Exemplo para criar tarefa diária: {"resposta": "Tarefa de hoje adicionada.", "acao": "criar_tarefa_diaria", "dados": {"titulo": "Revisar e-mails"}}'''),
+    ("tarefa_diaria", '''Exemplo para listar tarefas de hoje: {"resposta": "Suas tarefas de hoje:", "acao": "listar_tarefas_diarias", "dados": {}}'''),
+    ("tarefa_diaria", '''Exemplo para concluir tarefa diária: {"resposta": "Tarefa marcada como concluída.", "acao": "concluir_tarefa_diaria", "dados": {"id": "uuid"}}'''),
+]
+
+# Prompt completo (todas as regras e todos os exemplos), usado quando não há orçamento de tokens.
+PROMPT_SISTEMA = (
+    PROMPT_SISTEMA_BASE
+    + "\n\nExemplos de CONSULTAS (sempre listar, nunca criar):\n"
+    + "\n".join(linha for _, linha in EXEMPLOS_CONSULTAS)
+    + "\n\nExemplos de CRIAÇÕES:\n"
+    + "\n".join(linha for _, linha in EXEMPLOS_CRIACOES)
+)
 # Prompt separado para refino antes de salvar.
 PROMPT_REFINO_IDEIA = """Você vai refinar um texto de ideia ANTES de ser salvo.
 
@@ -128,6 +153,16 @@ Retorne SOMENTE um JSON válido:
 - resumo: versão corrigida do resumo/descrição; se não houver resumo, use string vazia "".
 """
 
+# Pipeline de chamada única (PIPELINE_IDEIA=unica): a mesma resposta que classifica a ideia já traz
+# o texto refinado, dispensando a chamada de refino (PROMPT_REFINO_IDEIA).
+PROMPT_SALVAR_IDEIA_UNICA = """Quando acao for "salvar_ideia", a ideia será salva sem nenhuma outra revisão. Por isso, em "dados", além de interest/area/tags:
+- "titulo": título curto e claro (até 80 caracteres), já corrigido.
+- "descricao": 1–2 frases com o essencial da ideia.
+- "corpo": o texto da ideia com gramática, concordância, ortografia e pontuação (pt-BR) corrigidas, sem mudar o significado.
+- Não invente fatos; mantenha termos técnicos, nomes próprios e siglas.
+- "interest" e "area" com os nomes EXATOS da lista acima; a área deve pertencer ao interesse.
+Exemplo: {"resposta": "Ideia salva.", "acao": "salvar_ideia", "dados": {"titulo": "Lançar vídeo", "descricao": "Lançar um vídeo novo no Instagram.", "corpo": "Preciso lançar um vídeo no Instagram.", "resumo": "Preciso lançar um vídeo", "tags": [], "interest": "Redes Sociais", "area": "Instagram"}}"""
+
 # Fallback quando o parse do JSON falha
 FALLBACK_DADOS = {
     "titulo": "",
@@ -158,46 +193,295 @@ def _formatar_contexto_memoria(contexto: dict) -> str:
     return " | ".join(partes) if partes else ""
 
 
-def _reparar_json_trailing_comma(raw: str) -> str:
+def _extrair_json(texto: str) -> dict | list | None:
     """
-    Corrige JSON com vírgula faltando entre propriedades (erro comum de LLMs).
-    Ex.: "resposta": "texto"\n  "arquivar": false -> insere vírgula após o valor.
+    Extrai o JSON da resposta da LLM (pode vir com markdown ou texto ao redor), reparando
+    vírgulas, aspas curvas e quebras de linha em strings numa única passada (json_llm).
     """
-    # Valor string terminando com " (não escapada) seguido de \n e nova chave "
-    raw = re.sub(r'(?<!\\)"\s*\n(\s*")', r'",\n\1', raw)
-    # Valor número ou keyword (true/false/null) seguido de \n e nova chave "
-    raw = re.sub(r'(\d|true|false|null)\s*\n(\s*")', r'\1,\n\2', raw)
-    return raw
+    extraido = json_llm.extrair(texto)
+    if extraido is None:
+        return None
+    valor, reparos = extraido
+    if reparos:
+        logger.info("JSON da LLM reparado: %s", ", ".join(reparos))
+    return valor
 
 
-def _extrair_json(texto: str) -> dict | None:
+# Status em que vale tentar de novo (limite de taxa e falhas transitórias do provedor)
+_STATUS_RETRY = (429, 500, 502, 503, 504)
+
+
+class ClienteLLM:
     """
-    Tenta extrair um objeto JSON do texto (pode vir com markdown ou texto ao redor).
-    Aplica reparo de vírgulas faltando antes de fazer parse.
+    Sessão HTTP compartilhada com a OpenRouter: pool de conexões keep-alive,
+    headers definidos uma única vez, política única de retry, cache de respostas
+    (llm_cache) e hooks chamados ao fim de cada chamada (ver adicionar_hook).
     """
-    texto = texto.strip()
-    # Remove blocos de código markdown
-    match = re.search(r"```(?:json)?\s*([\s\S]*?)\s*```", texto)
-    if match:
-        texto = match.group(1).strip()
-    # Tenta encontrar {...}
-    match = re.search(r"\{[\s\S]*\}", texto)
-    if match:
-        raw = match.group(0)
+
+    def __init__(
+        self,
+        pool_size: int = OPENROUTER_POOL_SIZE,
+        connect_timeout: float = OPENROUTER_CONNECT_TIMEOUT,
+        read_timeout: float = OPENROUTER_TIMEOUT,
+        tentativas: int = OPENROUTER_RETRIES,
+    ) -> None:
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Authorization": f"Bearer {OPENROUTER_API_KEY}",
+            "Content-Type": "application/json",
+        })
+        retry = Retry(
+            total=tentativas,
+            backoff_factor=0.5,
+            status_forcelist=_STATUS_RETRY,
+            allowed_methods=frozenset({"POST"}),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def completar(self, system: str, user: str, tarefa: str = "") -> str | None:
+        """
+        Envia (system, user) ao modelo e devolve o content da primeira choice,
+        ou None se a resposta vier sem choices. Erros de rede/HTTP/JSON são propagados.
+        Respostas de tarefas cacheáveis vêm do llm_cache quando possível.
+        """
+        rota = rotas_llm.rota(tarefa)
+        cacheado = llm_cache.cache().obter(tarefa, system, user, rota["modelo"])
+        if cacheado is not None:
+            notificar(tarefa, 0.0, cache=True)
+            return cacheado
+        inicio = time.perf_counter()
+        erro: Exception | None = None
+        uso: dict | None = None
         try:
-            return json.loads(raw)
-        except json.JSONDecodeError:
-            try:
-                return json.loads(_reparar_json_trailing_comma(raw))
-            except json.JSONDecodeError:
-                pass
-    try:
-        return json.loads(texto)
-    except json.JSONDecodeError:
+            resp = self.session.post(
+                OPENROUTER_BASE_URL,
+                json=_payload(system, user, rota["modelo"], rota["max_tokens"]),
+                timeout=self.timeout,
+            )
+            resp.raise_for_status()
+            body = resp.json()
+            uso = body.get("usage")
+            content = _conteudo_resposta(body)
+            _guardar_em_cache(tarefa, system, user, content, rota["modelo"])
+            return content
+        except (requests.RequestException, json.JSONDecodeError) as e:
+            erro = e
+            raise
+        finally:
+            notificar(tarefa, time.perf_counter() - inicio, erro, uso=uso, modelo=rota["modelo"])
+
+    def close(self) -> None:
+        self.session.close()
+
+
+def _payload(system: str, user: str, modelo: str = OPENROUTER_MODEL, max_tokens: int = 0) -> dict:
+    payload = {
+        "model": modelo,
+        "messages": [
+            {"role": "system", "content": system},
+            {"role": "user", "content": user},
+        ],
+    }
+    if max_tokens:
+        payload["max_tokens"] = max_tokens
+    return payload
+
+
+def _conteudo_resposta(body: dict) -> str | None:
+    """Texto da primeira choice de uma resposta chat/completions (None se não houver choices)."""
+    choices = body.get("choices") or []
+    if not choices:
+        return None
+    return (choices[0].get("message") or {}).get("content") or ""
+
+
+# Ações cuja resposta depende do momento da mensagem ("amanhã às 9h"): nunca reaproveitar
+_ACOES_NAO_CACHEAVEIS = ("criar_lembrete", "atualizar_lembrete")
+
+
+def _guardar_em_cache(tarefa: str, system: str, user: str, content: str | None, modelo: str) -> None:
+    """
+    Guarda só respostas que parseiam como JSON (e, na conversa, sem datas relativas), sob o
+    modelo que respondeu.
+    """
+    parsed = _extrair_json(content) if content else None
+    if isinstance(parsed, list):
+        parsed = parsed[0] if parsed else None
+    if not isinstance(parsed, dict):
+        return
+    if tarefa == "perguntar_llm" and _normalizar_resposta(parsed)["acao"] in _ACOES_NAO_CACHEAVEIS:
+        return
+    llm_cache.cache().guardar(tarefa, system, user, content, modelo)
+
+
+def _registrar_duracao(evento: dict) -> None:
+    if evento["primeiro_token"] is not None:
+        metricas.registrar("llm_primeiro_token", evento["primeiro_token"])
+    if evento["ok"] and not evento["cache"]:
+        metricas.registrar(f"llm_{evento['tarefa'] or 'outra'}", evento["duracao"])
+    logger.debug(
+        "LLM %s: %.0f ms%s",
+        evento["tarefa"] or "-",
+        evento["duracao"] * 1000,
+        " (cache)" if evento["cache"] else "" if evento["ok"] else f" (falhou: {evento['erro']})",
+    )
+
+
+# Hooks chamados ao fim de cada chamada à LLM (cliente síncrono e llm_async)
+_hooks: list[Callable[[dict], None]] = [_registrar_duracao]
+
+
+def adicionar_hook(hook: Callable[[dict], None]) -> None:
+    """Registra hook(evento) chamado após cada chamada (campos descritos em notificar)."""
+    _hooks.append(hook)
+
+
+def notificar(
+    tarefa: str,
+    duracao: float,
+    erro: Exception | None = None,
+    cache: bool = False,
+    uso: dict | None = None,
+    primeiro_token: float | None = None,
+    modelo: str | None = None,
+) -> None:
+    """
+    uso: campo "usage" da resposta (prompt_tokens, completion_tokens), quando o provedor informa.
+    primeiro_token: segundos até o primeiro trecho de texto (só em chamadas com streaming).
+    modelo: modelo que deu a resposta (pode ser um reserva, no llm_async).
+    """
+    evento = {
+        "tarefa": tarefa,
+        "duracao": duracao,
+        "ok": erro is None,
+        "erro": erro,
+        "cache": cache,
+        "uso": uso,
+        "primeiro_token": primeiro_token,
+        "modelo": modelo,
+    }
+    for hook in _hooks:
         try:
-            return json.loads(_reparar_json_trailing_comma(texto))
-        except json.JSONDecodeError:
-            return None
+            hook(evento)
+        except Exception:
+            logger.exception("Hook do cliente LLM falhou")
+
+
+_cliente: ClienteLLM | None = None
+_cliente_lock = threading.Lock()
+
+
+def cliente() -> ClienteLLM:
+    """Retorna o cliente LLM compartilhado (criado sob demanda)."""
+    global _cliente
+    if _cliente is None:
+        with _cliente_lock:
+            if _cliente is None:
+                _cliente = ClienteLLM()
+    return _cliente
+
+
+def fechar_cliente() -> None:
+    """Fecha as conexões do pool (usado no encerramento do bot)."""
+    global _cliente
+    with _cliente_lock:
+        if _cliente is not None:
+            _cliente.close()
+            _cliente = None
+
+
+def _pedir_json(tarefa: str, system: str, user: str, descricao_erro: str) -> dict | None:
+    """
+    Chamada auxiliar para as tarefas que esperam um objeto JSON e toleram falha:
+    retorna o dict extraído ou None (falhas são só registradas em log).
+    """
+    try:
+        content = cliente().completar(system, user, tarefa=tarefa)
+    except requests.RequestException as e:
+        logger.warning("Falha ao %s (request): %s", descricao_erro, e)
+        return None
+    except json.JSONDecodeError as e:
+        logger.warning("Falha ao %s (json): %s", descricao_erro, e)
+        return None
+    return _json_objeto(content)
+
+
+class ExtratorResposta:
+    """
+    Extrai de forma incremental o valor do campo "resposta" de um JSON que chega em pedaços
+    (streaming). `texto` cresce à medida que os trechos chegam; `completa` fica True quando a
+    aspa de fechamento da string é vista. O resto do JSON (acao/dados) é ignorado aqui.
+    """
+
+    _INICIO = re.compile(r'"resposta"\s*:\s*"')
+    _ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f"}
+
+    def __init__(self) -> None:
+        self._buffer = ""
+        self._i: int | None = None
+        self._partes: list[str] = []
+        self.completa = False
+
+    @property
+    def texto(self) -> str:
+        return "".join(self._partes)
+
+    def alimentar(self, trecho: str) -> bool:
+        """Consome mais um trecho; retorna True se `texto` cresceu ou acabou de ficar completo."""
+        self._buffer += trecho
+        if self.completa:
+            return False
+        if self._i is None:
+            m = self._INICIO.search(self._buffer)
+            if not m:
+                return False
+            self._i = m.end()
+        buf, i, antes = self._buffer, self._i, len(self._partes)
+        inicio_literal = i
+        while i < len(buf):
+            c = buf[i]
+            if c == "\\":
+                if i + 1 >= len(buf):
+                    break
+                esc = buf[i + 1]
+                if esc == "u":
+                    if i + 6 > len(buf):
+                        break
+                    try:
+                        char = chr(int(buf[i + 2:i + 6], 16))
+                    except ValueError:
+                        char = ""
+                    tamanho = 6
+                else:
+                    char, tamanho = self._ESCAPES.get(esc, esc), 2
+                self._partes.append(buf[inicio_literal:i])
+                self._partes.append(char)
+                i += tamanho
+                inicio_literal = i
+            elif c == '"':
+                self._partes.append(buf[inicio_literal:i])
+                self.completa = True
+                i += 1
+                inicio_literal = i
+                break
+            else:
+                i += 1
+        if not self.completa:
+            self._partes.append(buf[inicio_literal:i])
+        self._i = i
+        return self.completa or any(self._partes[antes:])
+
+
+def _json_objeto(content: str | None) -> dict | None:
+    if content is None:
+        return None
+    parsed = _extrair_json(content)
+    return parsed if isinstance(parsed, dict) else None
 
 
 TIPOS_PERMITIDOS = ("ideia", "tarefa", "projeto", "lembrete")
@@ -232,6 +516,11 @@ def _normalizar_resposta(dados: dict) -> dict:
             "interest": interest,
             "area": area,
         }
+        # Pipeline de chamada única: texto já refinado na mesma resposta
+        if inner.get("descricao"):
+            refinado = _ideia_refinada(inner, titulo, resumo)
+            if refinado:
+                payload["refinado"] = refinado
     else:
         payload = dados.get("dados") if isinstance(dados.get("dados"), dict) else None
 
@@ -253,6 +542,55 @@ def _formatar_interesses_areas(interesses: list, areas: list) -> str:
     )
 
 
+# Máximo de interesses citados na lista compacta de "outros" (o resto vira "e mais N")
+_MAX_OUTROS_INTERESSES = 40
+
+
+def _formatar_taxonomia_prompt(
+    tax: taxonomia.Taxonomia, texto: str, contexto_memoria: dict | None, limite: int = TAXONOMIA_PROMPT_TOP_K
+) -> str:
+    """
+    Seção de interesses/áreas do prompt da conversa. Taxonomias pequenas (até `limite` áreas) vão
+    inteiras; acima disso, só as `limite` áreas mais relevantes para a mensagem, agrupadas por
+    interesse, e uma lista compacta dos demais interesses. O tamanho não cresce com a taxonomia.
+    """
+    if len(tax.areas) <= limite:
+        hierarquia = _formatar_interesses_areas(tax.interesses, tax.areas)
+        if not hierarquia:
+            return ""
+        return f"{hierarquia}\nUse APENAS nomes de interesse e área que existam acima. Não crie nem sugira novos interesses ou áreas."
+    frequentes = ((contexto_memoria or {}).get("contexto_recente") or {}).get("categorias_frequentes")
+    grupos: dict[str, list[str]] = {}
+    for a in tax.ranquear_areas(texto, frequentes, limite):
+        grupos.setdefault(a["interestId"], []).append(a["name"])
+    lines = [
+        f"- INTERESSE «{tax.interesse_por_id[i]['name']}» → ÁREAS: {', '.join(nomes)}"
+        for i, nomes in grupos.items()
+    ]
+    outros = [
+        f"{i['name']} ({len(tax.areas_do_interesse(i['id']))} áreas)"
+        for i in tax.interesses
+        if i.get("id") not in grupos
+    ]
+    partes = [
+        "INTERESSES (categoria pai) e ÁREAS (subcategoria) mais prováveis para esta mensagem "
+        f"(de {len(tax.areas)} áreas cadastradas):",
+        "\n".join(lines) if lines else "- (nenhuma área parecida com a mensagem)",
+    ]
+    if outros:
+        resto = len(outros) - _MAX_OUTROS_INTERESSES
+        partes.append(
+            "Outros interesses (áreas não listadas): " + ", ".join(outros[:_MAX_OUTROS_INTERESSES])
+            + (f" e mais {resto}" if resto > 0 else "")
+        )
+    partes.append(
+        "Prefira as áreas listadas. Se o usuário citar outra área, use o nome exatamente como ele disse "
+        "e o interesse dela; o bot confere o par com a lista completa. "
+        "Não crie nem sugira novos interesses ou áreas."
+    )
+    return "\n".join(partes)
+
+
 PROMPT_ESCOLHER_PAR_FALLBACK = """O usuário quer salvar uma ideia, mas o par (interesse, área) que foi sugerido não existe na lista cadastrada.
 
 Sua tarefa: escolher exatamente UM interesse e UMA área da lista abaixo que façam mais sentido para classificar essa ideia.
@@ -276,54 +614,37 @@ def escolher_par_interesse_area_fallback(
     Quando a busca por (interesse, área) falhou, pergunta à LLM qual par da lista
     real faz mais sentido para a ideia. Retorna {"interest": str, "area": str} ou None.
     """
+    user = _mensagem_escolher_par(titulo, texto_ideia, interest_sugerido, area_sugerida, interesses, areas)
+    if user is None:
+        return None
+    parsed = _pedir_json("escolher_par", PROMPT_ESCOLHER_PAR_FALLBACK, user, "pedir par interesse/área (fallback)")
+    return _par_escolhido(parsed)
+
+
+def _mensagem_escolher_par(
+    titulo: str,
+    texto_ideia: str,
+    interest_sugerido: str,
+    area_sugerida: str,
+    interesses: list,
+    areas: list,
+) -> str | None:
     if not interesses and not areas:
         return None
     hierarquia = _formatar_interesses_areas(interesses, areas)
     if not hierarquia:
         return None
-
-    user = (
+    return (
         f"LISTA DE INTERESSES E ÁREAS (use apenas estes nomes):\n{hierarquia}\n\n"
         f"Par que foi sugerido (não encontrado): interesse={interest_sugerido!r}, área={area_sugerida!r}\n\n"
         f"IDEIA A CLASSIFICAR:\nTítulo: {titulo}\n\nTexto: {(texto_ideia or '')[:800]}\n\n"
         "Retorne apenas o JSON com interest e area (nomes exatos da lista)."
     )
-    payload = {
-        "model": OPENROUTER_MODEL,
-        "messages": [
-            {"role": "system", "content": PROMPT_ESCOLHER_PAR_FALLBACK},
-            {"role": "user", "content": user},
-        ],
-    }
-    headers = {
-        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-        "Content-Type": "application/json",
-    }
 
-    try:
-        resp = requests.post(
-            OPENROUTER_BASE_URL,
-            json=payload,
-            headers=headers,
-            timeout=OPENROUTER_TIMEOUT,
-        )
-        resp.raise_for_status()
-        body = resp.json()
-    except requests.RequestException as e:
-        logger.warning("Falha ao pedir par interesse/área (fallback): %s", e)
-        return None
-    except json.JSONDecodeError:
-        return None
 
-    choices = body.get("choices") or []
-    if not choices:
-        return None
-
-    content = (choices[0].get("message") or {}).get("content") or ""
-    parsed = _extrair_json(content)
-    if not isinstance(parsed, dict):
+def _par_escolhido(parsed: dict | None) -> dict | None:
+    if parsed is None:
         return None
-
     interest = str(parsed.get("interest") or "").strip()
     area = str(parsed.get("area") or "").strip()
     if not interest or not area:
@@ -341,45 +662,20 @@ def refinar_ideia(titulo: str, corpo: str) -> dict | None:
     corpo = (corpo or "").strip()
     if not corpo and not titulo:
         return None
+    local = revisao_local.refinar_ideia(titulo, corpo)
+    if local is not None:
+        return local
+    parsed = _pedir_json("refinar_ideia", PROMPT_REFINO_IDEIA, _mensagem_refino(titulo, corpo), "refinar ideia")
+    return _ideia_refinada(parsed, titulo, corpo)
 
-    user = f"TÍTULO ORIGINAL:\n{titulo}\n\nTEXTO ORIGINAL:\n{corpo}"
-    payload = {
-        "model": OPENROUTER_MODEL,
-        "messages": [
-            {"role": "system", "content": PROMPT_REFINO_IDEIA},
-            {"role": "user", "content": user},
-        ],
-    }
-    headers = {
-        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-        "Content-Type": "application/json",
-    }
 
-    try:
-        resp = requests.post(
-            OPENROUTER_BASE_URL,
-            json=payload,
-            headers=headers,
-            timeout=OPENROUTER_TIMEOUT,
-        )
-        resp.raise_for_status()
-        body = resp.json()
-    except requests.RequestException as e:
-        logger.warning("Falha ao refinar ideia (request): %s", e)
-        return None
-    except json.JSONDecodeError as e:
-        logger.warning("Falha ao refinar ideia (json): %s", e)
-        return None
+def _mensagem_refino(titulo: str, corpo: str) -> str:
+    return f"TÍTULO ORIGINAL:\n{titulo}\n\nTEXTO ORIGINAL:\n{corpo}"
 
-    choices = body.get("choices") or []
-    if not choices:
-        return None
 
-    content = (choices[0].get("message") or {}).get("content") or ""
-    parsed = _extrair_json(content)
-    if not isinstance(parsed, dict):
+def _ideia_refinada(parsed: dict | None, titulo: str, corpo: str) -> dict | None:
+    if parsed is None:
         return None
-
     out_titulo = str(parsed.get("titulo") or titulo or "Sem título").strip()[:255] or "Sem título"
     out_descricao = str(parsed.get("descricao") or "").strip()
     out_corpo = str(parsed.get("corpo") or corpo or "").strip()
@@ -401,50 +697,26 @@ def corrigir_titulo_resumo(titulo: str, resumo: str | None = None) -> dict | Non
     resumo = (resumo or "").strip()
     if not titulo and not resumo:
         return None
+    local = revisao_local.corrigir_titulo_resumo(titulo, resumo)
+    if local is not None:
+        return local
+    user = _mensagem_correcao(titulo, resumo)
+    parsed = _pedir_json("corrigir_titulo_resumo", PROMPT_CORRIGIR_TITULO_RESUMO, user, "corrigir título/resumo")
+    return _correcao(parsed, titulo, resumo)
+
 
+def _mensagem_correcao(titulo: str, resumo: str) -> str:
     user = f"TÍTULO:\n{titulo or '(vazio)'}\n\n"
     if resumo:
         user += f"RESUMO/DESCRIÇÃO:\n{resumo}"
     else:
         user += "RESUMO/DESCRIÇÃO: (vazio)"
+    return user
 
-    payload = {
-        "model": OPENROUTER_MODEL,
-        "messages": [
-            {"role": "system", "content": PROMPT_CORRIGIR_TITULO_RESUMO},
-            {"role": "user", "content": user},
-        ],
-    }
-    headers = {
-        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-        "Content-Type": "application/json",
-    }
 
-    try:
-        resp = requests.post(
-            OPENROUTER_BASE_URL,
-            json=payload,
-            headers=headers,
-            timeout=OPENROUTER_TIMEOUT,
-        )
-        resp.raise_for_status()
-        body = resp.json()
-    except requests.RequestException as e:
-        logger.warning("Falha ao corrigir título/resumo (request): %s", e)
-        return None
-    except json.JSONDecodeError as e:
-        logger.warning("Falha ao corrigir título/resumo (json): %s", e)
-        return None
-
-    choices = body.get("choices") or []
-    if not choices:
-        return None
-
-    content = (choices[0].get("message") or {}).get("content") or ""
-    parsed = _extrair_json(content)
-    if not isinstance(parsed, dict):
+def _correcao(parsed: dict | None, titulo: str, resumo: str) -> dict | None:
+    if parsed is None:
         return None
-
     out_titulo = str(parsed.get("titulo") or titulo or "").strip() or titulo
     out_resumo = str(parsed.get("resumo") or resumo or "").strip() if resumo else ""
 
@@ -454,65 +726,83 @@ def corrigir_titulo_resumo(titulo: str, resumo: str | None = None) -> dict | Non
 def perguntar_llm(
     texto: str,
     contexto_memoria: dict | None = None,
-    interesses_areas: tuple[list, list] | None = None,
+    interesses_areas: taxonomia.Taxonomia | tuple[list, list] | None = None,
+    refino_embutido: bool = False,
 ) -> dict:
     """
     Envia o texto para a LLM via OpenRouter e retorna dict com resposta, acao, dados.
-    interesses_areas: (listar_interesses(), listar_areas()) para incluir hierarquia no prompt.
+    interesses_areas: snapshot da taxonomia (ou (interesses, areas)); entram no prompt as áreas
+    mais relevantes para o texto.
+    refino_embutido: pede o texto refinado junto (dados["refinado"] em salvar_ideia), sem chamada extra.
     """
-    system = PROMPT_SISTEMA
-    contexto_str = _formatar_contexto_memoria(contexto_memoria or {})
-    if contexto_str:
-        system += f"\n\nContexto do usuário: {contexto_str}"
-    if interesses_areas:
-        interesses, areas = interesses_areas
-        hierarquia = _formatar_interesses_areas(interesses, areas)
-        if hierarquia:
-            system += f"\n\n{hierarquia}\nUse APENAS nomes de interesse e área que existam acima. Não crie nem sugira novos interesses ou áreas."
-
-    payload = {
-        "model": OPENROUTER_MODEL,
-        "messages": [
-            {"role": "system", "content": system},
-            {"role": "user", "content": texto},
-        ],
-    }
-    headers = {
-        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-        "Content-Type": "application/json",
-    }
-
+    system = _system_perguntar(texto, contexto_memoria, interesses_areas, refino_embutido)
     try:
-        resp = requests.post(
-            OPENROUTER_BASE_URL,
-            json=payload,
-            headers=headers,
-            timeout=OPENROUTER_TIMEOUT,
-        )
-        resp.raise_for_status()
-        body = resp.json()
+        content = cliente().completar(system, texto, tarefa="perguntar_llm")
     except requests.RequestException as e:
         logger.error("Erro na requisição OpenRouter: %s", e)
         raise
     except json.JSONDecodeError as e:
         logger.error("Resposta OpenRouter não é JSON: %s", e)
         raise
+    return _interpretar_resposta(content)
 
-    choices = body.get("choices") or []
-    if not choices:
+
+_construtor_prompt = ConstrutorPrompt(
+    PROMPT_SISTEMA_BASE,
+    [
+        ("Exemplos de CONSULTAS (sempre listar, nunca criar):", EXEMPLOS_CONSULTAS),
+        ("Exemplos de CRIAÇÕES:", EXEMPLOS_CRIACOES),
+    ],
+    PROMPT_ORCAMENTO_TOKENS,
+)
+
+
+def _system_perguntar(
+    texto: str,
+    contexto_memoria: dict | None,
+    interesses_areas: taxonomia.Taxonomia | tuple[list, list] | None,
+    refino_embutido: bool = False,
+) -> str:
+    """
+    Prompt de sistema da conversa: regras + exemplos relevantes para `texto` + hierarquia de
+    interesses/áreas + contexto da memória. O que muda a cada turno fica no fim (prefixo estável).
+    """
+    secoes = []
+    if interesses_areas:
+        tax = interesses_areas
+        if not isinstance(tax, taxonomia.Taxonomia):
+            tax = taxonomia.Taxonomia(*interesses_areas, versao=0)
+        secoes.append(_formatar_taxonomia_prompt(tax, texto, contexto_memoria))
+    if refino_embutido:
+        secoes.append(PROMPT_SALVAR_IDEIA_UNICA)
+    contexto_str = _formatar_contexto_memoria(contexto_memoria or {})
+    if contexto_str:
+        secoes.append(f"Contexto do usuário: {contexto_str}")
+    if PROMPT_ORCAMENTO_TOKENS <= 0:
+        return "\n\n".join([PROMPT_SISTEMA, *secoes])
+    return _construtor_prompt.montar(texto, secoes)
+
+
+def _interpretar_resposta(content: str | None, cache: bool = False) -> dict:
+    """
+    Converte o texto devolvido pela LLM em {resposta, acao, dados, origem}. origem é "llm" (JSON
+    interpretado de uma resposta nova), "cache" (resposta reaproveitada do llm_cache) ou "fallback"
+    (sem choices ou sem JSON: a acao foi presumida).
+    """
+    if content is None:
         logger.warning("OpenRouter retornou sem choices; usando fallback")
-        return _normalizar_resposta({"resposta": "Recebi sua mensagem.", "arquivar": False})
+        return {**_normalizar_resposta({"resposta": "Recebi sua mensagem.", "arquivar": False}), "origem": "fallback"}
 
-    content = (choices[0].get("message") or {}).get("content") or ""
     parsed = _extrair_json(content)
     if parsed is None:
         logger.warning("Resposta da LLM não é JSON válido. Raw: %s", content[:500])
         # Usa o texto que a LLM devolveu em vez de mensagem fixa
         resposta_bruta = (content or "").strip()[:400] or "Recebi sua mensagem."
-        return _normalizar_resposta({"resposta": resposta_bruta, "arquivar": False})
+        return {**_normalizar_resposta({"resposta": resposta_bruta, "arquivar": False}), "origem": "fallback"}
 
     if isinstance(parsed, list):
         parsed = parsed[0] if parsed else {}
     
     logger.info("JSON extraído da LLM: %s", json.dumps(parsed, ensure_ascii=False))
-    return _normalizar_resposta(parsed)
+    origem = "fallback" if not isinstance(parsed, dict) else "cache" if cache else "llm"
+    return {**_normalizar_resposta(parsed), "origem": origem}
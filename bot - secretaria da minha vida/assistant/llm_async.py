@@ -0,0 +1,508 @@
+"""Cliente assíncrono (httpx) para a LLM via OpenRouter.
+Mesma API de llm, mas com funções awaitable para não bloquear o event loop do bot.
+Prompts, parsing e normalização são os mesmos helpers de llm.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from typing import Awaitable, Callable
+
+import httpx
+import requests
+
+from assistant import llm as _sync
+from assistant import limitador_llm, llm_cache, metricas, revisao_local, rotas_llm, taxonomia
+from assistant.config import (
+    LLM_HEDGE_ATRASO_PADRAO,
+    LLM_HEDGE_MIN_AMOSTRAS,
+    OPENROUTER_API_KEY,
+    OPENROUTER_BASE_URL,
+    OPENROUTER_CONNECT_TIMEOUT,
+    OPENROUTER_POOL_SIZE,
+    OPENROUTER_RETRIES,
+    OPENROUTER_TIMEOUT,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ErroLLM(requests.RequestException):
+    """
+    Falha de comunicação com a OpenRouter via httpx.
+    Herda de requests.RequestException para que os handlers existentes tratem os dois clientes igual.
+    """
+
+
+_cliente: httpx.AsyncClient | None = None
+
+
+def cliente() -> httpx.AsyncClient:
+    """Retorna o AsyncClient compartilhado (criado sob demanda, com pool keep-alive)."""
+    global _cliente
+    if _cliente is None or _cliente.is_closed:
+        _cliente = httpx.AsyncClient(
+            headers={
+                "Authorization": f"Bearer {OPENROUTER_API_KEY}",
+                "Content-Type": "application/json",
+            },
+            timeout=httpx.Timeout(OPENROUTER_TIMEOUT, connect=OPENROUTER_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=OPENROUTER_POOL_SIZE,
+                max_keepalive_connections=OPENROUTER_POOL_SIZE,
+            ),
+        )
+    return _cliente
+
+
+async def fechar_cliente() -> None:
+    """Fecha as conexões do pool (usado no encerramento do bot)."""
+    global _cliente
+    if _cliente is not None:
+        await _cliente.aclose()
+        _cliente = None
+
+
+def _espera_retry(resp: httpx.Response | None, tentativa: int) -> float:
+    """Backoff exponencial (0.5 s, 1 s, 2 s...) ou o Retry-After do provedor, se vier."""
+    if resp is not None:
+        try:
+            return max(0.0, float(resp.headers.get("Retry-After", "")))
+        except ValueError:
+            pass
+    return 0.5 * (2 ** tentativa)
+
+
+# Respostas de limite do provedor: pausam o limitador inteiro, não só o pedido que as recebeu
+_STATUS_LIMITE = (429, 503)
+
+
+def _espera_antes_de_repetir(resp: httpx.Response | None, tentativa: int) -> float:
+    """Espera própria antes da nova tentativa; em 429/503 a pausa fica com o limitador (vale para todos)."""
+    espera = _espera_retry(resp, tentativa)
+    if resp is not None and resp.status_code in _STATUS_LIMITE:
+        limitador_llm.limitador().penalizar(espera)
+        return 0.0
+    return espera
+
+
+def _atraso_hedge(modelo: str) -> float:
+    """Quanto esperar o modelo antes de duplicar o pedido: seu p95 recente (ou o padrão, com poucas amostras)."""
+    resumo = metricas.resumo(f"modelo:{modelo}")
+    if resumo is None or resumo["n"] < LLM_HEDGE_MIN_AMOSTRAS:
+        return LLM_HEDGE_ATRASO_PADRAO
+    return resumo["p95"]
+
+
+# Intervalo para conferir se o pedido que espera na fila do limitador já foi ao ar (relógio do hedge)
+_CONFERIR_VAGA = 0.1
+
+
+def _timeout(rota: dict) -> httpx.Timeout:
+    return httpx.Timeout(rota["timeout"], connect=OPENROUTER_CONNECT_TIMEOUT)
+
+
+async def _requisitar(
+    system: str,
+    user: str,
+    modelo: str,
+    rota: dict,
+    tarefa_cobrada: str | None = None,
+    no_ar: Callable[[float | None], None] | None = None,
+) -> tuple[str | None, dict | None]:
+    """
+    Uma chamada a um modelo (max_tokens e timeout da rota), com retry em 429/5xx e falhas de conexão.
+    Cada tentativa passa pelo limitador com a prioridade da rota.
+    Devolve (content, usage) e registra a latência do modelo (métrica "modelo:<nome>", base do
+    atraso do hedge): só o tempo do último pedido HTTP, sem espera no limitador, pausas de 429 nem
+    tentativas anteriores. Com tarefa_cobrada, esse mesmo tempo conta no orçamento da rota; se for
+    cancelado no meio (hedge venceu), conta o tempo até o cancelamento, como falha.
+    no_ar(instante) é chamado quando uma tentativa ganha a vaga e vai ao ar; no_ar(None) quando ela acaba.
+    """
+    payload = _sync._payload(system, user, modelo, rota["max_tokens"])
+    pedido_em: float | None = None
+    duracao_pedido = 0.0
+    ok = False
+    try:
+        for tentativa in range(OPENROUTER_RETRIES + 1):
+            resp: httpx.Response | None = None
+            try:
+                async with limitador_llm.limitador().vaga(rota["prioridade"]):
+                    pedido_em = time.perf_counter()
+                    if no_ar is not None:
+                        no_ar(pedido_em)
+                    resp = await cliente().post(OPENROUTER_BASE_URL, json=payload, timeout=_timeout(rota))
+            except httpx.TransportError as e:
+                if tentativa == OPENROUTER_RETRIES:
+                    raise ErroLLM(f"POST {OPENROUTER_BASE_URL} ({modelo}): {e}") from e
+            else:
+                if resp.status_code not in _sync._STATUS_RETRY or tentativa == OPENROUTER_RETRIES:
+                    break
+            finally:
+                if pedido_em is not None:
+                    duracao_pedido = time.perf_counter() - pedido_em
+                    pedido_em = None
+                    if no_ar is not None:
+                        no_ar(None)
+            await asyncio.sleep(_espera_antes_de_repetir(resp, tentativa))
+        try:
+            resp.raise_for_status()
+        except httpx.HTTPStatusError as e:
+            raise ErroLLM(f"POST {OPENROUTER_BASE_URL} ({modelo}): {e}") from e
+        body = resp.json()
+        ok = True
+    finally:
+        if tarefa_cobrada is not None:
+            rotas_llm.registrar(tarefa_cobrada, duracao_pedido, ok=ok)
+    limitador_llm.limitador().recuperar()
+    metricas.registrar(f"modelo:{modelo}", duracao_pedido)
+    return _sync._conteudo_resposta(body), body.get("usage")
+
+
+async def _despachar(system: str, user: str, tarefa: str) -> tuple[str | None, dict | None, str]:
+    """
+    Dispara o modelo principal da tarefa. Se ele passar do seu p95 sem responder, dispara o próximo
+    da cadeia em paralelo (hedge); se falhar, passa ao próximo. Vale a primeira resposta bem-sucedida
+    e os pedidos restantes são cancelados. Devolve (content, usage, modelo que respondeu).
+    O p95 conta a partir de quando o pedido ganhou a vaga no limitador: enquanto ele espera na fila
+    ou o limitador está pausado por 429, não há hedge (a cópia só entraria na mesma fila).
+    """
+    cadeia = rotas_llm.cadeia(tarefa)
+    rota = rotas_llm.rota(tarefa)
+    pendentes: dict[asyncio.Task, str] = {}
+    proximo = 0
+    ultimo_erro: Exception | None = None
+    no_ar_em: dict[str, float | None] = {}
+
+    def _disparar() -> None:
+        nonlocal proximo
+        modelo = cadeia[proximo]
+        # Só o modelo atual da rota (o primeiro da cadeia) conta no orçamento dela
+        cobrada = tarefa if proximo == 0 else None
+        proximo += 1
+        no_ar_em[modelo] = None
+
+        def _no_ar(instante: float | None) -> None:
+            no_ar_em[modelo] = instante
+
+        pendentes[asyncio.create_task(_requisitar(system, user, modelo, rota, cobrada, _no_ar))] = modelo
+
+    def _espera_hedge() -> float | None:
+        """Quanto esperar antes de conferir de novo se cabe o hedge (None: não há próximo modelo)."""
+        if proximo >= len(cadeia):
+            return None
+        pausa = limitador_llm.limitador().situacao()["pausa"]
+        desde = no_ar_em[cadeia[proximo - 1]]
+        if desde is None:
+            return max(pausa, _CONFERIR_VAGA)
+        return max(pausa, desde + _atraso_hedge(cadeia[proximo - 1]) - time.perf_counter(), 0.0)
+
+    def _cabe_hedge() -> bool:
+        """O último pedido disparado está no ar há mais que o seu p95 e o limitador não está pausado."""
+        desde = no_ar_em[cadeia[proximo - 1]]
+        if desde is None or limitador_llm.limitador().situacao()["pausa"] > 0:
+            return False
+        return time.perf_counter() - desde >= _atraso_hedge(cadeia[proximo - 1])
+
+    _disparar()
+    try:
+        while pendentes:
+            espera = _espera_hedge()
+            feitos, _ = await asyncio.wait(pendentes, timeout=espera, return_when=asyncio.FIRST_COMPLETED)
+            if not feitos:
+                if not _cabe_hedge():
+                    continue
+                logger.info(
+                    "LLM %s: %s passou de %.1f s no ar; pedido duplicado para %s",
+                    tarefa or "-", cadeia[proximo - 1], _atraso_hedge(cadeia[proximo - 1]), cadeia[proximo],
+                )
+                _disparar()
+                continue
+            for tarefa_feita in feitos:
+                modelo = pendentes.pop(tarefa_feita)
+                try:
+                    content, uso = tarefa_feita.result()
+                except (requests.RequestException, json.JSONDecodeError) as e:
+                    logger.warning("LLM %s: modelo %s falhou: %s", tarefa or "-", modelo, e)
+                    ultimo_erro = e
+                    continue
+                return content, uso, modelo
+            if not pendentes and proximo < len(cadeia):
+                _disparar()
+        raise ultimo_erro
+    finally:
+        for pendente in pendentes:
+            if not pendente.done():
+                pendente.cancel()
+            elif not pendente.cancelled():
+                pendente.exception()  # já terminou junto com a vencedora: marca o erro como lido
+
+
+async def _completar(system: str, user: str, tarefa: str = "", consultar_cache: bool = True) -> str | None:
+    """
+    Equivalente assíncrono de ClienteLLM.completar, com a mesma política de retry (429/5xx e falhas
+    de conexão), mesmo cache e mesmos hooks, mais hedge/fallback entre os modelos da tarefa e
+    rebaixamento da rota que estoura o orçamento. Devolve o content da primeira choice ou None sem choices.
+    consultar_cache=False é para quem já consultou o cache (a resposta nova ainda é guardada).
+    """
+    if consultar_cache:
+        cacheado = llm_cache.cache().obter(tarefa, system, user, rotas_llm.cadeia(tarefa)[0])
+        if cacheado is not None:
+            _sync.notificar(tarefa, 0.0, cache=True)
+            return cacheado
+    inicio = time.perf_counter()
+    erro: Exception | None = None
+    uso: dict | None = None
+    modelo: str | None = None
+    try:
+        content, uso, modelo = await _despachar(system, user, tarefa)
+        _sync._guardar_em_cache(tarefa, system, user, content, modelo)
+        return content
+    except (requests.RequestException, json.JSONDecodeError) as e:
+        erro = e
+        raise
+    finally:
+        _sync.notificar(tarefa, time.perf_counter() - inicio, erro, uso=uso, modelo=modelo)
+
+
+# Callback de progresso do streaming: (texto parcial de "resposta", completa)
+Progresso = Callable[[str, bool], Awaitable[None]]
+
+
+async def _stream_modelo(
+    system: str,
+    user: str,
+    modelo: str,
+    rota: dict,
+    ao_trecho: Callable[[str], Awaitable[None]],
+    tarefa_cobrada: str | None = None,
+) -> dict | None:
+    """
+    Um pedido com "stream": true (server-sent events) a um modelo; cada delta de texto vai para
+    ao_trecho. Repete em 429/5xx e falhas de conexão só enquanto nada foi recebido. A vaga do
+    limitador fica ocupada durante todo o stream. Devolve o usage.
+    Com tarefa_cobrada, o tempo do último stream (sem espera no limitador nem pausas) conta no
+    orçamento da rota, como em _requisitar.
+    """
+    payload = {**_sync._payload(system, user, modelo, rota["max_tokens"]), "stream": True}
+    uso: dict | None = None
+    recebeu = False
+    espera = 0.0
+    pedido_em: float | None = None
+    duracao_pedido = 0.0
+    ok = False
+    try:
+        for tentativa in range(OPENROUTER_RETRIES + 1):
+            if espera:
+                await asyncio.sleep(espera)
+                espera = 0.0
+            try:
+                async with limitador_llm.limitador().vaga(rota["prioridade"]):
+                    pedido_em = time.perf_counter()
+                    async with cliente().stream(
+                        "POST", OPENROUTER_BASE_URL, json=payload, timeout=_timeout(rota)
+                    ) as resp:
+                        if resp.status_code in _sync._STATUS_RETRY and tentativa < OPENROUTER_RETRIES:
+                            await resp.aread()
+                            espera = _espera_antes_de_repetir(resp, tentativa)
+                            continue
+                        if resp.is_error:
+                            await resp.aread()
+                        resp.raise_for_status()
+                        async for linha in resp.aiter_lines():
+                            # Linhas que não começam com "data:" são comentários/keep-alive do SSE
+                            if not linha.startswith("data:"):
+                                continue
+                            dado = linha[5:].strip()
+                            if dado == "[DONE]":
+                                break
+                            evento = json.loads(dado)
+                            if evento.get("error"):
+                                raise ErroLLM(f"POST {OPENROUTER_BASE_URL} ({modelo}): {evento['error']}")
+                            uso = evento.get("usage") or uso
+                            choices = evento.get("choices") or []
+                            delta = ((choices[0].get("delta") or {}).get("content") or "") if choices else ""
+                            if delta:
+                                recebeu = True
+                                await ao_trecho(delta)
+                ok = True
+                limitador_llm.limitador().recuperar()
+                return uso
+            except httpx.TransportError as e:
+                # Só repete se nada foi recebido ainda; no meio do stream a falha é propagada
+                if recebeu or tentativa == OPENROUTER_RETRIES:
+                    raise ErroLLM(f"POST {OPENROUTER_BASE_URL} ({modelo}): {e}") from e
+                espera = _espera_retry(None, tentativa)
+            except httpx.HTTPStatusError as e:
+                raise ErroLLM(f"POST {OPENROUTER_BASE_URL} ({modelo}): {e}") from e
+            finally:
+                if pedido_em is not None:
+                    duracao_pedido = time.perf_counter() - pedido_em
+                    pedido_em = None
+    finally:
+        if tarefa_cobrada is not None:
+            rotas_llm.registrar(tarefa_cobrada, duracao_pedido, ok=ok)
+    return uso
+
+
+async def _completar_stream(system: str, user: str, tarefa: str, ao_progresso: Progresso) -> str | None:
+    """
+    Como _completar, mas com streaming. Cada delta alimenta um ExtratorResposta e ao_progresso é
+    chamado sempre que o campo "resposta" cresce. Sem hedge (as duas respostas disputariam a mesma
+    mensagem no chat), mas com fallback: se um modelo falha antes do primeiro trecho, tenta o próximo
+    da cadeia. Retorna o content completo ao fim do stream (None se nada foi gerado).
+    """
+    inicio = time.perf_counter()
+    erro: Exception | None = None
+    uso: dict | None = None
+    primeiro_token: float | None = None
+    modelo_usado: str | None = None
+    partes: list[str] = []
+    extrator = _sync.ExtratorResposta()
+
+    async def _ao_trecho(delta: str) -> None:
+        nonlocal primeiro_token
+        if primeiro_token is None:
+            primeiro_token = time.perf_counter() - inicio
+        partes.append(delta)
+        if extrator.alimentar(delta):
+            await ao_progresso(extrator.texto, extrator.completa)
+
+    try:
+        cadeia = rotas_llm.cadeia(tarefa)
+        for i, modelo in enumerate(cadeia):
+            try:
+                uso = await _stream_modelo(
+                    system, user, modelo, rotas_llm.rota(tarefa), _ao_trecho, tarefa if i == 0 else None
+                )
+                modelo_usado = modelo
+                break
+            except requests.RequestException as e:
+                if partes or i == len(cadeia) - 1:
+                    raise
+                logger.warning("LLM %s: modelo %s falhou (%s); tentando %s", tarefa, modelo, e, cadeia[i + 1])
+        content = "".join(partes) if partes else None
+        _sync._guardar_em_cache(tarefa, system, user, content, modelo_usado)
+        return content
+    except (requests.RequestException, json.JSONDecodeError) as e:
+        erro = e
+        raise
+    finally:
+        _sync.notificar(
+            tarefa, time.perf_counter() - inicio, erro, uso=uso, primeiro_token=primeiro_token, modelo=modelo_usado
+        )
+
+
+async def _pedir_json(tarefa: str, system: str, user: str, descricao_erro: str) -> dict | None:
+    try:
+        content = await _completar(system, user, tarefa=tarefa)
+    except requests.RequestException as e:
+        logger.warning("Falha ao %s (request): %s", descricao_erro, e)
+        return None
+    except json.JSONDecodeError as e:
+        logger.warning("Falha ao %s (json): %s", descricao_erro, e)
+        return None
+    return _sync._json_objeto(content)
+
+
+async def escolher_par_interesse_area_fallback(
+    titulo: str,
+    texto_ideia: str,
+    interest_sugerido: str,
+    area_sugerida: str,
+    interesses: list,
+    areas: list,
+) -> dict | None:
+    """Versão assíncrona de llm.escolher_par_interesse_area_fallback."""
+    user = _sync._mensagem_escolher_par(titulo, texto_ideia, interest_sugerido, area_sugerida, interesses, areas)
+    if user is None:
+        return None
+    parsed = await _pedir_json(
+        "escolher_par", _sync.PROMPT_ESCOLHER_PAR_FALLBACK, user, "pedir par interesse/área (fallback)"
+    )
+    return _sync._par_escolhido(parsed)
+
+
+async def refinar_ideia(titulo: str, corpo: str) -> dict | None:
+    """Versão assíncrona de llm.refinar_ideia."""
+    titulo = (titulo or "").strip()
+    corpo = (corpo or "").strip()
+    if not corpo and not titulo:
+        return None
+    local = revisao_local.refinar_ideia(titulo, corpo)
+    if local is not None:
+        return local
+    parsed = await _pedir_json(
+        "refinar_ideia", _sync.PROMPT_REFINO_IDEIA, _sync._mensagem_refino(titulo, corpo), "refinar ideia"
+    )
+    return _sync._ideia_refinada(parsed, titulo, corpo)
+
+
+async def corrigir_titulo_resumo(titulo: str, resumo: str | None = None) -> dict | None:
+    """Versão assíncrona de llm.corrigir_titulo_resumo."""
+    titulo = (titulo or "").strip()
+    resumo = (resumo or "").strip()
+    if not titulo and not resumo:
+        return None
+    local = revisao_local.corrigir_titulo_resumo(titulo, resumo)
+    if local is not None:
+        return local
+    parsed = await _pedir_json(
+        "corrigir_titulo_resumo",
+        _sync.PROMPT_CORRIGIR_TITULO_RESUMO,
+        _sync._mensagem_correcao(titulo, resumo),
+        "corrigir título/resumo",
+    )
+    return _sync._correcao(parsed, titulo, resumo)
+
+
+async def perguntar_llm(
+    texto: str,
+    contexto_memoria: dict | None = None,
+    interesses_areas: taxonomia.Taxonomia | tuple[list, list] | None = None,
+    refino_embutido: bool = False,
+) -> dict:
+    """Versão assíncrona de llm.perguntar_llm (erros de rede são propagados)."""
+    system = _sync._system_perguntar(texto, contexto_memoria, interesses_areas, refino_embutido)
+    cacheado = llm_cache.cache().obter("perguntar_llm", system, texto, rotas_llm.cadeia("perguntar_llm")[0])
+    if cacheado is not None:
+        _sync.notificar("perguntar_llm", 0.0, cache=True)
+        return _sync._interpretar_resposta(cacheado, cache=True)
+    try:
+        content = await _completar(system, texto, tarefa="perguntar_llm", consultar_cache=False)
+    except requests.RequestException as e:
+        logger.error("Erro na requisição OpenRouter: %s", e)
+        raise
+    except json.JSONDecodeError as e:
+        logger.error("Resposta OpenRouter não é JSON: %s", e)
+        raise
+    return _sync._interpretar_resposta(content)
+
+
+async def perguntar_llm_stream(
+    texto: str,
+    ao_progresso: Progresso,
+    contexto_memoria: dict | None = None,
+    interesses_areas: taxonomia.Taxonomia | tuple[list, list] | None = None,
+    refino_embutido: bool = False,
+) -> dict:
+    """
+    perguntar_llm com streaming: ao_progresso(texto_parcial, completa) recebe o campo "resposta"
+    enquanto é gerado; acao/dados são interpretados quando o stream termina.
+    """
+    system = _sync._system_perguntar(texto, contexto_memoria, interesses_areas, refino_embutido)
+    cacheado = llm_cache.cache().obter("perguntar_llm", system, texto, rotas_llm.cadeia("perguntar_llm")[0])
+    if cacheado is not None:
+        _sync.notificar("perguntar_llm", 0.0, cache=True)
+        return _sync._interpretar_resposta(cacheado, cache=True)
+    try:
+        content = await _completar_stream(system, texto, "perguntar_llm", ao_progresso)
+    except requests.RequestException as e:
+        logger.error("Erro na requisição OpenRouter (stream): %s", e)
+        raise
+    except json.JSONDecodeError as e:
+        logger.error("Evento do stream OpenRouter não é JSON: %s", e)
+        raise
+    return _sync._interpretar_resposta(content)
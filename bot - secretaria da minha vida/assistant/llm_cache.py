@@ -0,0 +1,202 @@
+"""
+Cache de respostas da LLM, chaveado por (modelo, hash do prompt de sistema, conteúdo do usuário).
+Duas camadas: LRU em memória (limitada por LLM_CACHE_TAMANHO) e, opcionalmente, SQLite em disco
+(sobrevive a reinícios, limitada por LLM_CACHE_TAMANHO_DISCO). Cada tarefa tem seu próprio TTL;
+tarefas sem TTL não são cacheadas.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from assistant.config import (
+    LLM_CACHE_DISCO,
+    LLM_CACHE_PATH,
+    LLM_CACHE_TAMANHO,
+    LLM_CACHE_TAMANHO_DISCO,
+    LLM_CACHE_TTL_CONVERSA,
+    LLM_CACHE_TTL_CORRECAO,
+    LLM_CACHE_TTL_PAR,
+    OPENROUTER_MODEL,
+)
+
+logger = logging.getLogger(__name__)
+
+# TTL em segundos por tarefa (nome usado nos hooks do cliente LLM); 0 ou ausente = não cacheia
+TTL_POR_TAREFA = {
+    "corrigir_titulo_resumo": LLM_CACHE_TTL_CORRECAO,
+    "refinar_ideia": LLM_CACHE_TTL_CORRECAO,
+    "escolher_par": LLM_CACHE_TTL_PAR,
+    "perguntar_llm": LLM_CACHE_TTL_CONVERSA,
+}
+
+# A cada quantas gravações em disco as entradas expiradas/excedentes são podadas
+_PODAR_A_CADA = 50
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS respostas (
+    chave TEXT PRIMARY KEY,
+    tarefa TEXT NOT NULL,
+    conteudo TEXT NOT NULL,
+    expira_em REAL NOT NULL,
+    acessado_em REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_respostas_acessado ON respostas(acessado_em);
+"""
+
+
+def chave(system: str, user: str, modelo: str = OPENROUTER_MODEL) -> str:
+    """Chave estável da chamada: modelo + sha256(system) + conteúdo do usuário."""
+    h_system = hashlib.sha256(system.encode("utf-8")).hexdigest()
+    return hashlib.sha256(f"{modelo}\0{h_system}\0{user}".encode("utf-8")).hexdigest()
+
+
+class CacheLLM:
+    """LRU em memória com camada opcional em SQLite. Seguro para uso entre threads."""
+
+    def __init__(
+        self,
+        capacidade: int = LLM_CACHE_TAMANHO,
+        caminho: Path | None = None,
+        capacidade_disco: int = LLM_CACHE_TAMANHO_DISCO,
+    ) -> None:
+        self.capacidade = capacidade
+        self.capacidade_disco = capacidade_disco
+        self._memoria: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._gravacoes_disco = 0
+        self.contadores = {"hits_memoria": 0, "hits_disco": 0, "misses": 0, "gravacoes": 0}
+        self.por_tarefa: dict[str, dict[str, int]] = {}
+        self._conn: sqlite3.Connection | None = None
+        if caminho is not None:
+            try:
+                caminho.parent.mkdir(parents=True, exist_ok=True)
+                self._conn = sqlite3.connect(str(caminho), check_same_thread=False)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.executescript(_SCHEMA)
+            except sqlite3.Error as e:
+                logger.warning("Cache LLM em disco indisponível (%s); usando só memória", e)
+                self._conn = None
+
+    def _contar(self, tarefa: str, evento: str) -> None:
+        self.contadores[evento] += 1
+        if evento == "gravacoes":
+            return
+        por = self.por_tarefa.setdefault(tarefa, {"hits": 0, "misses": 0})
+        por["misses" if evento == "misses" else "hits"] += 1
+
+    def obter(self, tarefa: str, system: str, user: str, modelo: str = OPENROUTER_MODEL) -> str | None:
+        """Resposta cacheada ainda válida para a chamada ao `modelo`, ou None (miss)."""
+        if not TTL_POR_TAREFA.get(tarefa):
+            return None
+        k = chave(system, user, modelo)
+        agora = time.time()
+        with self._lock:
+            item = self._memoria.get(k)
+            if item is not None:
+                expira_em, conteudo = item
+                if expira_em > agora:
+                    self._memoria.move_to_end(k)
+                    self._contar(tarefa, "hits_memoria")
+                    return conteudo
+                del self._memoria[k]
+            if self._conn is not None:
+                try:
+                    row = self._conn.execute(
+                        "SELECT conteudo, expira_em FROM respostas WHERE chave = ? AND expira_em > ?",
+                        (k, agora),
+                    ).fetchone()
+                    if row is not None:
+                        self._conn.execute("UPDATE respostas SET acessado_em = ? WHERE chave = ?", (agora, k))
+                        self._conn.commit()
+                        self._guardar_memoria(k, row[1], row[0])
+                        self._contar(tarefa, "hits_disco")
+                        return row[0]
+                except sqlite3.Error as e:
+                    logger.warning("Falha ao ler cache LLM em disco: %s", e)
+            self._contar(tarefa, "misses")
+        return None
+
+    def guardar(self, tarefa: str, system: str, user: str, conteudo: str, modelo: str = OPENROUTER_MODEL) -> None:
+        """
+        Guarda a resposta com o TTL da tarefa, sob o `modelo` que a gerou (sem efeito se a tarefa
+        não for cacheável).
+        """
+        ttl = TTL_POR_TAREFA.get(tarefa)
+        if not ttl:
+            return
+        k = chave(system, user, modelo)
+        agora = time.time()
+        with self._lock:
+            self._guardar_memoria(k, agora + ttl, conteudo)
+            self._contar(tarefa, "gravacoes")
+            if self._conn is None:
+                return
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO respostas (chave, tarefa, conteudo, expira_em, acessado_em) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (k, tarefa, conteudo, agora + ttl, agora),
+                )
+                self._gravacoes_disco += 1
+                if self._gravacoes_disco % _PODAR_A_CADA == 0:
+                    self._podar_disco(agora)
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.warning("Falha ao gravar cache LLM em disco: %s", e)
+
+    def _guardar_memoria(self, k: str, expira_em: float, conteudo: str) -> None:
+        self._memoria[k] = (expira_em, conteudo)
+        self._memoria.move_to_end(k)
+        while len(self._memoria) > self.capacidade:
+            self._memoria.popitem(last=False)
+
+    def _podar_disco(self, agora: float) -> None:
+        """Remove expirados e, acima da capacidade, os acessados há mais tempo."""
+        self._conn.execute("DELETE FROM respostas WHERE expira_em <= ?", (agora,))
+        total = self._conn.execute("SELECT COUNT(*) FROM respostas").fetchone()[0]
+        if total > self.capacidade_disco:
+            self._conn.execute(
+                "DELETE FROM respostas WHERE chave IN "
+                "(SELECT chave FROM respostas ORDER BY acessado_em LIMIT ?)",
+                (total - self.capacidade_disco,),
+            )
+
+    def estatisticas(self) -> dict:
+        """Contadores de hits/misses (totais e por tarefa) e ocupação da camada em memória."""
+        with self._lock:
+            hits = self.contadores["hits_memoria"] + self.contadores["hits_disco"]
+            consultas = hits + self.contadores["misses"]
+            return {
+                **self.contadores,
+                "taxa_acerto": hits / consultas if consultas else 0.0,
+                "entradas_memoria": len(self._memoria),
+                "disco": self._conn is not None,
+                "por_tarefa": {t: dict(c) for t, c in self.por_tarefa.items()},
+            }
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._memoria.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM respostas")
+                self._conn.commit()
+
+
+_cache: CacheLLM | None = None
+_cache_lock = threading.Lock()
+
+
+def cache() -> CacheLLM:
+    """Retorna o cache compartilhado (criado sob demanda)."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = CacheLLM(caminho=LLM_CACHE_PATH if LLM_CACHE_DISCO else None)
+    return _cache
@@ -1,14 +1,22 @@
 """
-Memória local persistente em JSON.
-Funções para carregar, salvar e atualizar; caminho centralizado em config.
+Memória local: perfil do usuário em JSON (memoria.json) e estado de conversa por chat em SQLite
+(estado_chats: ação pendente, ações recentes, categorias usadas).
+O JSON é lido uma vez por processo e as leituras seguintes vêm da memória. Escritas marcam o
+estado como sujo e são gravadas em lote até MEMORIA_ATRASO_GRAVACAO segundos depois (arquivo
+temporário + fsync + rename, então uma queda no meio da gravação não corrompe o JSON) e no
+encerramento (descarregar). Edições manuais no arquivo com o bot rodando não são vistas.
 """
+import atexit
 import json
 import logging
-import datetime as _dt
+import os
+import sqlite3
+import threading
 from copy import deepcopy
 from pathlib import Path
 
-from assistant.config import MEMORIA_PATH
+from assistant.config import MEMORIA_ATRASO_GRAVACAO, MEMORIA_PATH, TELEGRAM_CHAT_ID
+from assistant.estado_chats import estado_chats
 
 logger = logging.getLogger(__name__)
 
@@ -19,40 +27,124 @@ ESTRUTURA_PADRAO = {
     }
 }
 
-
-def carregar_memoria() -> dict:
-    """
-    Carrega o conteúdo de memoria.json.
-    Se o arquivo não existir ou for inválido, retorna estrutura padrão e salva.
-    """
+_dados: dict | None = None
+_sujo = False
+_timer: threading.Timer | None = None
+_lock = threading.RLock()
+_lock_gravacao = threading.Lock()  # mantém as gravações em ordem
+
+
+def _ler_arquivo(path: Path) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _gravar_arquivo(path: Path, conteudo: str) -> None:
+    """Grava em arquivo temporário no mesmo diretório, fsync e rename atômico por cima do original."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(conteudo)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    if hasattr(os, "O_DIRECTORY"):
+        fd = os.open(path.parent, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def _estado() -> dict:
+    """O dict residente (carregado do disco na primeira chamada). Chamar com _lock."""
+    global _dados
+    if _dados is not None:
+        return _dados
     path = Path(MEMORIA_PATH)
     if not path.exists():
         logger.warning("memoria.json não encontrado; usando estrutura padrão")
-        salvar_memoria(ESTRUTURA_PADRAO)
-        return deepcopy(ESTRUTURA_PADRAO)
+        _dados = deepcopy(ESTRUTURA_PADRAO)
+        _marcar_sujo()
+        return _dados
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            dados = json.load(f)
-        return dados
+        _dados = _ler_arquivo(path)
+        _migrar_estado_global(_dados)
     except json.JSONDecodeError as e:
         logger.error("memoria.json inválido: %s", e)
-        salvar_memoria(ESTRUTURA_PADRAO)
-        return deepcopy(ESTRUTURA_PADRAO)
+        _dados = deepcopy(ESTRUTURA_PADRAO)
+        _marcar_sujo()
     except OSError as e:
         logger.error("Erro ao ler memoria.json: %s", e)
         raise
+    return _dados
+
+
+def _migrar_estado_global(dados: dict) -> None:
+    """
+    memoria.json antigo guardava pending_action e contexto_recente globais: o contexto vai para o
+    chat de TELEGRAM_CHAT_ID (se definido) e as duas chaves saem do arquivo. Chamar com _lock.
+    """
+    if "pending_action" not in dados and "contexto_recente" not in dados:
+        return
+    dados.pop("pending_action", None)
+    contexto = dados.pop("contexto_recente", None)
+    if contexto and TELEGRAM_CHAT_ID.lstrip("-").isdigit():
+        estado_chats().importar_contexto(int(TELEGRAM_CHAT_ID), contexto)
+        logger.info("contexto_recente de memoria.json migrado para o chat %s", TELEGRAM_CHAT_ID)
+    _marcar_sujo()
+
+
+def _marcar_sujo() -> None:
+    """Agenda a gravação (uma só para todas as escritas da janela). Chamar com _lock."""
+    global _sujo, _timer
+    _sujo = True
+    if _timer is None:
+        _timer = threading.Timer(max(0.0, MEMORIA_ATRASO_GRAVACAO), descarregar)
+        _timer.daemon = True
+        _timer.start()
+
+
+def descarregar() -> None:
+    """Grava a memória no disco se houver escritas pendentes (também roda no encerramento)."""
+    global _sujo, _timer
+    with _lock_gravacao:
+        with _lock:
+            if _timer is not None:
+                _timer.cancel()
+                _timer = None
+            if not _sujo or _dados is None:
+                return
+            conteudo = json.dumps(_dados, ensure_ascii=False, indent=2)
+            _sujo = False
+        try:
+            _gravar_arquivo(Path(MEMORIA_PATH), conteudo)
+        except OSError as e:
+            logger.error("Erro ao salvar memoria.json: %s", e)
+            with _lock:
+                _sujo = True
+
+
+atexit.register(descarregar)
+
+
+def carregar_memoria(chat_id: int) -> dict:
+    """
+    Perfil (memoria.json, lido na primeira vez) + contexto_recente do chat, no formato usado pelo prompt.
+    Se o arquivo não existir ou for inválido, usa a estrutura padrão e a salva.
+    """
+    with _lock:
+        dados = deepcopy(_estado())
+    dados["contexto_recente"] = estado_chats().contexto_recente(chat_id)
+    return dados
 
 
 def salvar_memoria(dados: dict) -> None:
-    """Persiste o dict no arquivo com indentação."""
-    path = Path(MEMORIA_PATH)
-    try:
-        path.parent.mkdir(parents=True, exist_ok=True)
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(dados, f, ensure_ascii=False, indent=2)
-    except OSError as e:
-        logger.error("Erro ao salvar memoria.json: %s", e)
-        raise
+    """Substitui o perfil; a gravação no arquivo é agendada."""
+    global _dados
+    with _lock:
+        _dados = deepcopy(dados)
+        _marcar_sujo()
 
 
 def _merge_profundo(base: dict, atualizacoes: dict) -> dict:
@@ -68,72 +160,39 @@ def _merge_profundo(base: dict, atualizacoes: dict) -> dict:
 
 def atualizar_memoria(atualizacoes: dict) -> dict:
     """
-    Mescla atualizacoes na memória atual, salva e retorna o estado atual.
+    Mescla atualizacoes no perfil atual, salva e retorna o estado atual.
     Merge é profundo para dicts aninhados.
     """
-    atual = carregar_memoria()
-    novo = _merge_profundo(atual, atualizacoes)
-    salvar_memoria(novo)
-    return novo
+    global _dados
+    with _lock:
+        _dados = _merge_profundo(_estado(), atualizacoes)
+        _marcar_sujo()
+        return deepcopy(_dados)
 
 
-def set_pending_action(action: dict) -> dict:
-    """Armazena uma pending_action na memória."""
-    atual = carregar_memoria()
-    atual['pending_action'] = action
-    salvar_memoria(atual)
-    return atual
+def set_pending_action(chat_id: int, action: dict) -> None:
+    """Armazena a ação que aguarda confirmação do chat (vence após PENDENTE_VALIDADE)."""
+    estado_chats().definir_pendente(chat_id, action.get("acao", ""), action.get("dados") or {})
 
 
-def get_pending_action() -> dict | None:
-    atual = carregar_memoria()
-    return atual.get('pending_action')
+def get_pending_action(chat_id: int) -> dict | None:
+    return estado_chats().pendente(chat_id)
 
 
-def clear_pending_action() -> dict:
-    atual = carregar_memoria()
-    if 'pending_action' in atual:
-        del atual['pending_action']
-        salvar_memoria(atual)
-    return atual
+def clear_pending_action(chat_id: int) -> None:
+    estado_chats().limpar_pendente(chat_id)
 
 
-def atualizar_contexto_recente(acao: str, dados: dict | None = None) -> None:
-    """Registra a ação mais recente e atualiza contexto para melhorar sugestões do LLM."""
+def atualizar_contexto_recente(chat_id: int, acao: str, dados: dict | None = None) -> None:
+    """Registra a ação mais recente do chat e atualiza contexto para melhorar sugestões do LLM."""
     try:
-        atual = carregar_memoria()
-        if "contexto_recente" not in atual:
-            atual["contexto_recente"] = {
-                "ultima_ideia": {},
-                "ultimas_acoes": [],
-                "categorias_frequentes": {},
-            }
-
-        ctx = atual["contexto_recente"]
-        now = _dt.datetime.utcnow().isoformat()
-
-        # Registrar nas últimas 5 ações
-        ultimas = ctx.get("ultimas_acoes", [])
-        ultimas.append({"acao": acao, "timestamp": now})
-        ctx["ultimas_acoes"] = ultimas[-5:]
-
-        # Atualizar última ideia e categoria frequente
+        ideia = None
         if acao == "salvar_ideia" and dados:
-            interesse = dados.get("interest", "")
-            area = dados.get("area", "")
-            ctx["ultima_ideia"] = {
-                "interesse": interesse,
-                "area": area,
+            ideia = {
+                "interesse": dados.get("interest", ""),
+                "area": dados.get("area", ""),
                 "titulo": dados.get("titulo", ""),
-                "timestamp": now,
             }
-            if interesse and area:
-                cat_key = f"{interesse} > {area}"
-                cats = ctx.get("categorias_frequentes", {})
-                cats[cat_key] = cats.get(cat_key, 0) + 1
-                ctx["categorias_frequentes"] = cats
-
-        atual["contexto_recente"] = ctx
-        salvar_memoria(atual)
-    except Exception as e:
+        estado_chats().registrar_acao(chat_id, acao, ideia)
+    except sqlite3.Error as e:
         logger.warning("Falha ao atualizar contexto recente: %s", e)
@@ -0,0 +1,47 @@
+"""
+Métricas de latência em processo: guarda as amostras mais recentes de cada métrica
+e calcula percentis sob demanda (exibidos em /metricas).
+"""
+from __future__ import annotations
+
+import threading
+from collections import deque
+
+# Amostras mantidas por métrica (janela deslizante)
+JANELA = 500
+
+_amostras: dict[str, deque[float]] = {}
+_lock = threading.Lock()
+
+
+def registrar(nome: str, valor: float) -> None:
+    """Adiciona uma amostra (em segundos) à métrica `nome`."""
+    with _lock:
+        fila = _amostras.get(nome)
+        if fila is None:
+            fila = _amostras[nome] = deque(maxlen=JANELA)
+        fila.append(valor)
+
+
+def _percentil(ordenados: list[float], p: float) -> float:
+    idx = min(len(ordenados) - 1, max(0, round(p * (len(ordenados) - 1))))
+    return ordenados[idx]
+
+
+def resumo(nome: str) -> dict | None:
+    """{"n", "p50", "p95", "max"} da janela atual, ou None se não houver amostras."""
+    with _lock:
+        valores = sorted(_amostras.get(nome) or ())
+    if not valores:
+        return None
+    return {
+        "n": len(valores),
+        "p50": _percentil(valores, 0.5),
+        "p95": _percentil(valores, 0.95),
+        "max": valores[-1],
+    }
+
+
+def nomes() -> list[str]:
+    with _lock:
+        return sorted(_amostras)
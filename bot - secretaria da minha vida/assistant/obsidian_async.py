@@ -0,0 +1,253 @@
+"""Cliente REST assíncrono (httpx) para o backend Obsidian_premium.
+Mesma API de obsidian_service, mas com funções awaitable para não bloquear o event loop do bot.
+Os payloads são montados pelos mesmos helpers de obsidian_service.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, List, Optional
+
+import httpx
+import requests
+
+from assistant import obsidian_service as _sync
+from assistant import taxonomia
+from assistant.config import (
+    ESPELHO_RECONCILIAR_INTERVALO,
+    ESPELHO_SYNC_INTERVALO,
+    OBSIDIAN_API_BASE_URL,
+    OBSIDIAN_CONNECT_TIMEOUT,
+    OBSIDIAN_POOL_SIZE,
+    OBSIDIAN_READ_TIMEOUT,
+)
+from assistant.espelho_documentos import espelho
+
+logger = logging.getLogger(__name__)
+
+
+class ErroBackend(requests.RequestException):
+    """
+    Falha de comunicação com o backend via httpx.
+    Herda de requests.RequestException para que os handlers existentes tratem os dois clientes igual.
+    """
+
+
+_cliente: httpx.AsyncClient | None = None
+
+
+def cliente() -> httpx.AsyncClient:
+    """Retorna o AsyncClient compartilhado (criado sob demanda, com pool keep-alive)."""
+    global _cliente
+    if _cliente is None or _cliente.is_closed:
+        _cliente = httpx.AsyncClient(
+            base_url=OBSIDIAN_API_BASE_URL.rstrip("/"),
+            headers=_sync._auth_headers(),
+            timeout=httpx.Timeout(OBSIDIAN_READ_TIMEOUT, connect=OBSIDIAN_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=OBSIDIAN_POOL_SIZE,
+                max_keepalive_connections=OBSIDIAN_POOL_SIZE,
+            ),
+        )
+    return _cliente
+
+
+async def fechar_cliente() -> None:
+    """Fecha as conexões do pool (usado no encerramento do bot)."""
+    global _cliente
+    if _cliente is not None:
+        await _cliente.aclose()
+        _cliente = None
+
+
+async def _requisitar(method: str, path: str, **kwargs: Any) -> Any:
+    """JSON da resposta (None se vazia); falha HTTP ou corpo que não é JSON vira ErroBackend."""
+    try:
+        resp = await cliente().request(method, path, **kwargs)
+        resp.raise_for_status()
+        if resp.status_code == 204 or not resp.content:
+            return None
+        return resp.json()
+    except httpx.HTTPError as e:
+        raise ErroBackend(f"{method} {path}: {e}") from e
+    except ValueError as e:
+        raise ErroBackend(f"{method} {path}: resposta não é JSON ({e})") from e
+
+
+async def listar_interesses() -> List[dict]:
+    return await _requisitar("GET", "/api/interests")
+
+
+async def listar_areas() -> List[dict]:
+    return await _requisitar("GET", "/api/areas")
+
+
+async def obter_taxonomia(forcar: bool = False) -> taxonomia.Taxonomia:
+    """Interesses e áreas do cache em processo (baixa do backend só quando expirado)."""
+    return await taxonomia.obter(_carregar_taxonomia, forcar=forcar)
+
+
+async def _carregar_taxonomia() -> tuple[List[dict], List[dict]]:
+    interesses, areas = await asyncio.gather(listar_interesses(), listar_areas())
+    return interesses, areas
+
+
+async def criar_interesse(name: str) -> dict:
+    criado = await _requisitar("POST", "/api/interests", json=_sync._payload_interesse(name))
+    taxonomia.invalidar()
+    return criado
+
+
+async def criar_area(name: str, interest_id: str) -> dict:
+    criado = await _requisitar("POST", "/api/areas", json=_sync._payload_area(name, interest_id))
+    taxonomia.invalidar()
+    return criado
+
+
+async def listar_documentos() -> List[dict]:
+    return await _requisitar("GET", "/api/documents")
+
+
+_sync_lock = asyncio.Lock()
+
+
+async def sincronizar_documentos(forcar: bool = False) -> None:
+    """
+    Atualiza o espelho local: baixa só o que mudou desde a marca d'água (GET /api/documents?since=)
+    e, a cada ESPELHO_RECONCILIAR_INTERVALO, confere os ids para remover documentos excluídos.
+    Backends sem suporte a `since` devolvem a lista completa, que é aplicada como reconciliação.
+    """
+    esp = espelho()
+    if not forcar and esp.segundos_desde("sincronizacao") < ESPELHO_SYNC_INTERVALO:
+        return
+    async with _sync_lock:
+        if not forcar and esp.segundos_desde("sincronizacao") < ESPELHO_SYNC_INTERVALO:
+            return
+        marca = esp.marca_dagua()
+        docs = await _requisitar("GET", "/api/documents", params={"since": marca} if marca else None) or []
+        completo = not marca or any("updatedAt" not in d for d in docs)
+        esp.aplicar_sincronizacao(docs, completo=completo)
+        if not completo and esp.segundos_desde("reconciliacao") >= ESPELHO_RECONCILIAR_INTERVALO:
+            ids = await _requisitar("GET", "/api/documents/ids") or []
+            esp.reconciliar(ids)
+        logger.debug("Espelho sincronizado: %d documento(s) recebido(s)", len(docs))
+
+
+async def criar_documento(title: str, content: str, interest: str = "", area: str = "", tags: Optional[List[str]] = None) -> dict:
+    payload = _sync._payload_documento(title, content, interest, area, tags)
+    criado = await _requisitar("POST", "/api/documents", json=payload)
+    espelho().registrar(criado or payload)
+    return criado
+
+
+async def atualizar_documento(doc_id: str, payload: dict) -> dict:
+    """Atualiza um documento (ideia) existente. payload pode conter title, content, interest, area, tags, etc."""
+    atualizado = await _requisitar("PATCH", f"/api/documents/{doc_id}", json=payload)
+    if atualizado:
+        espelho().registrar(atualizado)
+    return atualizado
+
+
+async def criar_card_planejamento(title: str, status: str = "todo", priority: str = "medium") -> dict:
+    return await _requisitar("POST", "/api/professional-planning/cards", json=_sync._payload_card(title, status, priority))
+
+
+async def atualizar_card_planejamento(card_id: str, payload: dict) -> dict:
+    """Atualiza um card do planejamento profissional. payload: title?, status?, priority?, isFinalized?."""
+    return await _requisitar("PATCH", f"/api/professional-planning/cards/{card_id}", json=payload)
+
+
+async def criar_card_planejamento_pessoal(title: str, status: str = "todo", priority: str = "medium") -> dict:
+    return await _requisitar("POST", "/api/personal-planning/cards", json=_sync._payload_card(title, status, priority))
+
+
+async def atualizar_card_planejamento_pessoal(card_id: str, payload: dict) -> dict:
+    """Atualiza um card do planejamento pessoal. payload: title?, status?, priority?, isFinalized?."""
+    return await _requisitar("PATCH", f"/api/personal-planning/cards/{card_id}", json=payload)
+
+
+async def listar_cards_planejamento() -> List[dict]:
+    return await _requisitar("GET", "/api/professional-planning/cards")
+
+
+async def listar_cards_planejamento_pessoal() -> List[dict]:
+    return await _requisitar("GET", "/api/personal-planning/cards")
+
+
+# --- Lembretes ---
+
+async def listar_lembretes() -> List[dict]:
+    return await _requisitar("GET", "/api/reminders")
+
+
+async def listar_lembretes_vencidos() -> List[dict]:
+    """Retorna lembretes que estão vencidos (devem ser disparados agora)."""
+    return await _requisitar("GET", "/api/reminders/due")
+
+
+async def criar_lembrete(
+    title: str,
+    first_due_at: str,
+    body: str = "",
+    recurrence: str = "once",
+) -> dict:
+    payload = _sync._payload_lembrete(title, first_due_at, body, recurrence)
+    return await _requisitar("POST", "/api/reminders", json=payload)
+
+
+async def marcar_lembrete_disparado(reminder_id: str) -> dict:
+    """Atualiza lastTriggeredAt para que o lembrete não seja reenviado até a próxima recorrência."""
+    return await _requisitar("PATCH", f"/api/reminders/{reminder_id}", json={"lastTriggeredAt": _sync._agora()})
+
+
+async def atualizar_lembrete(reminder_id: str, payload: dict) -> dict:
+    """Atualiza um lembrete (título, corpo, data, recorrência, etc.)."""
+    return await _requisitar("PATCH", f"/api/reminders/{reminder_id}", json=payload)
+
+
+# --- Operações de exclusão ---
+
+async def deletar_documento(doc_id: str) -> None:
+    """Remove permanentemente uma ideia/documento."""
+    await _requisitar("DELETE", f"/api/documents/{doc_id}")
+    espelho().remover(doc_id)
+
+
+async def deletar_card_planejamento(card_id: str) -> None:
+    """Remove permanentemente um card do planejamento empresarial."""
+    await _requisitar("DELETE", f"/api/professional-planning/cards/{card_id}")
+
+
+async def deletar_card_planejamento_pessoal(card_id: str) -> None:
+    """Remove permanentemente um card do planejamento pessoal."""
+    await _requisitar("DELETE", f"/api/personal-planning/cards/{card_id}")
+
+
+async def deletar_lembrete(reminder_id: str) -> None:
+    """Remove permanentemente um lembrete."""
+    await _requisitar("DELETE", f"/api/reminders/{reminder_id}")
+
+
+# --- Tarefas Diárias ---
+
+async def listar_tarefas_diarias() -> List[dict]:
+    """Lista as tarefas diárias de hoje."""
+    return await _requisitar("GET", "/api/daily-tasks")
+
+
+async def criar_tarefa_diaria(title: str) -> dict:
+    """Cria uma nova tarefa diária."""
+    return await _requisitar("POST", "/api/daily-tasks", json=_sync._payload_tarefa_diaria(title))
+
+
+async def atualizar_tarefa_diaria(task_id: str, done: bool) -> dict:
+    """Marca uma tarefa diária como concluída ou pendente."""
+    return await _requisitar("PATCH", f"/api/daily-tasks/{task_id}", json={"done": done})
+
+
+# --- Busca ---
+
+async def buscar_documentos(termo: str = "", interest: str = "", area: str = "", tag: str = "") -> List[dict]:
+    """Busca documentos no servidor com filtros opcionais."""
+    params = _sync._params_busca(termo, interest, area, tag)
+    return await _requisitar("GET", "/api/documents/search", params=params)
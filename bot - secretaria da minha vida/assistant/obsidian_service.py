@@ -1,15 +1,27 @@
 ﻿"""Cliente REST simples para o backend Obsidian_premium.
 Fornece funções para listar/criar/atualizar interesses, áreas, documentos, listas e cards de planejamento.
+Todas as chamadas passam por um ClienteBackend compartilhado (pool de conexões keep-alive).
 """
 from __future__ import annotations
 
 import logging
 import requests
+import threading
 import uuid
 from typing import Any, List, Optional
 from datetime import datetime
 
-from assistant.config import OBSIDIAN_API_BASE_URL, OPENROUTER_TIMEOUT, BOT_API_KEY
+from requests.adapters import HTTPAdapter
+
+from assistant import taxonomia
+from assistant.config import (
+    BOT_API_KEY,
+    OBSIDIAN_API_BASE_URL,
+    OBSIDIAN_CONNECT_TIMEOUT,
+    OBSIDIAN_POOL_SIZE,
+    OBSIDIAN_READ_TIMEOUT,
+)
+from assistant.espelho_documentos import espelho
 
 logger = logging.getLogger(__name__)
 
@@ -24,40 +36,87 @@ def _auth_headers() -> dict:
     return {}
 
 
-def listar_interesses() -> List[dict]:
-    resp = requests.get(_base("/api/interests"), headers=_auth_headers(), timeout=OPENROUTER_TIMEOUT)
-    resp.raise_for_status()
-    return resp.json()
+class ClienteBackend:
+    """
+    Sessão HTTP compartilhada com o backend: pool de conexões keep-alive,
+    headers de autenticação definidos uma única vez e timeouts separados
+    de conexão e leitura.
+    """
 
+    def __init__(
+        self,
+        pool_size: int = OBSIDIAN_POOL_SIZE,
+        connect_timeout: float = OBSIDIAN_CONNECT_TIMEOUT,
+        read_timeout: float = OBSIDIAN_READ_TIMEOUT,
+    ) -> None:
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = requests.Session()
+        self.session.headers.update(_auth_headers())
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
 
-def listar_areas() -> List[dict]:
-    resp = requests.get(_base("/api/areas"), headers=_auth_headers(), timeout=OPENROUTER_TIMEOUT)
-    resp.raise_for_status()
-    return resp.json()
+    def request(self, method: str, path: str, **kwargs: Any) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        resp = self.session.request(method, _base(path), **kwargs)
+        resp.raise_for_status()
+        return resp
 
+    def get(self, path: str, **kwargs: Any) -> Any:
+        return self.request("GET", path, **kwargs).json()
 
-def criar_interesse(name: str) -> dict:
-    payload = {"id": str(uuid.uuid4()), "name": name, "createdAt": datetime.utcnow().isoformat()}
-    resp = requests.post(_base("/api/interests"), json=payload, headers=_auth_headers(), timeout=OPENROUTER_TIMEOUT)
-    resp.raise_for_status()
-    return resp.json()
+    def post(self, path: str, json: dict, **kwargs: Any) -> Any:
+        return self.request("POST", path, json=json, **kwargs).json()
 
+    def patch(self, path: str, json: dict, **kwargs: Any) -> Any:
+        return self.request("PATCH", path, json=json, **kwargs).json()
 
-def criar_area(name: str, interest_id: str) -> dict:
-    payload = {"id": str(uuid.uuid4()), "name": name, "interestId": interest_id, "createdAt": datetime.utcnow().isoformat()}
-    resp = requests.post(_base("/api/areas"), json=payload, headers=_auth_headers(), timeout=OPENROUTER_TIMEOUT)
-    resp.raise_for_status()
-    return resp.json()
+    def delete(self, path: str, **kwargs: Any) -> None:
+        self.request("DELETE", path, **kwargs)
 
+    def close(self) -> None:
+        self.session.close()
 
-def listar_documentos() -> List[dict]:
-    resp = requests.get(_base("/api/documents"), headers=_auth_headers(), timeout=OPENROUTER_TIMEOUT)
-    resp.raise_for_status()
-    return resp.json()
 
+_cliente: ClienteBackend | None = None
+_cliente_lock = threading.Lock()
 
-def criar_documento(title: str, content: str, interest: str = "", area: str = "", tags: Optional[List[str]] = None) -> dict:
-    payload = {
+
+def cliente() -> ClienteBackend:
+    """Retorna o cliente compartilhado (criado sob demanda)."""
+    global _cliente
+    if _cliente is None:
+        with _cliente_lock:
+            if _cliente is None:
+                _cliente = ClienteBackend()
+    return _cliente
+
+
+def fechar_cliente() -> None:
+    """Fecha as conexões do pool (usado no encerramento do bot)."""
+    global _cliente
+    with _cliente_lock:
+        if _cliente is not None:
+            _cliente.close()
+            _cliente = None
+
+
+# --- Payloads (compartilhados com obsidian_async) ---
+
+def _agora() -> str:
+    return datetime.utcnow().isoformat()
+
+
+def _payload_interesse(name: str) -> dict:
+    return {"id": str(uuid.uuid4()), "name": name, "createdAt": _agora()}
+
+
+def _payload_area(name: str, interest_id: str) -> dict:
+    return {"id": str(uuid.uuid4()), "name": name, "interestId": interest_id, "createdAt": _agora()}
+
+
+def _payload_documento(title: str, content: str, interest: str, area: str, tags: Optional[List[str]]) -> dict:
+    return {
         "id": str(uuid.uuid4()),
         "title": title or "Sem título",
         "cover": "",
@@ -66,89 +125,130 @@ def criar_documento(title: str, content: str, interest: str = "", area: str = ""
         "area": area or "",
         "tags": tags or [],
         "relations": [],
-        "createdAt": datetime.utcnow().isoformat(),
+        "createdAt": _agora(),
     }
-    resp = requests.post(_base("/api/documents"), json=payload, headers=_auth_headers(), timeout=OPENROUTER_TIMEOUT)
-    resp.raise_for_status()
-    return resp.json()
 
 
-def atualizar_documento(doc_id: str, payload: dict) -> dict:
-    """Atualiza um documento (ideia) existente. payload pode conter title, content, interest, area, tags, etc."""
-    resp = requests.patch(_base(f"/api/documents/{doc_id}"), json=payload, headers=_auth_headers(), timeout=OPENROUTER_TIMEOUT)
-    resp.raise_for_status()
-    return resp.json()
-
-
-def criar_card_planejamento(title: str, status: str = "todo", priority: str = "medium") -> dict:
-    payload = {
+def _payload_card(title: str, status: str, priority: str) -> dict:
+    return {
         "id": str(uuid.uuid4()),
         "title": title,
         "status": status,
         "priority": priority,
         "isFinalized": False,
-        "createdAt": datetime.utcnow().isoformat(),
-        "updatedAt": datetime.utcnow().isoformat(),
+        "createdAt": _agora(),
+        "updatedAt": _agora(),
     }
-    resp = requests.post(_base("/api/professional-planning/cards"), json=payload, headers=_auth_headers(), timeout=OPENROUTER_TIMEOUT)
-    resp.raise_for_status()
-    return resp.json()
 
 
-def atualizar_card_planejamento(card_id: str, payload: dict) -> dict:
-    """Atualiza um card do planejamento profissional. payload: title?, status?, priority?, isFinalized?."""
-    resp = requests.patch(_base(f"/api/professional-planning/cards/{card_id}"), json=payload, headers=_auth_headers(), timeout=OPENROUTER_TIMEOUT)
-    resp.raise_for_status()
-    return resp.json()
+def _payload_lembrete(title: str, first_due_at: str, body: str, recurrence: str) -> dict:
+    return {
+        "id": str(uuid.uuid4()),
+        "title": title.strip(),
+        "body": (body or "").strip(),
+        "firstDueAt": first_due_at,
+        "recurrence": recurrence if recurrence in ("once", "daily", "every_2_days", "weekly") else "once",
+        "createdAt": _agora(),
+        "updatedAt": _agora(),
+    }
 
 
-def criar_card_planejamento_pessoal(title: str, status: str = "todo", priority: str = "medium") -> dict:
-    payload = {
+def _payload_tarefa_diaria(title: str) -> dict:
+    return {
         "id": str(uuid.uuid4()),
         "title": title,
-        "status": status,
-        "priority": priority,
-        "isFinalized": False,
-        "createdAt": datetime.utcnow().isoformat(),
-        "updatedAt": datetime.utcnow().isoformat(),
+        "done": False,
+        "createdAt": _agora(),
     }
-    resp = requests.post(_base("/api/personal-planning/cards"), json=payload, headers=_auth_headers(), timeout=OPENROUTER_TIMEOUT)
-    resp.raise_for_status()
-    return resp.json()
+
+
+def _params_busca(termo: str, interest: str, area: str, tag: str) -> dict:
+    params: dict = {}
+    if termo:
+        params["q"] = termo
+    if interest:
+        params["interest"] = interest
+    if area:
+        params["area"] = area
+    if tag:
+        params["tag"] = tag
+    return params
+
+
+def listar_interesses() -> List[dict]:
+    return cliente().get("/api/interests")
+
+
+def listar_areas() -> List[dict]:
+    return cliente().get("/api/areas")
+
+
+def criar_interesse(name: str) -> dict:
+    criado = cliente().post("/api/interests", json=_payload_interesse(name))
+    taxonomia.invalidar()
+    return criado
+
+
+def criar_area(name: str, interest_id: str) -> dict:
+    criado = cliente().post("/api/areas", json=_payload_area(name, interest_id))
+    taxonomia.invalidar()
+    return criado
+
+
+def listar_documentos() -> List[dict]:
+    return cliente().get("/api/documents")
+
+
+def criar_documento(title: str, content: str, interest: str = "", area: str = "", tags: Optional[List[str]] = None) -> dict:
+    payload = _payload_documento(title, content, interest, area, tags)
+    criado = cliente().post("/api/documents", json=payload)
+    espelho().registrar(criado or payload)
+    return criado
+
+
+def atualizar_documento(doc_id: str, payload: dict) -> dict:
+    """Atualiza um documento (ideia) existente. payload pode conter title, content, interest, area, tags, etc."""
+    atualizado = cliente().patch(f"/api/documents/{doc_id}", json=payload)
+    if atualizado:
+        espelho().registrar(atualizado)
+    return atualizado
+
+
+def criar_card_planejamento(title: str, status: str = "todo", priority: str = "medium") -> dict:
+    return cliente().post("/api/professional-planning/cards", json=_payload_card(title, status, priority))
+
+
+def atualizar_card_planejamento(card_id: str, payload: dict) -> dict:
+    """Atualiza um card do planejamento profissional. payload: title?, status?, priority?, isFinalized?."""
+    return cliente().patch(f"/api/professional-planning/cards/{card_id}", json=payload)
+
+
+def criar_card_planejamento_pessoal(title: str, status: str = "todo", priority: str = "medium") -> dict:
+    return cliente().post("/api/personal-planning/cards", json=_payload_card(title, status, priority))
 
 
 def atualizar_card_planejamento_pessoal(card_id: str, payload: dict) -> dict:
     """Atualiza um card do planejamento pessoal. payload: title?, status?, priority?, isFinalized?."""
-    resp = requests.patch(_base(f"/api/personal-planning/cards/{card_id}"), json=payload, headers=_auth_headers(), timeout=OPENROUTER_TIMEOUT)
-    resp.raise_for_status()
-    return resp.json()
+    return cliente().patch(f"/api/personal-planning/cards/{card_id}", json=payload)
 
 
 def listar_cards_planejamento() -> List[dict]:
-    resp = requests.get(_base("/api/professional-planning/cards"), headers=_auth_headers(), timeout=OPENROUTER_TIMEOUT)
-    resp.raise_for_status()
-    return resp.json()
+    return cliente().get("/api/professional-planning/cards")
 
 
 def listar_cards_planejamento_pessoal() -> List[dict]:
-    resp = requests.get(_base("/api/personal-planning/cards"), headers=_auth_headers(), timeout=OPENROUTER_TIMEOUT)
-    resp.raise_for_status()
-    return resp.json()
+    return cliente().get("/api/personal-planning/cards")
 
 
 # --- Lembretes ---
 
 def listar_lembretes() -> List[dict]:
-    resp = requests.get(_base("/api/reminders"), headers=_auth_headers(), timeout=OPENROUTER_TIMEOUT)
-    resp.raise_for_status()
-    return resp.json()
+    return cliente().get("/api/reminders")
 
 
 def listar_lembretes_vencidos() -> List[dict]:
     """Retorna lembretes que estão vencidos (devem ser disparados agora)."""
-    resp = requests.get(_base("/api/reminders/due"), headers=_auth_headers(), timeout=OPENROUTER_TIMEOUT)
-    resp.raise_for_status()
-    return resp.json()
+    return cliente().get("/api/reminders/due")
 
 
 def criar_lembrete(
@@ -157,109 +257,61 @@ def criar_lembrete(
     body: str = "",
     recurrence: str = "once",
 ) -> dict:
-    payload = {
-        "id": str(uuid.uuid4()),
-        "title": title.strip(),
-        "body": (body or "").strip(),
-        "firstDueAt": first_due_at,
-        "recurrence": recurrence if recurrence in ("once", "daily", "every_2_days", "weekly") else "once",
-        "createdAt": datetime.utcnow().isoformat(),
-        "updatedAt": datetime.utcnow().isoformat(),
-    }
-    resp = requests.post(_base("/api/reminders"), json=payload, headers=_auth_headers(), timeout=OPENROUTER_TIMEOUT)
-    resp.raise_for_status()
-    return resp.json()
+    return cliente().post("/api/reminders", json=_payload_lembrete(title, first_due_at, body, recurrence))
 
 
 def marcar_lembrete_disparado(reminder_id: str) -> dict:
     """Atualiza lastTriggeredAt para que o lembrete não seja reenviado até a próxima recorrência."""
-    now = datetime.utcnow().isoformat()
-    resp = requests.patch(
-        _base(f"/api/reminders/{reminder_id}"),
-        json={"lastTriggeredAt": now},
-        headers=_auth_headers(),
-        timeout=OPENROUTER_TIMEOUT,
-    )
-    resp.raise_for_status()
-    return resp.json()
+    return cliente().patch(f"/api/reminders/{reminder_id}", json={"lastTriggeredAt": _agora()})
 
 
 def atualizar_lembrete(reminder_id: str, payload: dict) -> dict:
     """Atualiza um lembrete (título, corpo, data, recorrência, etc.)."""
-    resp = requests.patch(_base(f"/api/reminders/{reminder_id}"), json=payload, headers=_auth_headers(), timeout=OPENROUTER_TIMEOUT)
-    resp.raise_for_status()
-    return resp.json()
+    return cliente().patch(f"/api/reminders/{reminder_id}", json=payload)
 
 
 # --- Operações de exclusão ---
 
 def deletar_documento(doc_id: str) -> None:
     """Remove permanentemente uma ideia/documento."""
-    resp = requests.delete(_base(f"/api/documents/{doc_id}"), headers=_auth_headers(), timeout=OPENROUTER_TIMEOUT)
-    resp.raise_for_status()
+    cliente().delete(f"/api/documents/{doc_id}")
+    espelho().remover(doc_id)
 
 
 def deletar_card_planejamento(card_id: str) -> None:
     """Remove permanentemente um card do planejamento empresarial."""
-    resp = requests.delete(_base(f"/api/professional-planning/cards/{card_id}"), headers=_auth_headers(), timeout=OPENROUTER_TIMEOUT)
-    resp.raise_for_status()
+    cliente().delete(f"/api/professional-planning/cards/{card_id}")
 
 
 def deletar_card_planejamento_pessoal(card_id: str) -> None:
     """Remove permanentemente um card do planejamento pessoal."""
-    resp = requests.delete(_base(f"/api/personal-planning/cards/{card_id}"), headers=_auth_headers(), timeout=OPENROUTER_TIMEOUT)
-    resp.raise_for_status()
+    cliente().delete(f"/api/personal-planning/cards/{card_id}")
 
 
 def deletar_lembrete(reminder_id: str) -> None:
     """Remove permanentemente um lembrete."""
-    resp = requests.delete(_base(f"/api/reminders/{reminder_id}"), headers=_auth_headers(), timeout=OPENROUTER_TIMEOUT)
-    resp.raise_for_status()
+    cliente().delete(f"/api/reminders/{reminder_id}")
 
 
 # --- Tarefas Diárias ---
 
 def listar_tarefas_diarias() -> List[dict]:
     """Lista as tarefas diárias de hoje."""
-    resp = requests.get(_base("/api/daily-tasks"), headers=_auth_headers(), timeout=OPENROUTER_TIMEOUT)
-    resp.raise_for_status()
-    return resp.json()
+    return cliente().get("/api/daily-tasks")
 
 
 def criar_tarefa_diaria(title: str) -> dict:
     """Cria uma nova tarefa diária."""
-    payload = {
-        "id": str(uuid.uuid4()),
-        "title": title,
-        "done": False,
-        "createdAt": datetime.utcnow().isoformat(),
-    }
-    resp = requests.post(_base("/api/daily-tasks"), json=payload, headers=_auth_headers(), timeout=OPENROUTER_TIMEOUT)
-    resp.raise_for_status()
-    return resp.json()
+    return cliente().post("/api/daily-tasks", json=_payload_tarefa_diaria(title))
 
 
 def atualizar_tarefa_diaria(task_id: str, done: bool) -> dict:
     """Marca uma tarefa diária como concluída ou pendente."""
-    resp = requests.patch(_base(f"/api/daily-tasks/{task_id}"), json={"done": done}, headers=_auth_headers(), timeout=OPENROUTER_TIMEOUT)
-    resp.raise_for_status()
-    return resp.json()
+    return cliente().patch(f"/api/daily-tasks/{task_id}", json={"done": done})
 
 
 # --- Busca ---
 
 def buscar_documentos(termo: str = "", interest: str = "", area: str = "", tag: str = "") -> List[dict]:
     """Busca documentos no servidor com filtros opcionais."""
-    params: dict = {}
-    if termo:
-        params["q"] = termo
-    if interest:
-        params["interest"] = interest
-    if area:
-        params["area"] = area
-    if tag:
-        params["tag"] = tag
-    resp = requests.get(_base("/api/documents/search"), params=params, headers=_auth_headers(), timeout=OPENROUTER_TIMEOUT)
-    resp.raise_for_status()
-    return resp.json()
-
+    return cliente().get("/api/documents/search", params=_params_busca(termo, interest, area, tag))
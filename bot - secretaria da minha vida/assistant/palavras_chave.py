@@ -0,0 +1,64 @@
+"""
+Casamento de várias listas de palavras-chave numa única passada (autômato de Aho–Corasick).
+Texto e palavras são normalizados da mesma forma (minúsculas, sem acento, pontuação vira espaço),
+então "áreas", "areas" e "Áreas?" casam igual. Mantém a semântica de substring do `k in texto`.
+"""
+from __future__ import annotations
+
+from collections import deque
+from typing import Iterable
+
+from assistant.busca_nomes import chave
+
+
+class CasadorPalavras:
+    """
+    classes: {nome_da_classe: palavras}. casar(texto) devolve o conjunto de classes com
+    pelo menos uma palavra contida no texto, percorrendo o texto uma única vez.
+    """
+
+    def __init__(self, classes: dict[str, Iterable[str]]) -> None:
+        # Nó i: transições em _goto[i], classes que terminam nele (já unidas às do sufixo) em _saida[i]
+        self._goto: list[dict[str, int]] = [{}]
+        saidas: list[set[str]] = [set()]
+        for nome, palavras in classes.items():
+            for palavra in palavras:
+                k = chave(palavra)
+                if not k:
+                    continue
+                no = 0
+                for c in k:
+                    prox = self._goto[no].get(c)
+                    if prox is None:
+                        prox = len(self._goto)
+                        self._goto[no][c] = prox
+                        self._goto.append({})
+                        saidas.append(set())
+                    no = prox
+                saidas[no].add(nome)
+        # Links de falha em largura; a saída de cada nó inclui a do seu link de falha
+        self._falha = [0] * len(self._goto)
+        fila = deque(self._goto[0].values())
+        while fila:
+            no = fila.popleft()
+            for c, filho in self._goto[no].items():
+                f = self._falha[no]
+                while f and c not in self._goto[f]:
+                    f = self._falha[f]
+                self._falha[filho] = self._goto[f].get(c, 0)
+                saidas[filho] |= saidas[self._falha[filho]]
+                fila.append(filho)
+        self._saida = [frozenset(s) for s in saidas]
+
+    def casar(self, texto: str) -> frozenset[str]:
+        """Classes cujas palavras aparecem em `texto` (após normalização)."""
+        goto, falha, saida = self._goto, self._falha, self._saida
+        encontradas: set[str] = set()
+        no = 0
+        for c in chave(texto):
+            while no and c not in goto[no]:
+                no = falha[no]
+            no = goto[no].get(c, 0)
+            if saida[no]:
+                encontradas |= saida[no]
+        return frozenset(encontradas)
@@ -0,0 +1,134 @@
+"""
+Montagem do prompt de sistema da conversa com orçamento de tokens.
+O prompt é montado em ordem fixa para aproveitar o cache de prompt do provedor:
+prefixo estável (regras, sempre igual) → exemplos da família de intenção prevista → seções
+variáveis (hierarquia de interesses/áreas, contexto da memória). Os exemplos são os primeiros
+a sair quando o orçamento (PROMPT_ORCAMENTO_TOKENS) estoura.
+"""
+from __future__ import annotations
+
+import logging
+import math
+import re
+
+from assistant.busca_nomes import chave
+
+logger = logging.getLogger(__name__)
+
+# Palavras-chave (sem acento, minúsculas) que indicam cada família de intenção
+PALAVRAS_FAMILIA = {
+    "ideia": ("guardar", "guarde", "salvar", "salve", "anotar", "anote", "registre", "registrar",
+              "ideia", "nota", "gravar", "grave", "buscar", "busque", "procure"),
+    "lembrete": ("lembre", "lembrete", "avise", "notifique", "alarme"),
+    "planejamento": ("planejamento", "empresarial", "pessoal", "projeto", "tarefa", "prioridade", "card"),
+    "tarefa_diaria": ("hoje", "diaria", "do dia", "concluir", "conclui", "feito", "feita"),
+    "exclusao": ("excluir", "exclua", "apagar", "apague", "remover", "remova", "deletar", "delete"),
+    "categorias": ("categoria", "interesse", "area"),
+}
+# Família sempre incluída (exemplo curto de conversa livre)
+FAMILIA_PADRAO = "conversa"
+
+# Palavras-chave por família já quebradas em palavras normalizadas ("do dia" -> ("do", "dia"))
+_CHAVES_FAMILIA = {
+    familia: tuple(tuple(chave(p).split()) for p in palavras) for familia, palavras in PALAVRAS_FAMILIA.items()
+}
+# Palavras-chave mais curtas que isto casam só com a palavra inteira ou o plural ("card" não casa "cardapio")
+_PREFIXO_MINIMO = 5
+
+_RE_TOKEN = re.compile(r"\w+|[^\w\s]")
+
+
+def estimar_tokens(texto: str) -> int:
+    """
+    Estimativa de tokens sem tokenizer: palavras + pontuação, com fator 1.3 para subpalavras
+    (português com BPE costuma quebrar palavras longas e acentuadas).
+    """
+    return math.ceil(len(_RE_TOKEN.findall(texto or "")) * 1.3)
+
+
+def _casa_palavra(palavra: str, chave_: str) -> bool:
+    if len(chave_) < _PREFIXO_MINIMO:
+        return palavra in (chave_, chave_ + "s")
+    return palavra.startswith(chave_)
+
+
+def _contem(palavras: list[str], chave_: tuple[str, ...]) -> bool:
+    """A palavra-chave aparece em `palavras` como sequência de palavras, cada uma casando por prefixo."""
+    n = len(chave_)
+    return any(
+        all(_casa_palavra(p, c) for p, c in zip(palavras[i:i + n], chave_))
+        for i in range(len(palavras) - n + 1)
+    )
+
+
+def prever_familias(texto: str) -> set[str]:
+    """Famílias de intenção sugeridas pelas palavras da mensagem (vazio se nenhuma casar)."""
+    palavras = chave(texto).split()
+    return {
+        familia for familia, chaves in _CHAVES_FAMILIA.items()
+        if any(_contem(palavras, c) for c in chaves)
+    }
+
+
+class ConstrutorPrompt:
+    """
+    prefixo: regras fixas (sempre enviadas, primeiro).
+    grupos: [(cabecalho, [(familia, linha_exemplo), ...]), ...] na ordem em que aparecem no prompt.
+    """
+
+    def __init__(self, prefixo: str, grupos: list[tuple[str, list[tuple[str, str]]]], orcamento: int) -> None:
+        self.prefixo = prefixo
+        self.grupos = grupos
+        self.orcamento = orcamento
+        self._tokens_prefixo = estimar_tokens(prefixo)
+        self._tokens_exemplo = {
+            linha: estimar_tokens(linha) for _, exemplos in grupos for _, linha in exemplos
+        }
+        self._tokens_todos = estimar_tokens(self._todos_exemplos())
+
+    def _todos_exemplos(self) -> str:
+        return "".join(
+            f"\n\n{cabecalho}\n" + "\n".join(linha for _, linha in exemplos)
+            for cabecalho, exemplos in self.grupos
+        )
+
+    def montar(self, texto: str, secoes: list[str]) -> str:
+        """
+        Prompt de sistema para a mensagem `texto`. `secoes` (já formatadas) vão depois dos exemplos.
+        Sem famílias previstas, tenta enviar todos os exemplos dentro do orçamento.
+        """
+        secoes = [s for s in secoes if s]
+        tokens_secoes = sum(estimar_tokens(s) for s in secoes)
+        disponivel = self.orcamento - self._tokens_prefixo - tokens_secoes
+        if disponivel < 0:
+            logger.warning(
+                "Prompt acima do orçamento só com regras e contexto (%d > %d tokens)",
+                self._tokens_prefixo + tokens_secoes, self.orcamento,
+            )
+
+        familias = prever_familias(texto)
+        relevantes = (familias | {FAMILIA_PADRAO}) if familias else None
+        partes = [self.prefixo]
+        usados = 0
+        for cabecalho, exemplos in self.grupos:
+            escolhidos = []
+            for familia, linha in exemplos:
+                if relevantes is not None and familia not in relevantes:
+                    continue
+                custo = self._tokens_exemplo[linha]
+                if usados + custo > disponivel:
+                    continue
+                escolhidos.append(linha)
+                usados += custo
+            if escolhidos:
+                partes.append(f"{cabecalho}\n" + "\n".join(escolhidos))
+        partes.extend(secoes)
+        system = "\n\n".join(partes)
+
+        total = self._tokens_prefixo + usados + tokens_secoes
+        completo = self._tokens_prefixo + self._tokens_todos + tokens_secoes
+        logger.info(
+            "Prompt: ~%d tokens (famílias: %s; economia de ~%d tokens frente ao prompt completo)",
+            total, ",".join(sorted(familias)) or "todas", max(0, completo - total),
+        )
+        return system
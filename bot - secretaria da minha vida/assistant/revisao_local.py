@@ -0,0 +1,219 @@
+"""
+Revisão local de textos curtos antes das chamadas de correção/refino da LLM.
+Conserta espaçamento, maiúscula no início das frases e acentos faltando quando a forma acentuada
+é a única do léxico (palavras_ptbr.txt) que casa sem acento ("reuniao" -> "reunião"). Se sobrar
+alguma palavra desconhecida ou ambígua ("esta"/"está"; "e"/"é" ou "a"/"à" quando falta acento em
+outra palavra do texto), o texto é longo demais ou está todo em maiúsculas, devolve None e a
+chamada segue para a LLM. Conta chamadas verificadas/puladas por tarefa (exibidas em /metricas).
+"""
+from __future__ import annotations
+
+import functools
+import logging
+import re
+import threading
+import unicodedata
+from pathlib import Path
+
+from assistant.config import REVISAO_LOCAL, REVISAO_LOCAL_MAX_PALAVRAS
+
+logger = logging.getLogger(__name__)
+
+_ARQUIVO_LEXICO = Path(__file__).with_name("palavras_ptbr.txt")
+
+# Terminações dos verbos regulares marcados com "*" no léxico
+_TERMINACOES = {
+    "ar": (
+        "o", "a", "as", "amos", "am", "ei", "ou", "aste", "aram", "ava", "avam", "ando", "ado", "ada",
+        "ados", "adas", "ar", "ará", "arão", "arei", "aremos", "aria", "ariam", "e", "es", "em", "emos",
+    ),
+    "er": (
+        "o", "e", "es", "emos", "em", "i", "eu", "eram", "ia", "iam", "endo", "ido", "ida", "idos",
+        "idas", "er", "erá", "erão", "erei", "eremos", "eria", "eriam", "a", "as", "am", "amos",
+    ),
+    "ir": (
+        "o", "e", "es", "imos", "em", "i", "iu", "iram", "ia", "iam", "indo", "ido", "ida", "idos",
+        "idas", "ir", "irá", "irão", "irei", "iremos", "iria", "iriam", "a", "as", "am", "amos",
+    ),
+}
+_VOGAIS = set("aeiouáéíóúâêôà")
+_PALAVRA = re.compile(r"\w+(?:-\w+)*")
+_SIGLA_MAX = 5  # palavras em maiúsculas até este tamanho são tratadas como siglas (CNPJ, API)
+# Formas válidas sem acento que quase sempre são erro de acentuação em títulos curtos
+# ("esta pronto", "inicio do projeto", "so hoje"): o texto segue para a LLM, que tem o contexto.
+_AMBIGUAS = frozenset({
+    "so", "esta", "estas", "inicio", "negocio", "negocios", "publico", "publicos", "pais", "mes",
+})
+
+_contagem: dict[str, list[int]] = {}  # tarefa -> [verificadas, puladas]
+_lock = threading.Lock()
+
+
+def _sem_acento(texto: str) -> str:
+    return unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode()
+
+
+def _conjugar(infinitivo: str) -> set[str]:
+    radical, grupo = infinitivo[:-2], infinitivo[-2:]
+    formas = {infinitivo}
+    for fim in _TERMINACOES.get(grupo, ()):
+        r = radical
+        if grupo == "ar" and fim[0] in "eé":
+            # ficar -> fique, pagar -> pague, começar -> comece
+            r = {"c": r[:-1] + "qu", "g": r[:-1] + "gu", "ç": r[:-1] + "c"}.get(r[-1:], r)
+        elif grupo != "ar" and fim[0] in "oa":
+            # conhecer -> conheço, corrigir -> corrijo
+            r = {"c": r[:-1] + "ç", "g": r[:-1] + "j"}.get(r[-1:], r)
+        formas.add(r + fim)
+    return formas
+
+
+def _flexionar(palavra: str) -> set[str]:
+    """A palavra, o plural regular e, para terminações -o/-or, o feminino (palavras curtas ficam como estão)."""
+    formas = {palavra}
+    if len(palavra) <= 3:
+        return formas
+    if palavra.endswith("o"):
+        formas.add(palavra[:-1] + "a")
+    elif palavra.endswith("or"):
+        formas.add(palavra + "a")
+    for f in list(formas):
+        if f.endswith("ão"):
+            formas.update((f[:-2] + "ões", f[:-2] + "ães", f + "s"))
+        elif f[-1] in _VOGAIS:
+            formas.add(f + "s")
+        elif f.endswith("m"):
+            formas.add(f[:-1] + "ns")
+        elif f[-1] in "rz":
+            formas.add(f + "es")
+        elif f.endswith(("al", "ol", "ul")):
+            formas.add(f[:-1] + "is")
+        elif f.endswith("el"):
+            formas.add(f[:-2] + "éis")
+        elif f.endswith("il"):
+            formas.add(f[:-1] + "s")
+    return formas
+
+
+@functools.lru_cache(maxsize=1)
+def _lexico() -> tuple[frozenset[str], dict[str, str], frozenset[str]]:
+    """
+    (palavras aceitas, {forma sem acento: única forma acentuada do léxico}, palavras válidas cuja
+    forma acentuada também está no léxico: e/é, a/à, de/dê, nos/nós, tem/têm...).
+    """
+    palavras: set[str] = set()
+    try:
+        linhas = _ARQUIVO_LEXICO.read_text(encoding="utf-8").splitlines()
+    except OSError as e:
+        logger.warning("Léxico da revisão local indisponível (%s); correções seguem para a LLM", e)
+        linhas = []
+    for linha in linhas:
+        for token in linha.split("#", 1)[0].lower().split():
+            palavras |= _conjugar(token[:-1]) if token.endswith("*") else _flexionar(token)
+    candidatas: dict[str, set[str]] = {}
+    com_par: set[str] = set()
+    for p in palavras:
+        base = _sem_acento(p)
+        if base == p:
+            continue
+        if base in palavras:
+            com_par.add(base)
+        else:
+            candidatas.setdefault(base, set()).add(p)
+    acentos = {base: next(iter(formas)) for base, formas in candidatas.items() if len(formas) == 1}
+    return frozenset(palavras), acentos, frozenset(com_par)
+
+
+def _espacar(texto: str) -> str:
+    """Espaços repetidos, espaço antes de pontuação e falta de espaço depois de vírgula/ponto e vírgula."""
+    linhas = (re.sub(r"[ \t]+", " ", linha).strip() for linha in texto.splitlines())
+    t = "\n".join(linha for linha in linhas if linha)
+    t = re.sub(r" +([,.;:!?])", r"\1", t)
+    return re.sub(r"([,;])(?=[^\W\d_])", r"\1 ", t)
+
+
+def _capitalizar(texto: str) -> str:
+    return re.sub(r"(^|[.!?] |\n)([^\W\d_])", lambda m: m.group(1) + m.group(2).upper(), texto)
+
+
+def revisar(texto: str) -> str | None:
+    """Texto revisado se todas as palavras forem conhecidas (ou consertáveis), senão None."""
+    texto = _espacar(texto or "")
+    ocorrencias = list(_PALAVRA.finditer(texto))
+    if not ocorrencias or len(ocorrencias) > REVISAO_LOCAL_MAX_PALAVRAS:
+        return None
+    letras = [m.group() for m in ocorrencias if not any(c.isdigit() for c in m.group())]
+    if sum(p.isupper() and len(p) > 1 for p in letras) * 2 > len(letras):
+        return None
+    palavras, acentos, com_par = _lexico()
+    trocas: list[tuple[int, int, str]] = []
+    duvidosa = False
+    for m in ocorrencias:
+        palavra = m.group()
+        if palavra.lower() in _AMBIGUAS:
+            return None
+        duvidosa = duvidosa or palavra.lower() in com_par
+        if any(c.isdigit() for c in palavra) or palavra.lower() in palavras:
+            continue
+        if palavra.isupper() and len(palavra) <= _SIGLA_MAX:
+            continue
+        antes = texto[:m.start()].rstrip()
+        inicio_frase = not antes or antes[-1] in ".!?\n"
+        if palavra[0].isupper() and not inicio_frase:
+            continue  # nome próprio
+        if any(c.isupper() for c in palavra[1:]):
+            continue  # marca/sigla mista (iPhone, WhatsApp)
+        acentuada = acentos.get(palavra.lower())
+        if acentuada is None:
+            return None
+        if palavra[0].isupper():
+            acentuada = acentuada[0].upper() + acentuada[1:]
+        trocas.append((m.start(), m.end(), acentuada))
+    if duvidosa and trocas:
+        return None  # quem escreveu "reuniao" sem acento pode ter escrito "e" por "é"
+    for inicio, fim, nova in reversed(trocas):
+        texto = texto[:inicio] + nova + texto[fim:]
+    return _capitalizar(texto)
+
+
+def _registrar(tarefa: str, pulou: bool) -> None:
+    with _lock:
+        contagem = _contagem.setdefault(tarefa, [0, 0])
+        contagem[0] += 1
+        contagem[1] += pulou
+
+
+def corrigir_titulo_resumo(titulo: str, resumo: str) -> dict | None:
+    """{"titulo", "resumo"} revisados localmente, ou None se a correção precisar da LLM."""
+    if not REVISAO_LOCAL:
+        return None
+    out_titulo = revisar(titulo) if titulo else ""
+    out_resumo = revisar(resumo) if resumo else ""
+    pulou = out_titulo is not None and out_resumo is not None
+    _registrar("corrigir_titulo_resumo", pulou)
+    if not pulou:
+        return None
+    return {"titulo": out_titulo or titulo, "resumo": out_resumo}
+
+
+def refinar_ideia(titulo: str, corpo: str) -> dict | None:
+    """
+    {"titulo", "descricao", "corpo"} para ideias curtas já corretas (a descrição é o próprio texto),
+    ou None se o refino precisar da LLM.
+    """
+    if not REVISAO_LOCAL:
+        return None
+    out_titulo = revisar(titulo) if titulo else ""
+    out_corpo = revisar(corpo) if corpo else ""
+    pulou = out_titulo is not None and out_corpo is not None
+    _registrar("refinar_ideia", pulou)
+    if not pulou:
+        return None
+    out_titulo = (out_titulo or out_corpo.splitlines()[0])[:255]
+    return {"titulo": out_titulo, "descricao": out_corpo or out_titulo, "corpo": out_corpo or out_titulo}
+
+
+def estatisticas() -> dict[str, dict]:
+    """{tarefa: {"verificadas", "puladas"}} desde o início do processo."""
+    with _lock:
+        return {t: {"verificadas": v, "puladas": p} for t, (v, p) in _contagem.items()}
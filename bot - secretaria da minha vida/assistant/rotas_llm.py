@@ -0,0 +1,97 @@
+"""
+Rotas das chamadas à LLM por tipo (conversa, refino, correção, escolha de par): modelo, max_tokens,
+timeout e orçamento de latência vêm de LLM_ROTAS. Uma rota que estoura o orçamento
+LLM_REBAIXAR_APOS vezes seguidas é rebaixada para o próximo modelo da sua cadeia e volta ao
+original depois de LLM_REBAIXAMENTO_DURACAO segundos.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+
+from assistant.config import (
+    LLM_CADEIAS,
+    LLM_REBAIXAMENTO_DURACAO,
+    LLM_REBAIXAR_APOS,
+    LLM_ROTAS,
+    OPENROUTER_MODEL,
+    OPENROUTER_MODELOS_RESERVA,
+    OPENROUTER_TIMEOUT,
+)
+
+logger = logging.getLogger(__name__)
+
+_ROTA_PADRAO = {
+    "modelo": OPENROUTER_MODEL,
+    "max_tokens": 0,
+    "timeout": OPENROUTER_TIMEOUT,
+    "orcamento": 0.0,
+    "prioridade": 1,
+}
+
+# tarefa -> {"nivel": posição na cadeia, "estouros": estouros seguidos, "desde": momento do rebaixamento}
+_estado: dict[str, dict] = {}
+_lock = threading.Lock()
+
+
+def rota(tarefa: str) -> dict:
+    """{"modelo", "max_tokens", "timeout", "orcamento", "prioridade"} da tarefa (padrão para tarefas sem rota)."""
+    return LLM_ROTAS.get(tarefa, _ROTA_PADRAO)
+
+
+def _cadeia_base(tarefa: str) -> list[str]:
+    if tarefa in LLM_CADEIAS:
+        return LLM_CADEIAS[tarefa]
+    principal = rota(tarefa)["modelo"]
+    return [principal, *(m for m in OPENROUTER_MODELOS_RESERVA if m != principal)]
+
+
+def cadeia(tarefa: str) -> list[str]:
+    """Modelos a usar na tarefa, a partir do nível atual (o primeiro é o que recebe o pedido)."""
+    base = _cadeia_base(tarefa)
+    with _lock:
+        est = _estado.get(tarefa)
+        if est and est["nivel"] and time.monotonic() - est["desde"] >= LLM_REBAIXAMENTO_DURACAO:
+            logger.info("Rota %s volta ao modelo %s", tarefa, base[0])
+            est["nivel"] = 0
+            est["estouros"] = 0
+        nivel = est["nivel"] if est else 0
+    return base[min(nivel, len(base) - 1):]
+
+
+def registrar(tarefa: str, duracao: float, ok: bool = True) -> None:
+    """
+    Conta a chamada contra o orçamento da rota. Falhas rápidas não zeram a sequência de estouros;
+    falhas lentas (ex.: timeout) contam como estouro.
+    """
+    orcamento = rota(tarefa)["orcamento"]
+    if not orcamento or not LLM_REBAIXAR_APOS or (not ok and duracao <= orcamento):
+        return
+    base = _cadeia_base(tarefa)
+    with _lock:
+        est = _estado.setdefault(tarefa, {"nivel": 0, "estouros": 0, "desde": 0.0})
+        if duracao <= orcamento:
+            est["estouros"] = 0
+            return
+        est["estouros"] += 1
+        if est["estouros"] >= LLM_REBAIXAR_APOS and est["nivel"] < len(base) - 1:
+            est["nivel"] += 1
+            est["estouros"] = 0
+            est["desde"] = time.monotonic()
+            logger.warning(
+                "Rota %s estourou o orçamento de %.1f s %d vezes seguidas: rebaixada de %s para %s",
+                tarefa, orcamento, LLM_REBAIXAR_APOS, base[est["nivel"] - 1], base[est["nivel"]],
+            )
+
+
+def situacao() -> dict[str, dict]:
+    """{tarefa: {"modelo", "rebaixada", "orcamento"}} de cada rota configurada (para /metricas)."""
+    return {
+        tarefa: {
+            "modelo": cadeia(tarefa)[0],
+            "rebaixada": bool(_estado.get(tarefa, {}).get("nivel")),
+            "orcamento": r["orcamento"],
+        }
+        for tarefa, r in LLM_ROTAS.items()
+    }
@@ -0,0 +1,164 @@
+"""
+Cache em processo da taxonomia (interesses e áreas) do backend.
+Guarda um snapshot versionado com estruturas de busca prontas (áreas por interesse,
+nome normalizado -> entidade), com TTL e invalidação explícita após criar interesse/área.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import time
+from typing import Awaitable, Callable
+
+from assistant.busca_nomes import IndiceNomes, chave
+from assistant.config import TAXONOMIA_TTL
+
+logger = logging.getLogger(__name__)
+
+
+# Ranqueamento de áreas para o prompt: pesos por palavra da mensagem que casa com o nome da área
+# ou do interesse dela, e peso do histórico (log do nº de ideias salvas naquele par).
+_PESO_PALAVRA_AREA = 2.0
+_PESO_PALAVRA_INTERESSE = 1.0
+_PESO_FREQUENCIA = 1.0
+# Palavras são comparadas pelo radical (primeiros caracteres) para casar plural/flexões
+_TAM_RADICAL = 5
+_PALAVRAS_IGNORADAS = frozenset({
+    "que", "para", "com", "uma", "nao", "mas", "por", "pra", "dos", "das", "nos", "nas", "sobre",
+    "salve", "salvar", "guarde", "guardar", "anote", "anotar", "ideia", "area", "interesse", "preciso",
+})
+
+
+def _radicais(texto: str) -> set[str]:
+    return {p[:_TAM_RADICAL] for p in chave(texto).split() if len(p) >= 3 and p not in _PALAVRAS_IGNORADAS}
+
+
+def normalizar(s: str) -> str:
+    """Normaliza para comparação: strip, minúsculas e colapsa espaços múltiplos."""
+    return " ".join((s or "").strip().lower().split())
+
+
+class Taxonomia:
+    """Snapshot imutável de interesses e áreas com índices para resolução O(1)."""
+
+    def __init__(self, interesses: list[dict], areas: list[dict], versao: int) -> None:
+        self.interesses = interesses or []
+        self.areas = areas or []
+        self.versao = versao
+        self.interesse_por_id: dict[str, dict] = {}
+        self.interesse_por_nome: dict[str, dict] = {}
+        self.areas_por_interesse: dict[str, list[dict]] = {}
+        self.area_por_nome: dict[tuple[str, str], dict] = {}
+        for i in self.interesses:
+            if i.get("id"):
+                self.interesse_por_id[i["id"]] = i
+            self.interesse_por_nome.setdefault(normalizar(i.get("name") or ""), i)
+        for a in self.areas:
+            interest_id = a.get("interestId")
+            if not interest_id:
+                continue
+            self.areas_por_interesse.setdefault(interest_id, []).append(a)
+            self.area_por_nome.setdefault((interest_id, normalizar(a.get("name") or "")), a)
+        # Índices de busca aproximada: construídos uma vez por snapshot (áreas sob demanda)
+        self.indice_interesses = IndiceNomes(self.interesses)
+        self._indices_areas: dict[str, IndiceNomes] = {}
+        # Índice radical -> {posição da área: peso}, para ranquear áreas por mensagem (sob demanda)
+        self._radicais_areas: dict[str, dict[int, float]] | None = None
+        self._areas_ranqueaveis: list[dict] = []
+        self._posicao_area: dict[int, int] = {}
+
+    def interesse(self, nome: str) -> dict | None:
+        """Interesse com nome exatamente igual (após normalização)."""
+        return self.interesse_por_nome.get(normalizar(nome))
+
+    def area(self, interest_id: str, nome: str) -> dict | None:
+        """Área do interesse com nome exatamente igual (após normalização)."""
+        return self.area_por_nome.get((interest_id, normalizar(nome)))
+
+    def areas_do_interesse(self, interest_id: str) -> list[dict]:
+        return self.areas_por_interesse.get(interest_id, [])
+
+    def indice_areas(self, interest_id: str) -> IndiceNomes:
+        """Índice de busca aproximada das áreas de um interesse."""
+        indice = self._indices_areas.get(interest_id)
+        if indice is None:
+            indice = self._indices_areas[interest_id] = IndiceNomes(self.areas_do_interesse(interest_id))
+        return indice
+
+    def _indice_radicais(self) -> dict[str, dict[int, float]]:
+        if self._radicais_areas is None:
+            indice: dict[str, dict[int, float]] = {}
+            self._areas_ranqueaveis = [a for a in self.areas if a.get("interestId") in self.interesse_por_id]
+            self._posicao_area = {id(a): pos for pos, a in enumerate(self._areas_ranqueaveis)}
+            for pos, a in enumerate(self._areas_ranqueaveis):
+                interesse = self.interesse_por_id[a["interestId"]]
+                for r in _radicais(interesse.get("name") or ""):
+                    indice.setdefault(r, {})[pos] = _PESO_PALAVRA_INTERESSE
+                for r in _radicais(a.get("name") or ""):
+                    pesos = indice.setdefault(r, {})
+                    pesos[pos] = pesos.get(pos, 0.0) + _PESO_PALAVRA_AREA
+            self._radicais_areas = indice
+        return self._radicais_areas
+
+    def ranquear_areas(self, texto: str, frequentes: dict[str, int] | None = None, limite: int = 12) -> list[dict]:
+        """
+        Áreas mais prováveis para a mensagem, da mais à menos relevante: sobreposição de palavras
+        com o nome da área/interesse mais o histórico de uso (categorias_frequentes, chaves
+        "Interesse > Área"). Só visita áreas que casam com alguma palavra ou estão no histórico,
+        então o custo não cresce com o tamanho da taxonomia.
+        """
+        indice = self._indice_radicais()
+        scores: dict[int, float] = {}
+        for r in _radicais(texto):
+            for pos, peso in indice.get(r, {}).items():
+                scores[pos] = scores.get(pos, 0.0) + peso
+        for cat, n in (frequentes or {}).items():
+            nome_interesse, _, nome_area = cat.partition(" > ")
+            interesse = self.interesse(nome_interesse)
+            area = self.area(interesse["id"], nome_area) if interesse else None
+            pos = self._posicao_area.get(id(area)) if area is not None else None
+            if pos is not None:
+                scores[pos] = scores.get(pos, 0.0) + _PESO_FREQUENCIA * math.log1p(n)
+        ordenados = sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))
+        return [self._areas_ranqueaveis[pos] for pos, _ in ordenados[:limite]]
+
+
+_atual: Taxonomia | None = None
+_expira_em = 0.0
+_versao = 0  # incrementa a cada snapshot construído
+_geracao = 0  # incrementa a cada invalidação
+_lock = asyncio.Lock()
+
+
+def invalidar() -> None:
+    """Descarta o snapshot atual; a próxima leitura busca de novo no backend."""
+    global _atual, _geracao
+    _atual = None
+    _geracao += 1
+    logger.debug("Taxonomia invalidada")
+
+
+async def obter(
+    carregar: Callable[[], Awaitable[tuple[list[dict], list[dict]]]],
+    forcar: bool = False,
+) -> Taxonomia:
+    """
+    Retorna o snapshot em cache ou chama carregar() -> (interesses, areas) se expirado.
+    Chamadas concorrentes aguardam a mesma carga em vez de baixar a taxonomia várias vezes.
+    """
+    global _atual, _expira_em, _versao
+    if not forcar and _atual is not None and time.monotonic() < _expira_em:
+        return _atual
+    async with _lock:
+        if not forcar and _atual is not None and time.monotonic() < _expira_em:
+            return _atual
+        geracao = _geracao
+        interesses, areas = await carregar()
+        _versao += 1
+        snapshot = Taxonomia(interesses, areas, _versao)
+        # Só publica se ninguém invalidou durante o download
+        if geracao == _geracao:
+            _atual = snapshot
+            _expira_em = time.monotonic() + TAXONOMIA_TTL
+        return snapshot
@@ -0,0 +1,117 @@
+"""
+Avaliação offline do classificador local de intenção (assistant.classificador).
+
+Validação cruzada em k partes sobre os dados de treino (exemplos do prompt, frases-semente e
+tráfego registrado) ou sobre um arquivo --dados no mesmo formato do tráfego (JSONL {"texto", "acao"}).
+Imprime precisão e revocação por ação e, no limiar de confiança, quantas mensagens seriam
+respondidas localmente (ações só de leitura) e com que precisão. Por fim, confere que pedidos de
+escrita que citam uma listagem ("adicione … ver …") nunca são respondidos localmente.
+
+Uso (na raiz do bot):  python -m benchmarks.avaliar_classificador --partes 5
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import time
+from collections import Counter
+
+os.environ.setdefault("OPENROUTER_API_KEY", "bench")
+
+from assistant import bot, classificador  # noqa: E402
+from assistant.config import CLASSIFICADOR_CONFIANCA_MINIMA  # noqa: E402
+
+# Pedidos de escrita com cara de consulta: o classificador pode apontar uma listagem com confiança alta
+ESCRITA_COM_LEITURA = (
+    "adicione no planejamento pessoal: ver os projetos pessoais",
+    "crie uma tarefa empresarial: liste os fornecedores",
+    "nova tarefa pessoal ver meus lembretes",
+    "coloque nas tarefas de hoje: mostrar as categorias",
+    "exclua o projeto pessoal ver os projetos antigos",
+    "apague o lembrete quais lembretes vencidos",
+    "conclui a tarefa de hoje ver os emails",
+    "adicione lembrete: ver meus lembretes amanhã",
+)
+
+
+def _carregar(caminho: str | None) -> list[tuple[str, str]]:
+    if not caminho:
+        return classificador.dados_treino()
+    with open(caminho, encoding="utf-8") as f:
+        itens = [json.loads(linha) for linha in f if linha.strip()]
+    return [(i["texto"], i["acao"]) for i in itens if i.get("texto") and i.get("acao")]
+
+
+def _validacao_cruzada(pares: list[tuple[str, str]], partes: int, semente: int) -> tuple[list, list]:
+    """(acao real, acao prevista, confiança) de cada exemplo, previsto por um modelo que não o viu."""
+    embaralhados = pares[:]
+    random.Random(semente).shuffle(embaralhados)
+    resultados, tempos = [], []
+    for k in range(partes):
+        teste = embaralhados[k::partes]
+        treino = [p for i, p in enumerate(embaralhados) if i % partes != k]
+        modelo = classificador.Classificador().treinar(treino)
+        for texto, real in teste:
+            t0 = time.perf_counter()
+            prevista, confianca = modelo.prever(texto)
+            tempos.append(time.perf_counter() - t0)
+            resultados.append((real, prevista, confianca))
+    return resultados, tempos
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--dados", help="JSONL com {texto, acao}; padrão: dados de treino do bot")
+    parser.add_argument("--partes", type=int, default=5)
+    parser.add_argument("--limiar", type=float, default=CLASSIFICADOR_CONFIANCA_MINIMA)
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+
+    if classificador.np is None:
+        raise SystemExit("NumPy não instalado: o classificador local está desativado.")
+    pares = _carregar(args.dados)
+    resultados, tempos = _validacao_cruzada(pares, args.partes, args.semente)
+
+    reais = Counter(r for r, _, _ in resultados)
+    previstas = Counter(p for _, p, _ in resultados)
+    acertos = Counter(r for r, p, _ in resultados if r == p)
+    for acao in sorted(reais | previstas):
+        print(json.dumps({
+            "acao": acao,
+            "precisao": round(acertos[acao] / previstas[acao], 3) if previstas[acao] else None,
+            "revocacao": round(acertos[acao] / reais[acao], 3) if reais[acao] else None,
+            "suporte": reais[acao],
+        }, ensure_ascii=False))
+
+    locais = [(r, p) for r, p, c in resultados if p in classificador.ACOES_LEITURA and c >= args.limiar]
+    leitura = sum(1 for r, _, _ in resultados if r in classificador.ACOES_LEITURA)
+    print(json.dumps({
+        "exemplos": len(resultados),
+        "acuracia": round(sum(acertos.values()) / len(resultados), 3),
+        "limiar": args.limiar,
+        "respondidas_localmente": len(locais),
+        "precisao_local": round(sum(r == p for r, p in locais) / len(locais), 3) if locais else None,
+        "cobertura_leitura": round(sum(r == p for r, p in locais) / leitura, 3) if leitura else None,
+        "previsao_p50_ms": round(statistics.median(tempos) * 1000, 3),
+    }))
+
+    modelo = classificador.Classificador().treinar(pares)
+    escrita = []
+    for texto in ESCRITA_COM_LEITURA:
+        acao, confianca = modelo.prever(texto)
+        escrita.append({
+            "texto": texto,
+            "prevista": acao,
+            "confianca": round(confianca, 3),
+            "local": bot._pode_responder_localmente(texto, acao, confianca),
+        })
+    print(json.dumps({
+        "escrita_com_leitura": len(escrita),
+        "acima_do_limiar": sum(e["prevista"] in classificador.ACOES_LEITURA and e["confianca"] >= args.limiar for e in escrita),
+        "respondidas_localmente": [e["texto"] for e in escrita if e["local"]],
+    }, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark: N chats simultâneos chamando o backend, cliente síncrono vs assíncrono.
+
+Sobe um backend falso local (cada requisição demora --latencia segundos) e simula N chats
+no mesmo event loop, cada um fazendo --chamadas chamadas sequenciais (como _processar_texto_e_responder).
+Um "ticker" mede quanto o event loop fica travado (o que o job_queue de lembretes sentiria).
+
+Uso (na raiz do bot):  python -m benchmarks.bench_chats_concorrentes --chats 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PORTA = 18765
+os.environ["OBSIDIAN_API_BASE_URL"] = f"http://127.0.0.1:{PORTA}"
+
+from assistant import obsidian_async, obsidian_service  # noqa: E402
+
+
+def _subir_backend_falso(latencia: float) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            time.sleep(latencia)
+            corpo = json.dumps([{"id": "1", "name": "Pessoal"}]).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def log_message(self, *args):
+            pass
+
+    class Servidor(ThreadingHTTPServer):
+        daemon_threads = True
+        request_queue_size = 128
+
+    servidor = Servidor(("127.0.0.1", PORTA), Handler)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+async def _ticker(parar: asyncio.Event, atrasos: list[float], intervalo: float = 0.01) -> None:
+    while not parar.is_set():
+        t0 = time.perf_counter()
+        await asyncio.sleep(intervalo)
+        atrasos.append(time.perf_counter() - t0 - intervalo)
+
+
+async def _chat_sync(chamadas: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(chamadas):
+        obsidian_service.listar_interesses()
+    return time.perf_counter() - t0
+
+
+async def _chat_async(chamadas: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(chamadas):
+        await obsidian_async.listar_interesses()
+    return time.perf_counter() - t0
+
+
+async def _rodar(modo: str, chats: int, chamadas: int) -> dict:
+    parar = asyncio.Event()
+    atrasos: list[float] = []
+    ticker = asyncio.create_task(_ticker(parar, atrasos))
+    fn = _chat_sync if modo == "sync" else _chat_async
+    t0 = time.perf_counter()
+    tempos = await asyncio.gather(*(fn(chamadas) for _ in range(chats)))
+    total = time.perf_counter() - t0
+    parar.set()
+    await ticker
+    await obsidian_async.fechar_cliente()
+    return {
+        "modo": modo,
+        "total_s": round(total, 3),
+        "chat_p50_s": round(statistics.median(tempos), 3),
+        "chat_max_s": round(max(tempos), 3),
+        "loop_travado_max_s": round(max(atrasos, default=0.0), 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--chats", type=int, default=10)
+    parser.add_argument("--chamadas", type=int, default=4)
+    parser.add_argument("--latencia", type=float, default=0.1)
+    args = parser.parse_args()
+
+    _subir_backend_falso(args.latencia)
+    for modo in ("sync", "async"):
+        print(json.dumps(asyncio.run(_rodar(modo, args.chats, args.chamadas))))
+
+
+if __name__ == "__main__":
+    main()
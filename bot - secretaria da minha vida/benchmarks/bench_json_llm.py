@@ -0,0 +1,94 @@
+"""
+Benchmark e conferência do extrator de JSON da LLM (assistant.json_llm) sobre um corpus de saídas
+malformadas (benchmarks/corpus_json_llm.json): markdown, texto ao redor, vírgula faltando/sobrando,
+aspas curvas, quebra de linha crua em string, saída truncada e mais de um objeto.
+
+Para cada caso confere o valor extraído e os reparos reportados contra o esperado (sai com código 1
+se algum divergir) e compara acertos e tempo com o extrator antigo (regex + até quatro json.loads).
+
+Uso (na raiz do bot):  python -m benchmarks.bench_json_llm --repeticoes 2000
+"""
+import argparse
+import json
+import re
+import sys
+import time
+from pathlib import Path
+
+from assistant import json_llm
+
+CORPUS = Path(__file__).with_name("corpus_json_llm.json")
+
+
+def _reparar_antigo(raw: str) -> str:
+    raw = re.sub(r'(?<!\\)"\s*\n(\s*")', r'",\n\1', raw)
+    return re.sub(r'(\d|true|false|null)\s*\n(\s*")', r'\1,\n\2', raw)
+
+
+def _extrair_antigo(texto: str):
+    """O extrator anterior, para comparação."""
+    texto = texto.strip()
+    match = re.search(r"```(?:json)?\s*([\s\S]*?)\s*```", texto)
+    if match:
+        texto = match.group(1).strip()
+    match = re.search(r"\{[\s\S]*\}", texto)
+    if match:
+        raw = match.group(0)
+        try:
+            return json.loads(raw)
+        except json.JSONDecodeError:
+            try:
+                return json.loads(_reparar_antigo(raw))
+            except json.JSONDecodeError:
+                pass
+    try:
+        return json.loads(texto)
+    except json.JSONDecodeError:
+        try:
+            return json.loads(_reparar_antigo(texto))
+        except json.JSONDecodeError:
+            return None
+
+
+def _extrair_novo(texto: str):
+    extraido = json_llm.extrair(texto)
+    return extraido[0] if extraido else None
+
+
+def _medir(funcao, casos: list[dict], repeticoes: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeticoes):
+        for caso in casos:
+            funcao(caso["entrada"])
+    return (time.perf_counter() - t0) / (repeticoes * len(casos)) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeticoes", type=int, default=2000)
+    args = parser.parse_args()
+
+    casos = json.loads(CORPUS.read_text(encoding="utf-8"))
+    falhas = []
+    for caso in casos:
+        extraido = json_llm.extrair(caso["entrada"])
+        valor, reparos = extraido if extraido else (None, [])
+        if valor != caso["esperado"] or reparos != caso["reparos"]:
+            falhas.append({"caso": caso["nome"], "valor": valor, "reparos": reparos})
+    for falha in falhas:
+        print(json.dumps(falha, ensure_ascii=False), file=sys.stderr)
+
+    print(json.dumps({
+        "casos": len(casos),
+        "acertos_novo": sum(_extrair_novo(c["entrada"]) == c["esperado"] for c in casos),
+        "acertos_antigo": sum(_extrair_antigo(c["entrada"]) == c["esperado"] for c in casos),
+        "novo_us_por_caso": round(_medir(_extrair_novo, casos, args.repeticoes), 2),
+        "antigo_us_por_caso": round(_medir(_extrair_antigo, casos, args.repeticoes), 2),
+        "divergencias": len(falhas),
+    }))
+    if falhas:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Benchmark: E/S de memória por mensagem, antes (reler e regravar memoria.json inteiro a cada
+chamada) vs depois (perfil em processo com gravação atômica em lote + estado do chat em SQLite).
+
+Cada mensagem simulada faz a sequência de um handler: get_pending_action, carregar_memoria (prompt),
+atualizar_contexto_recente e, a cada quatro mensagens, set/clear_pending_action (confirmação).
+As mensagens chegam a cada --intervalo segundos; conta leituras e gravações do arquivo e mede o
+tempo gasto nas chamadas de memória por mensagem. "depois" inclui o descarregar final; suas
+escritas por mensagem vão para o SQLite do chat, não para o JSON.
+
+Uso (na raiz do bot):  python -m benchmarks.bench_memoria --mensagens 200 --intervalo 0.01
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from copy import deepcopy
+from pathlib import Path
+
+_TMP = tempfile.mkdtemp()
+os.environ["MEMORIA_PATH"] = os.path.join(_TMP, "memoria.json")
+os.environ["ESTADO_CHATS_PATH"] = os.path.join(_TMP, "estado_chats.sqlite")
+os.environ.setdefault("MEMORIA_ATRASO_GRAVACAO", "0.5")
+os.environ.setdefault("OPENROUTER_API_KEY", "bench")
+
+from assistant import memory  # noqa: E402
+
+CHAT_ID = 1
+CONTEXTO_INICIAL = {
+    "ultima_ideia": {},
+    "ultimas_acoes": [],
+    "categorias_frequentes": {f"Interesse {i} > Área {j}": i * j for i in range(10) for j in range(8)},
+}
+MEMORIA_INICIAL = {**memory.ESTRUTURA_PADRAO, "contexto_recente": CONTEXTO_INICIAL}
+
+
+class _Antes:
+    """As funções como eram: cada chamada relê o arquivo e cada escrita o regrava inteiro."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.leituras = 0
+        self.gravacoes = 0
+
+    def carregar_memoria(self) -> dict:
+        self.leituras += 1
+        with open(self.path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def salvar(self, dados: dict) -> None:
+        self.gravacoes += 1
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(dados, f, ensure_ascii=False, indent=2)
+
+    def get_pending_action(self):
+        return self.carregar_memoria().get("pending_action")
+
+    def set_pending_action(self, action: dict) -> None:
+        atual = self.carregar_memoria()
+        atual["pending_action"] = action
+        self.salvar(atual)
+
+    def clear_pending_action(self) -> None:
+        atual = self.carregar_memoria()
+        if "pending_action" in atual:
+            del atual["pending_action"]
+            self.salvar(atual)
+
+    def atualizar_contexto_recente(self, acao: str) -> None:
+        atual = self.carregar_memoria()
+        ctx = atual.setdefault("contexto_recente", {})
+        ultimas = ctx.get("ultimas_acoes", [])
+        ultimas.append({"acao": acao, "timestamp": time.time()})
+        ctx["ultimas_acoes"] = ultimas[-5:]
+        self.salvar(atual)
+
+
+class _Depois:
+    """As funções atuais de memory, no chat CHAT_ID."""
+
+    def __getattr__(self, nome: str):
+        funcao = getattr(memory, nome)
+        return lambda *args: funcao(CHAT_ID, *args)
+
+
+def _mensagem(api, i: int) -> None:
+    api.get_pending_action()
+    api.carregar_memoria()
+    api.atualizar_contexto_recente("criar_lembrete")
+    if i % 4 == 0:
+        api.set_pending_action({"acao": "criar_tarefa_diaria", "dados": {"titulo": f"t{i}"}})
+        api.clear_pending_action()
+
+
+def _rodar(api, mensagens: int, intervalo: float) -> float:
+    gasto = 0.0
+    for i in range(mensagens):
+        t0 = time.perf_counter()
+        _mensagem(api, i)
+        gasto += time.perf_counter() - t0
+        time.sleep(intervalo)
+    return gasto
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mensagens", type=int, default=200)
+    parser.add_argument("--intervalo", type=float, default=0.01)
+    args = parser.parse_args()
+
+    path = Path(os.environ["MEMORIA_PATH"])
+    antes = _Antes(path)
+    antes.salvar(deepcopy(MEMORIA_INICIAL))
+    antes.gravacoes = 0
+    gasto_antes = _rodar(antes, args.mensagens, args.intervalo)
+
+    memory._gravar_arquivo(path, json.dumps(memory.ESTRUTURA_PADRAO, ensure_ascii=False, indent=2))
+    memory.estado_chats().importar_contexto(CHAT_ID, CONTEXTO_INICIAL)
+    contagem = {"leituras": 0, "gravacoes": 0}
+    ler, gravar = memory._ler_arquivo, memory._gravar_arquivo
+
+    def _ler(p):
+        contagem["leituras"] += 1
+        return ler(p)
+
+    def _gravar(p, conteudo):
+        contagem["gravacoes"] += 1
+        gravar(p, conteudo)
+
+    memory._ler_arquivo, memory._gravar_arquivo = _ler, _gravar
+    gasto_depois = _rodar(_Depois(), args.mensagens, args.intervalo)
+    t0 = time.perf_counter()
+    memory.descarregar()
+    gasto_depois += time.perf_counter() - t0
+
+    print(json.dumps({
+        "mensagens": args.mensagens,
+        "antes_leituras_por_mensagem": round(antes.leituras / args.mensagens, 2),
+        "antes_gravacoes_por_mensagem": round(antes.gravacoes / args.mensagens, 2),
+        "antes_us_por_mensagem": round(gasto_antes / args.mensagens * 1e6, 1),
+        "depois_leituras_json": contagem["leituras"],
+        "depois_gravacoes_json": contagem["gravacoes"],
+        "depois_us_por_mensagem": round(gasto_depois / args.mensagens * 1e6, 1),
+    }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Micro-benchmark: heurísticas _parece_* do bot, uma varredura por predicado (antes) vs autômato único.
+
+Roda, para cada mensagem do corpus, a mesma sequência de checagens dos handlers de texto/voz
+(categorias, empresarial, pessoal, tarefas diárias, salvar ideia, funções). "antes" reimplementa
+as versões com `any(k in texto.lower())` por lista; "depois" usa os predicados atuais do bot,
+com a memorização desligada (--sem-cache) ou ligada. Também conta divergências entre as duas versões
+(esperadas só onde acento/pontuação diferem, ex.: "areas" vs "áreas").
+
+Uso (na raiz do bot):  python -m benchmarks.bench_palavras_chave --repeticoes 2000
+"""
+import argparse
+import json
+import os
+import time
+
+os.environ.setdefault("OPENROUTER_API_KEY", "bench")
+
+from assistant import bot  # noqa: E402
+
+CORPUS = [
+    "quais são minhas tarefas empresariais",
+    "me mostra o planejamento pessoal",
+    "criar tarefa no planejamento empresarial: revisar contratos",
+    "o que tenho hoje?",
+    "salve na area sistemas que preciso terminar o app do cliente antes de sexta",
+    "quais são as categorias",
+    "quais interesses e áreas eu tenho",
+    "oi, tudo bem?",
+    "me lembre amanhã às 10 de ligar para o banco",
+    "o que você faz?",
+    "registre na área instagram que preciso gravar um vídeo sobre produtividade e rotina matinal",
+    "liste meus lembretes",
+    "adicione no pessoal: comprar presente de aniversário da minha mãe até sábado",
+    "Quais Sao As Tarefas De Hoje",
+]
+
+
+def _contem(texto: str, palavras) -> bool:
+    t = texto.lower().strip()
+    return any(k in t for k in palavras)
+
+
+def _consulta_antes(texto: str, palavras) -> bool:
+    if _contem(texto, palavras):
+        return _contem(texto, bot._PALAVRAS_CONSULTA) or not _contem(texto, bot._PALAVRAS_CRIAR)
+    return False
+
+
+def _antes(texto: str) -> tuple[bool, ...]:
+    """As heurísticas como eram: cada uma baixa a caixa e varre sua lista de novo."""
+    return (
+        _contem(texto, bot._PALAVRAS_CATEGORIA)
+        or (_contem(texto, bot._PALAVRAS_INTERESSE) and _contem(texto, bot._PALAVRAS_AREA)),
+        _consulta_antes(texto, bot._PALAVRAS_LISTAR_EMPRESARIAL),
+        _consulta_antes(texto, bot._PALAVRAS_LISTAR_PESSOAL),
+        _contem(texto, bot._PALAVRAS_TAREFAS_DIARIAS),
+        _contem(texto, bot._PALAVRAS_SALVAR_IDEIA),
+        _contem(texto, bot._PALAVRAS_FUNCAO),
+    )
+
+
+def _depois(texto: str) -> tuple[bool, ...]:
+    return (
+        bot._parece_pergunta_interesses_areas(texto),
+        bot._parece_consulta_planejamento_empresarial(texto),
+        bot._parece_consulta_planejamento_pessoal(texto),
+        bot._parece_consulta_tarefas_diarias(texto),
+        bot._parece_pedido_salvar_ideia(texto),
+        bot._parece_pergunta_funcao(texto),
+    )
+
+
+def _medir(funcao, repeticoes: int, limpar_cache: bool) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeticoes):
+        for texto in CORPUS:
+            if limpar_cache:
+                bot._classes_palavras.cache_clear()
+            funcao(texto)
+    return (time.perf_counter() - t0) / (repeticoes * len(CORPUS)) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeticoes", type=int, default=2000)
+    args = parser.parse_args()
+
+    divergencias = [t for t in CORPUS if _antes(t) != _depois(t)]
+    print(json.dumps({
+        "mensagens": len(CORPUS),
+        "antes_us_por_mensagem": round(_medir(_antes, args.repeticoes, False), 2),
+        "automato_us_por_mensagem": round(_medir(_depois, args.repeticoes, True), 2),
+        "automato_memorizado_us_por_mensagem": round(_medir(_depois, args.repeticoes, False), 2),
+        "divergencias": divergencias,
+    }, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Benchmark: pipeline de salvar ideia "separado" (intenção + refino + par) vs "unica" (uma chamada).
+
+Sobe um servidor falso local que responde como a OpenRouter e como o backend (POST /api/documents).
+Cada chamada à LLM demora --rtt segundos mais --por-token segundos por token gerado, e a resposta
+traz "usage" com tokens estimados (~4 caracteres por token), como a OpenRouter informa.
+Com --taxa-par-invalido, essa fração das ideias vem com uma área inexistente, forçando o fallback de par.
+Mede o tempo por ideia e os tokens de entrada/saída somados de todas as chamadas.
+
+Uso (na raiz do bot):  python -m benchmarks.bench_pipeline_ideia --ideias 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PORTA = 18766
+os.environ["OBSIDIAN_API_BASE_URL"] = f"http://127.0.0.1:{PORTA}"
+os.environ["OPENROUTER_BASE_URL"] = f"http://127.0.0.1:{PORTA}/v1/chat/completions"
+os.environ.setdefault("OPENROUTER_API_KEY", "bench")
+os.environ["LLM_CACHE_TTL_CORRECAO"] = "0"
+os.environ["LLM_CACHE_TTL_PAR"] = "0"
+os.environ["LLM_CACHE_TTL_CONVERSA"] = "0"
+os.environ["LLM_CACHE_DISCO"] = "0"
+_TMP = tempfile.mkdtemp()
+os.environ["ESPELHO_DOCUMENTOS_PATH"] = os.path.join(_TMP, "documentos.sqlite")
+os.environ["MEMORIA_PATH"] = os.path.join(_TMP, "memoria.json")
+os.environ["ESTADO_CHATS_PATH"] = os.path.join(_TMP, "estado_chats.sqlite")
+
+from assistant import bot, llm, llm_async, obsidian_async, taxonomia  # noqa: E402
+
+INTERESSES = [
+    {"id": "i1", "name": "Pessoal"},
+    {"id": "i2", "name": "Naxtool"},
+    {"id": "i3", "name": "Redes Sociais"},
+    {"id": "i4", "name": "Leitura"},
+]
+AREAS = [
+    {"id": "a1", "name": "Inbox", "interestId": "i1"},
+    {"id": "a2", "name": "Saúde", "interestId": "i1"},
+    {"id": "a3", "name": "Sistemas", "interestId": "i2"},
+    {"id": "a4", "name": "Vendas", "interestId": "i2"},
+    {"id": "a5", "name": "Instagram", "interestId": "i3"},
+    {"id": "a6", "name": "YouTube", "interestId": "i3"},
+    {"id": "a7", "name": "Livros", "interestId": "i4"},
+]
+TEXTO = (
+    "salve na area sistemas que preciso terminar o app do cliente e revisar a "
+    "integraçao com o backend antes da reuniao de sexta"
+)
+
+
+def _tokens(texto: str) -> int:
+    return max(1, len(texto) // 4)
+
+
+def _resposta_llm(system: str, user: str, par_invalido: bool) -> str:
+    corpo = "Preciso terminar o app do cliente e revisar a integração com o backend antes da reunião de sexta."
+    if system.startswith(llm.PROMPT_REFINO_IDEIA[:40]):
+        return json.dumps({"titulo": "Terminar o app", "descricao": "Finalizar o app e revisar a integração.", "corpo": corpo})
+    if system.startswith(llm.PROMPT_ESCOLHER_PAR_FALLBACK[:40]):
+        return json.dumps({"interest": "Naxtool", "area": "Sistemas"})
+    dados = {
+        "titulo": "Terminar o app",
+        "resumo": user,
+        "tags": [],
+        "interest": "Naxtool",
+        "area": "Produto X" if par_invalido else "Sistemas",
+    }
+    if llm.PROMPT_SALVAR_IDEIA_UNICA in system:
+        dados.update({"descricao": "Finalizar o app e revisar a integração.", "corpo": corpo})
+    return json.dumps({"resposta": "Ideia salva.", "acao": "salvar_ideia", "dados": dados}, ensure_ascii=False)
+
+
+def _subir_servidor_falso(rtt: float, por_token: float, taxa_par_invalido: float) -> ThreadingHTTPServer:
+    sorteio = random.Random(42)
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            pedido = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            if self.path.startswith("/v1/"):
+                system, user = (m["content"] for m in pedido["messages"])
+                with lock:
+                    par_invalido = sorteio.random() < taxa_par_invalido
+                content = _resposta_llm(system, user, par_invalido)
+                saida = _tokens(content)
+                time.sleep(rtt + por_token * saida)
+                resposta = {
+                    "choices": [{"message": {"content": content}}],
+                    "usage": {"prompt_tokens": _tokens(system) + _tokens(user), "completion_tokens": saida},
+                }
+            else:
+                resposta = {"id": f"doc-{time.perf_counter_ns()}", **pedido}
+            self._responder(resposta)
+
+        def _responder(self, dados: dict) -> None:
+            corpo = json.dumps(dados).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def log_message(self, *args):
+            pass
+
+    class Servidor(ThreadingHTTPServer):
+        daemon_threads = True
+        request_queue_size = 128
+
+    servidor = Servidor(("127.0.0.1", PORTA), Handler)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+async def _salvar_ideia(unica: bool) -> None:
+    """Mesmo caminho de _processar_texto_e_responder para uma mensagem de salvar ideia."""
+    tax = await taxonomia.obter(_carregar_taxonomia)
+    resultado = await llm_async.perguntar_llm(
+        TEXTO, contexto_memoria={}, interesses_areas=(tax.interesses, tax.areas), refino_embutido=unica
+    )
+    dados = resultado["dados"]
+    await bot._salvar_ideia_com_contexto(
+        interest=dados["interest"],
+        area=dados["area"],
+        titulo=dados["titulo"],
+        corpo=dados["resumo"],
+        tags=dados["tags"],
+        texto_original=TEXTO,
+        update=None,
+        refinado=dados.get("refinado"),
+    )
+
+
+async def _carregar_taxonomia() -> tuple[list, list]:
+    return INTERESSES, AREAS
+
+
+async def _rodar(modo: str, ideias: int) -> dict:
+    eventos: list[dict] = []
+    llm.adicionar_hook(eventos.append)
+    tempos = []
+    for _ in range(ideias):
+        t0 = time.perf_counter()
+        await _salvar_ideia(modo == "unica")
+        tempos.append(time.perf_counter() - t0)
+    llm._hooks.remove(eventos.append)
+    await llm_async.fechar_cliente()
+    await obsidian_async.fechar_cliente()
+    usos = [e["uso"] or {} for e in eventos]
+    return {
+        "modo": modo,
+        "ideia_p50_s": round(statistics.median(tempos), 3),
+        "ideia_max_s": round(max(tempos), 3),
+        "chamadas_llm_por_ideia": round(len(eventos) / ideias, 2),
+        "tokens_entrada_por_ideia": round(sum(u.get("prompt_tokens", 0) for u in usos) / ideias),
+        "tokens_saida_por_ideia": round(sum(u.get("completion_tokens", 0) for u in usos) / ideias),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--ideias", type=int, default=20)
+    parser.add_argument("--rtt", type=float, default=0.3, help="latência fixa por chamada à LLM (s)")
+    parser.add_argument("--por-token", type=float, default=0.004, help="tempo por token gerado (s)")
+    parser.add_argument("--taxa-par-invalido", type=float, default=0.2)
+    args = parser.parse_args()
+
+    servidor = _subir_servidor_falso(args.rtt, args.por_token, args.taxa_par_invalido)
+    for modo in ("separado", "unica"):
+        print(json.dumps(asyncio.run(_rodar(modo, args.ideias))))
+    servidor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark: tamanho e custo do prompt de conversa conforme a taxonomia cresce.
+
+Gera taxonomias sintéticas de --tamanhos áreas (10 por interesse) e, para mensagens de
+"salvar ideia" que citam uma área existente, compara a hierarquia inteira (antes) com a seleção
+das áreas mais relevantes (TAXONOMIA_PROMPT_TOP_K). Mede tokens estimados do prompt de sistema,
+tempo local de montagem e se a área citada entrou na seleção (acerto). A latência da LLM é
+estimada como --rtt + tokens de entrada × --por-token-entrada (custo de prefill).
+
+Uso (na raiz do bot):  python -m benchmarks.bench_taxonomia_prompt --tamanhos 10 50 200 500 1000
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import time
+
+os.environ.setdefault("OPENROUTER_API_KEY", "bench")
+
+from assistant import llm, taxonomia  # noqa: E402
+from assistant.prompt import estimar_tokens  # noqa: E402
+
+PALAVRAS = (
+    "saude financas vendas marketing sistemas clientes leitura livros treino corrida viagens "
+    "familia estudos ingles cursos podcast youtube instagram receitas jardim casa reforma carro "
+    "investimentos impostos contratos fornecedores produto design suporte pesquisa musica violao "
+    "fotografia filmes series escrita blog newsletter eventos palestras mentoria carreira"
+).split()
+
+
+def _gerar_taxonomia(n_areas: int, sorteio: random.Random) -> tuple[list, list]:
+    n_interesses = max(1, n_areas // 10)
+    interesses = [{"id": f"i{k}", "name": f"{sorteio.choice(PALAVRAS).title()} {k}"} for k in range(n_interesses)]
+    nomes = sorteio.sample([f"{a} {b}".title() for a in PALAVRAS for b in PALAVRAS if a != b], n_areas)
+    areas = [{"id": f"a{k}", "name": nome, "interestId": f"i{k % n_interesses}"} for k, nome in enumerate(nomes)]
+    return interesses, areas
+
+
+def _rodar(n_areas: int, mensagens: int, rtt: float, por_token: float) -> dict:
+    sorteio = random.Random(n_areas)
+    interesses, areas = _gerar_taxonomia(n_areas, sorteio)
+    tax = taxonomia.Taxonomia(interesses, areas, versao=1)
+    memoria = {"contexto_recente": {"categorias_frequentes": {}}}
+    for a in sorteio.sample(areas, min(5, len(areas))):
+        chave = f"{tax.interesse_por_id[a['interestId']]['name']} > {a['name']}"
+        memoria["contexto_recente"]["categorias_frequentes"][chave] = sorteio.randint(1, 20)
+
+    tokens_antes, tokens_depois, tempos, acertos = [], [], [], 0
+    for _ in range(mensagens):
+        alvo = sorteio.choice(areas)
+        texto = f"salve na area {alvo['name'].lower()} que preciso revisar o plano da semana"
+        t0 = time.perf_counter()
+        system = llm._system_perguntar(texto, memoria, tax)
+        tempos.append(time.perf_counter() - t0)
+        # "Antes": o mesmo prompt, trocando a seção selecionada pela hierarquia inteira
+        selecionada = llm._formatar_taxonomia_prompt(tax, texto, memoria)
+        inteira = llm._formatar_interesses_areas(interesses, areas)
+        tokens_depois.append(estimar_tokens(system))
+        tokens_antes.append(tokens_depois[-1] - estimar_tokens(selecionada) + estimar_tokens(inteira))
+        acertos += alvo["name"] in system
+
+    antes = statistics.median(tokens_antes)
+    depois = statistics.median(tokens_depois)
+    return {
+        "areas": n_areas,
+        "tokens_antes": round(antes),
+        "tokens_depois": round(depois),
+        "montagem_p50_ms": round(statistics.median(tempos) * 1000, 3),
+        "llm_estimada_antes_s": round(rtt + antes * por_token, 3),
+        "llm_estimada_depois_s": round(rtt + depois * por_token, 3),
+        "acerto_area_citada": round(acertos / mensagens, 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[10, 50, 200, 500, 1000])
+    parser.add_argument("--mensagens", type=int, default=200)
+    parser.add_argument("--rtt", type=float, default=0.3, help="latência fixa por chamada à LLM (s)")
+    parser.add_argument("--por-token-entrada", type=float, default=0.0002, help="tempo por token de entrada (s)")
+    args = parser.parse_args()
+
+    for n in args.tamanhos:
+        print(json.dumps(_rodar(n, args.mensagens, args.rtt, args.por_token_entrada)))
+
+
+if __name__ == "__main__":
+    main()
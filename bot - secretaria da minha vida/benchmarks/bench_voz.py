@@ -0,0 +1,181 @@
+"""
+Benchmark: caminho de uma mensagem de voz até o reconhecedor, antes (download para .ogg temporário,
+ffmpeg arquivo -> .wav temporário, leitura do WAV com sr.AudioFile) vs depois (download para a
+memória, ffmpeg stdin -> stdout como PCM, sr.AudioData direto dos bytes).
+
+O download do Telegram é simulado por um arquivo falso que entrega os bytes de uma nota de voz
+ogg/opus (gerada com o ffmpeg ou lida de --arquivo); a chamada ao Google não entra na medida.
+Mede a latência por mensagem (p50/máx) e o pico de memória alocada pelo Python (tracemalloc)
+em cada caminho, e confere que os dois entregam o mesmo PCM.
+
+Depois simula --simultaneas notas de voz chegando juntas (de chats diferentes), com o reconhecimento
+trocado por uma espera de --reconhecimento s (a ida ao Google): antes, cada handler roda inteiro
+bloqueando o event loop; depois, audio.transcrever_voice com AUDIO_TRABALHADORES trabalhadores.
+Um "ticker" mede o maior travamento do event loop (o que os outros chats e os jobs sentiriam).
+Precisa do ffmpeg no PATH.
+
+Uso (na raiz do bot):  python -m benchmarks.bench_voz --segundos 20 --repeticoes 20 --simultaneas 4
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import speech_recognition as sr
+
+from assistant import audio
+
+
+class _ArquivoFalso:
+    """Imita telegram.File: os bytes já estão aqui em vez de no servidor do Telegram."""
+
+    def __init__(self, dados: bytes) -> None:
+        self.dados = dados
+        self.file_path = "voice/file_0.oga"
+
+    async def download_to_drive(self, custom_path: str) -> None:
+        Path(custom_path).write_bytes(self.dados)
+
+    async def download_as_bytearray(self) -> bytearray:
+        return bytearray(self.dados)
+
+
+class _BotFalso:
+    def __init__(self, dados: bytes) -> None:
+        self.arquivo = _ArquivoFalso(dados)
+
+    async def get_file(self, file_id: str) -> _ArquivoFalso:
+        return self.arquivo
+
+
+async def _antes(bot: _BotFalso) -> bytes:
+    """O caminho anterior (baixar_arquivo_voice + ogg_para_wav + sr.AudioFile), com a limpeza do handler."""
+    arquivo = await bot.get_file("x")
+    fd, ogg = tempfile.mkstemp(suffix=Path(arquivo.file_path).suffix, prefix="voice_")
+    os.close(fd)
+    os.unlink(ogg)
+    wav = str(Path(ogg).with_suffix(".wav"))
+    try:
+        await arquivo.download_to_drive(custom_path=ogg)
+        subprocess.run(
+            ["ffmpeg", "-y", "-i", ogg, "-acodec", "pcm_s16le", "-ar", "16000", "-ac", "1", wav],
+            check=True,
+            capture_output=True,
+        )
+        with sr.AudioFile(wav) as source:
+            dados = sr.Recognizer().record(source, duration=audio.DURACAO_MAX_SEGUNDOS)
+        return dados.frame_data
+    finally:
+        for path in (ogg, wav):
+            if Path(path).exists():
+                os.unlink(path)
+
+
+async def _depois(bot: _BotFalso) -> bytes:
+    pcm = await audio.decodificar_pcm(await audio.baixar_voice("x", bot))
+    return sr.AudioData(pcm, audio.TAXA_AMOSTRAGEM, audio.BYTES_POR_AMOSTRA).frame_data
+
+
+def _gerar_voice(segundos: float) -> bytes:
+    """Nota de voz sintética no formato do Telegram (ogg/opus, 48 kHz mono)."""
+    return subprocess.run(
+        [
+            "ffmpeg", "-hide_banner", "-loglevel", "error", "-f", "lavfi",
+            "-i", f"anoisesrc=d={segundos}:c=pink:a=0.2", "-af", "tremolo=f=3:d=0.8",
+            "-ar", "48000", "-ac", "1", "-c:a", "libopus", "-b:a", "32k", "-f", "ogg", "pipe:1",
+        ],
+        check=True,
+        capture_output=True,
+    ).stdout
+
+
+def _medir(caminho, bot: _BotFalso, repeticoes: int) -> tuple[dict, bytes]:
+    """Latência sem tracemalloc (ele encarece cada alocação) e o pico de memória numa passada à parte."""
+    tempos = []
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        asyncio.run(caminho(bot))
+        tempos.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    pcm = asyncio.run(caminho(bot))
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        "p50_ms": round(statistics.median(tempos) * 1000, 1),
+        "max_ms": round(max(tempos) * 1000, 1),
+        "pico_memoria_kib": round(pico / 1024),
+    }, pcm
+
+
+async def _ticker(parar: asyncio.Event, atrasos: list[float], intervalo: float = 0.01) -> None:
+    while not parar.is_set():
+        t0 = time.perf_counter()
+        await asyncio.sleep(intervalo)
+        atrasos.append(time.perf_counter() - t0 - intervalo)
+
+
+async def _simultaneas(bot: _BotFalso, n: int, reconhecimento: float, modo: str) -> dict:
+    def _reconhecer(pcm: bytes, idioma: str = "pt-BR") -> str:
+        time.sleep(reconhecimento)
+        return "ok"
+
+    audio.transcrever = _reconhecer
+    parar = asyncio.Event()
+    atrasos: list[float] = []
+    ticker = asyncio.create_task(_ticker(parar, atrasos))
+    await asyncio.sleep(0.05)
+    t0 = time.perf_counter()
+    if modo == "antes":
+        for _ in range(n):  # updates processados um a um, cada handler bloqueando o loop
+            _reconhecer(await _antes(bot))
+    else:
+        async def _handler() -> str:
+            return await audio.transcrever_voice(await audio.baixar_voice("x", bot))
+
+        await asyncio.gather(*(_handler() for _ in range(n)))
+    total = time.perf_counter() - t0
+    parar.set()
+    await ticker
+    return {"total_s": round(total, 2), "maior_travamento_ms": round(max(atrasos) * 1000, 1)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--segundos", type=float, default=20, help="duração da nota de voz sintética")
+    parser.add_argument("--arquivo", help="usar esta nota de voz (.ogg) em vez da sintética")
+    parser.add_argument("--repeticoes", type=int, default=20)
+    parser.add_argument("--simultaneas", type=int, default=4, help="notas de voz chegando ao mesmo tempo")
+    parser.add_argument("--reconhecimento", type=float, default=1.0, help="duração simulada do reconhecimento (s)")
+    args = parser.parse_args()
+
+    try:
+        dados = Path(args.arquivo).read_bytes() if args.arquivo else _gerar_voice(args.segundos)
+    except FileNotFoundError:
+        sys.exit("ffmpeg não encontrado no PATH")
+    bot = _BotFalso(dados)
+    antes, pcm_antes = _medir(_antes, bot, args.repeticoes)
+    depois, pcm_depois = _medir(_depois, bot, args.repeticoes)
+    print(json.dumps({
+        "voice_bytes": len(dados),
+        "audio_s": round(len(pcm_depois) / (audio.TAXA_AMOSTRAGEM * audio.BYTES_POR_AMOSTRA), 1),
+        "mesmo_pcm": pcm_antes == pcm_depois,
+        "antes": antes,
+        "depois": depois,
+    }))
+    print(json.dumps({
+        "simultaneas": args.simultaneas,
+        "trabalhadores": audio.situacao()["trabalhadores"],
+        "antes": asyncio.run(_simultaneas(bot, args.simultaneas, args.reconhecimento, "antes")),
+        "depois": asyncio.run(_simultaneas(bot, args.simultaneas, args.reconhecimento, "depois")),
+    }))
+
+
+if __name__ == "__main__":
+    main()